@@ -19,7 +19,8 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    # OCR引擎按需导入: 打包版只带 ddddocr 和模板匹配, 不打包 torch 等重量级依赖
+    excludes=['easyocr', 'torch', 'torchvision', 'pytesseract'],
     noarchive=False,
     optimize=0,
 )
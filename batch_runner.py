@@ -0,0 +1,255 @@
+"""
+批量任务 - 在同一个浏览器会话中依次运行多组筛选条件
+
+所有任务共用一个浏览器和已预热的OCR引擎; 多个任务中重复出现的标准(按 hash_id)只爬取一次详情页和PDF。
+结果导出到同一个Excel文件: 每个任务一个工作表, 另有一个按 hash_id 去重的汇总工作表。
+
+用法:
+    python batch_runner.py --departments gxb gab --statuses 现行
+    python batch_runner.py --industries AQ HG --record-dates -12 --list-only
+    python batch_runner.py --jobs jobs.json -o output/batch_standards.xlsx
+
+jobs.json 示例(字段与 FILTER_CONFIG 一致, name 可省略):
+    [{"name": "工信部-现行", "department": "gxb", "status": "现行"},
+     {"industry_code": "AQ", "record_date": "-12"}]
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from utils import setup_logger
+from config import FILTER_CONFIG, OUTPUT_DIR
+from constants import DEPARTMENTS, INDUSTRIES, STATUSES, RECORD_DATES
+from data_processor import DataProcessor, export_sheets_to_excel
+from metrics import metrics
+from scraper import IndustryStandardScraper, add_har_arguments, apply_har_arguments
+
+logger = setup_logger("batch_runner")
+
+# 任务中可设置的筛选条件及其可选值
+FILTER_OPTIONS = {
+    "department": DEPARTMENTS,
+    "industry_code": INDUSTRIES,
+    "status": STATUSES,
+    "record_date": RECORD_DATES,
+}
+
+SUMMARY_SHEET = "全部(去重)"
+
+def _resolve(key: str, value: Optional[str]) -> Optional[str]:
+    """
+    将筛选值(代码或显示名称)转换为代码
+
+    Raises:
+        ValueError: 不是有效的筛选值
+    """
+    if value in (None, "", "全部"):
+        return None
+    for label, code in FILTER_OPTIONS[key]:
+        if code and value in (code, label):
+            return code
+    raise ValueError(f"无效的筛选值 {key}={value}")
+
+def _label(key: str, code: Optional[str]) -> Optional[str]:
+    """筛选代码对应的显示名称"""
+    for label, option in FILTER_OPTIONS[key]:
+        if option == code:
+            return label.split(" - ")[0] if key == "industry_code" else label
+    return code
+
+def normalize_jobs(jobs: Sequence[Dict]) -> List[Dict]:
+    """
+    校验任务的筛选值并生成唯一的任务名
+
+    Args:
+        jobs: 任务列表(筛选字段与 FILTER_CONFIG 一致, 可带 name)
+
+    Returns:
+        规范化后的任务列表
+    """
+    normalized, names = [], set()
+    for job in jobs:
+        unknown = set(job) - set(FILTER_OPTIONS) - {"name"}
+        if unknown:
+            raise ValueError(f"未知的任务字段: {', '.join(sorted(unknown))}")
+        filters = {key: _resolve(key, job.get(key)) for key in FILTER_OPTIONS}
+        name = job.get("name") or "-".join(
+            _label(key, code) for key, code in filters.items() if code
+        ) or "全部"
+        base, n = name, 2
+        while name in names or name == SUMMARY_SHEET:
+            name, n = f"{base}_{n}", n + 1
+        names.add(name)
+        normalized.append({"name": name, **filters})
+    return normalized
+
+def build_jobs(departments: Sequence[str] = (), industries: Sequence[str] = (),
+               statuses: Sequence[str] = (), record_dates: Sequence[str] = ()) -> List[Dict]:
+    """
+    按各筛选条件的组合生成任务(未指定的条件不筛选)
+
+    Returns:
+        任务列表
+    """
+    axes = [list(values) or [None] for values in (departments, industries, statuses, record_dates)]
+    return normalize_jobs([
+        dict(zip(FILTER_OPTIONS, combo)) for combo in itertools.product(*axes)
+    ])
+
+def load_jobs(path: str) -> List[Dict]:
+    """从JSON文件加载任务列表"""
+    with open(path, encoding="utf-8") as f:
+        return normalize_jobs(json.load(f))
+
+def deduplicate(results: Dict[str, List[Dict]]) -> List[Dict]:
+    """
+    按 hash_id(缺失时按标准号)合并各任务结果, 重新编号
+
+    Returns:
+        去重后的标准列表
+    """
+    merged: Dict[str, Dict] = {}
+    for rows in results.values():
+        for row in rows:
+            key = row.get("hash_id") or row.get("标准号")
+            if key not in merged:
+                merged[key] = row
+    return [dict(row, 序号=i) for i, row in enumerate(merged.values(), 1)]
+
+class BatchRunner:
+    """批量任务运行器"""
+
+    def __init__(self, jobs: List[Dict], list_only: bool = False, output: str = None):
+        """
+        初始化批量任务
+
+        Args:
+            jobs: 任务列表(见 normalize_jobs)
+            list_only: 是否仅爬取清单
+            output: 导出的Excel路径
+        """
+        self.jobs = jobs
+        self.list_only = list_only
+        self.output = output or os.path.join(OUTPUT_DIR, "batch_standards.xlsx")
+        self.scraper = IndustryStandardScraper()
+        # hash_id -> 详情信息, 跨任务去重
+        self.known_details: Dict[str, Dict] = {}
+        self.results: Dict[str, List[Dict]] = {}
+
+    def run_job(self, job: Dict) -> List[Dict]:
+        """
+        在当前浏览器会话中运行一个任务
+
+        Returns:
+            该任务的标准列表
+        """
+        FILTER_CONFIG.update({key: job[key] for key in FILTER_OPTIONS})
+        self.scraper.data_processor = DataProcessor()
+
+        with metrics.span("batch_job"):
+            standards = self.scraper.scrape_listing()
+            if not self.list_only:
+                self.scraper.scrape_details(standards, known_details=self.known_details)
+        return self.scraper.data_processor.standards_data
+
+    def run(self) -> Dict[str, List[Dict]]:
+        """
+        依次运行所有任务并导出
+
+        Returns:
+            任务名 -> 标准列表
+        """
+        original_filters = dict(FILTER_CONFIG)
+        scraper = self.scraper
+        try:
+            logger.info("=" * 60)
+            logger.info(f"批量任务启动: 共 {len(self.jobs)} 个任务{'(仅爬取清单)' if self.list_only else ''}")
+            logger.info("=" * 60)
+
+            metrics.start_http_server()
+            if not self.list_only:
+                scraper.captcha_solver.start_warmup()
+                scraper.load_previous_state()
+            with metrics.span("browser_start"):
+                scraper.start_browser()
+
+            for idx, job in enumerate(self.jobs, 1):
+                logger.info(f"[{idx}/{len(self.jobs)}] 开始任务: {job['name']}")
+                try:
+                    self.results[job["name"]] = self.run_job(job)
+                    metrics.inc("batch_jobs", result="success")
+                except KeyboardInterrupt:
+                    raise
+                except Exception as e:
+                    logger.error(f"任务 {job['name']} 失败: {e}", exc_info=True)
+                    self.results[job["name"]] = scraper.data_processor.standards_data
+                    metrics.inc("batch_jobs", result="failed")
+                logger.info(f"任务 {job['name']} 完成: {len(self.results[job['name']])} 条标准")
+
+        except KeyboardInterrupt:
+            logger.warning("用户中断批量任务")
+
+        except Exception as e:
+            logger.error(f"批量任务运行失败: {e}", exc_info=True)
+
+        finally:
+            FILTER_CONFIG.clear()
+            FILTER_CONFIG.update(original_filters)
+            if scraper.response_cache:
+                scraper.response_cache.flush()
+            scraper.close_browser()
+            scraper.export_metrics()
+
+        self.export()
+        return self.results
+
+    def export(self) -> Tuple[int, int]:
+        """
+        导出结果: 汇总工作表(去重) + 每个任务一个工作表
+
+        Returns:
+            (各任务记录总数, 去重后记录数)
+        """
+        if not self.results:
+            logger.warning("没有数据可导出")
+            return 0, 0
+
+        unique = deduplicate(self.results)
+        total = sum(len(rows) for rows in self.results.values())
+        export_sheets_to_excel({SUMMARY_SHEET: unique, **self.results}, self.output)
+        logger.info(f"各任务共 {total} 条, 去重后 {len(unique)} 条, 跳过重复详情 {total - len(unique)} 次")
+        return total, len(unique)
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="批量任务(共用一个浏览器会话)")
+    parser.add_argument("--jobs", help="任务列表JSON文件")
+    parser.add_argument("--departments", nargs="+", default=[], help="部委(代码或名称)")
+    parser.add_argument("--industries", nargs="+", default=[], help="行业代码")
+    parser.add_argument("--statuses", nargs="+", default=[], help="标准状态")
+    parser.add_argument("--record-dates", nargs="+", default=[], help="备案日期(如 -3, -12)")
+    parser.add_argument("--list-only", action="store_true", help="仅爬取清单")
+    parser.add_argument("-o", "--output", help="导出的Excel路径")
+    add_har_arguments(parser)
+    args = parser.parse_args()
+    apply_har_arguments(args)
+
+    try:
+        if args.jobs:
+            jobs = load_jobs(args.jobs)
+        else:
+            jobs = build_jobs(args.departments, args.industries, args.statuses, args.record_dates)
+    except (OSError, ValueError) as e:
+        logger.error(f"加载任务失败: {e}")
+        return 1
+
+    for job in jobs:
+        logger.info(f"任务: {job}")
+    BatchRunner(jobs, list_only=args.list_only, output=args.output).run()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
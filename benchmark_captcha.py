@@ -0,0 +1,388 @@
+"""
+验证码离线基准测试 - 在已标注的验证码图片集上评估各OCR引擎
+
+图片目录约定:
+    - 验证码语料目录(含 index.jsonl, 见 captcha_corpus.py)使用其中被网站确认的样本
+    - 目录下存在 labels.json ({文件名: 标注文本}) 时以其为准
+    - 否则以文件名(去掉扩展名及 "_" 之后的部分)作为标注, 如 wk66.png, wk66_2.png
+
+用法:
+    python benchmark_captcha.py                       # 默认使用 captcha_samples/
+    python benchmark_captcha.py corpus_dir -o result.json
+    python benchmark_captcha.py --engines ddddocr --no-preprocess-variants
+    python benchmark_captcha.py --engines ddddocr --scaling 8      # 1..8 个并行识别器的吞吐
+    python benchmark_captcha.py --engines ddddocr --scaling 8 --unbudgeted
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import platform
+import queue
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime
+from importlib import metadata
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from utils import setup_logger
+from config import BASE_DIR
+from ocr_engines import create_engine, get_engine_class, registered_engines, threads_per_worker
+
+logger = setup_logger("benchmark_captcha")
+
+DEFAULT_CORPUS_DIR = os.path.join(BASE_DIR, "captcha_samples")
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".gif", ".bmp"}
+
+# 结果中记录版本号的依赖包(便于定位升级导致的回归)
+TRACKED_PACKAGES = ["ddddocr", "easyocr", "pytesseract", "onnxruntime", "opencv-python-headless", "numpy", "Pillow"]
+
+# 并发扩展测试中等待单个工作进程结果的最长秒数
+SCALING_RESULT_TIMEOUT = 600
+
+_BARRIER_BROKEN = "其他工作进程加载引擎失败"
+
+def load_labelled_images(corpus_dir: str) -> List[Tuple[str, str, bytes]]:
+    """
+    加载已标注的验证码图片
+
+    Args:
+        corpus_dir: 图片目录
+
+    Returns:
+        [(文件名, 标注文本, 图片字节)]
+    """
+    corpus = Path(corpus_dir)
+    if (corpus / "index.jsonl").exists():
+        from captcha_corpus import CaptchaCorpus
+        return [
+            (path.name, label, path.read_bytes())
+            for path, label in CaptchaCorpus(corpus_dir).labelled_samples()
+            if path.exists()
+        ]
+
+    labels_file = corpus / "labels.json"
+    labels: Dict[str, str] = {}
+    if labels_file.exists():
+        with open(labels_file, encoding="utf-8") as f:
+            labels = json.load(f)
+
+    samples = []
+    for path in sorted(corpus.iterdir()):
+        if path.suffix.lower() not in IMAGE_SUFFIXES:
+            continue
+        label = labels.get(path.name) if labels else path.stem.split("_")[0]
+        if not label:
+            continue
+        samples.append((path.name, label, path.read_bytes()))
+
+    return samples
+
+def _percentile(values: List[float], pct: float) -> float:
+    """计算百分位数(最近秩法)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+def _package_versions() -> Dict[str, Optional[str]]:
+    """获取相关依赖包版本"""
+    versions = {}
+    for name in TRACKED_PACKAGES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+def benchmark_engine(engine: str, preprocess: bool, samples: List[Tuple[str, str, bytes]],
+                     case_sensitive: bool = False) -> Dict:
+    """
+    对单个引擎配置进行基准测试
+
+    Args:
+        engine: OCR引擎名称
+        preprocess: 是否启用 preprocess_image
+        samples: 标注样本
+        case_sensitive: 比较时是否区分大小写(网站验证码不区分大小写)
+
+    Returns:
+        测试结果字典
+    """
+    result = {
+        "engine": engine,
+        "preprocess": preprocess,
+        "available": False,
+    }
+
+    load_start = time.perf_counter()
+    try:
+        ocr = create_engine(engine, preprocess=preprocess)
+    except Exception as e:
+        logger.warning(f"引擎 {engine} 不可用, 跳过: {e}")
+        return result
+    result["model_load_s"] = round(time.perf_counter() - load_start, 4)
+    result["available"] = True
+
+    latencies = []
+    correct = 0
+    failures = []
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+
+    for name, label, img_bytes in samples:
+        start = time.perf_counter()
+        try:
+            text = ocr.solve(img_bytes)[0] or ""
+        except Exception as e:
+            logger.debug(f"{name} 识别出错: {e}")
+            text = ""
+        latencies.append(time.perf_counter() - start)
+
+        expected, actual = (label, text) if case_sensitive else (label.lower(), text.lower())
+        if actual == expected:
+            correct += 1
+        else:
+            failures.append({"file": name, "expected": label, "actual": text})
+
+    wall_total = time.perf_counter() - wall_start
+    cpu_total = time.process_time() - cpu_start
+    count = len(samples)
+
+    # 批量路径(preprocess_images 预分配缓冲区 + 引擎批量推理)
+    batch_start = time.perf_counter()
+    try:
+        ocr.solve_batch([img_bytes for _, _, img_bytes in samples])
+        batch_total = time.perf_counter() - batch_start
+    except Exception as e:
+        logger.debug(f"批量识别出错: {e}")
+        batch_total = 0.0
+
+    result.update({
+        "samples": count,
+        "correct": correct,
+        "accuracy": round(correct / count, 4) if count else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies) * 1000, 3) if latencies else 0.0,
+            "p50": round(_percentile(latencies, 50) * 1000, 3),
+            "p95": round(_percentile(latencies, 95) * 1000, 3),
+        },
+        "throughput_per_s": round(count / wall_total, 3) if wall_total > 0 else 0.0,
+        # 每CPU秒可完成的识别次数 = 单核吞吐
+        "throughput_per_core": round(count / cpu_total, 3) if cpu_total > 0 else 0.0,
+        "batch_throughput_per_s": round(count / batch_total, 3) if batch_total > 0 else 0.0,
+        "failures": failures,
+    })
+    return result
+
+def run_benchmark(corpus_dir: str, engines: List[str], preprocess_variants: bool = True,
+                  case_sensitive: bool = False) -> Dict:
+    """
+    在语料目录上运行全部引擎配置
+
+    Args:
+        corpus_dir: 标注图片目录
+        engines: 待测试的引擎列表
+        preprocess_variants: 是否同时测试开启/关闭预处理两种配置
+        case_sensitive: 是否区分大小写
+
+    Returns:
+        完整的基准测试报告
+    """
+    samples = load_labelled_images(corpus_dir)
+    logger.info(f"已加载 {len(samples)} 张标注验证码: {corpus_dir}")
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "corpus_dir": str(Path(corpus_dir).resolve()),
+        "samples": len(samples),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "packages": _package_versions(),
+        "results": [],
+    }
+    if not samples:
+        logger.warning("语料目录中没有可用的标注图片")
+        return report
+
+    for engine in engines:
+        engine_cls = get_engine_class(engine)
+        if engine_cls is None:
+            logger.warning(f"未知的OCR引擎: {engine}, 跳过")
+            continue
+        if engine_cls.dependencies_installed() and not engine_cls.is_available():
+            # 如模板未训练: 加载后会直接使用回退引擎, 结果不代表该引擎
+            logger.warning(f"OCR引擎 {engine} 缺少所需资源(如未训练模板), 跳过")
+            continue
+        default = engine_cls.default_preprocess
+        variants = [default, not default] if preprocess_variants else [default]
+        for preprocess in variants:
+            logger.info(f"测试引擎: {engine} (预处理: {preprocess})")
+            result = benchmark_engine(engine, preprocess, samples, case_sensitive)
+            report["results"].append(result)
+            if result["available"]:
+                logger.info(
+                    f"  准确率: {result['accuracy']:.1%}  "
+                    f"p50: {result['latency_ms']['p50']:.1f}ms  "
+                    f"p95: {result['latency_ms']['p95']:.1f}ms  "
+                    f"单核吞吐: {result['throughput_per_core']:.1f}/s  "
+                    f"加载: {result['model_load_s']:.2f}s"
+                )
+
+    return report
+
+def _scaling_worker(engine: str, threads: int, images: List[bytes], rounds: int, barrier, results) -> None:
+    """并发扩展测试的工作进程: 加载引擎后等待所有进程就绪, 再计时识别"""
+    try:
+        ocr = create_engine(engine, threads=threads)
+        ocr.warm_up()
+    except Exception as e:
+        results.put({"error": str(e)})
+        barrier.abort()
+        return
+
+    try:
+        barrier.wait()
+    except threading.BrokenBarrierError:
+        results.put({"error": _BARRIER_BROKEN})
+        return
+    start = time.perf_counter()
+    solved = 0
+    for _ in range(rounds):
+        for img_bytes in images:
+            try:
+                ocr.solve(img_bytes)
+            except Exception:
+                pass
+            solved += 1
+    results.put({"solved": solved, "elapsed": time.perf_counter() - start})
+
+def run_scaling_benchmark(corpus_dir: str, engine: str, max_workers: int, rounds: int = 5,
+                          thread_budget: int = None, budgeted: bool = True) -> Dict:
+    """
+    测试单机上并行识别器数量从1增加到N时的总吞吐
+
+    Args:
+        corpus_dir: 标注图片目录
+        engine: OCR引擎
+        max_workers: 最大并行识别器数量
+        rounds: 每个识别器遍历语料的轮数
+        thread_budget: 总线程预算(None表示CPU核心数)
+        budgeted: 是否按预算为每个识别器分配线程(False时使用引擎默认线程数, 用于对比)
+
+    Returns:
+        扩展测试报告
+    """
+    images = [img_bytes for _, _, img_bytes in load_labelled_images(corpus_dir)]
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "corpus_dir": str(Path(corpus_dir).resolve()),
+        "engine": engine,
+        "samples": len(images),
+        "rounds": rounds,
+        "cpu_count": os.cpu_count(),
+        "thread_budget": thread_budget or os.cpu_count(),
+        "budgeted": budgeted,
+        "packages": _package_versions(),
+        "results": [],
+    }
+    if not images:
+        logger.warning("语料目录中没有可用的标注图片")
+        return report
+
+    ctx = multiprocessing.get_context("spawn")
+    for workers in range(1, max_workers + 1):
+        threads = threads_per_worker(thread_budget, workers) if budgeted else None
+        barrier = ctx.Barrier(workers)
+        results = ctx.Queue()
+        procs = [
+            ctx.Process(target=_scaling_worker, args=(engine, threads, images, rounds, barrier, results))
+            for _ in range(workers)
+        ]
+        for proc in procs:
+            proc.start()
+        outcomes = []
+        try:
+            for _ in procs:
+                outcomes.append(results.get(timeout=SCALING_RESULT_TIMEOUT))
+        except queue.Empty:
+            outcomes.append({"error": f"{SCALING_RESULT_TIMEOUT}s 内未收到工作进程的结果"})
+            for proc in procs:
+                proc.terminate()
+        for proc in procs:
+            proc.join()
+
+        errors = [o["error"] for o in outcomes if "error" in o]
+        if errors:
+            # 优先报告加载失败的原因, 而不是其他进程因此退出的提示
+            error = next((e for e in errors if e != _BARRIER_BROKEN), errors[0])
+            logger.error(f"引擎 {engine} 无法运行: {error}")
+            report["error"] = error
+            break
+
+        solved = sum(o["solved"] for o in outcomes)
+        elapsed = max(o["elapsed"] for o in outcomes)
+        entry = {
+            "workers": workers,
+            "threads_per_worker": threads,
+            "solves_per_s": round(solved / elapsed, 3) if elapsed > 0 else 0.0,
+            "per_worker_solves_per_s": round(solved / elapsed / workers, 3) if elapsed > 0 else 0.0,
+        }
+        report["results"].append(entry)
+        logger.info(
+            f"识别器 {workers} 个 (每个 {threads or '默认'} 线程): "
+            f"总吞吐 {entry['solves_per_s']:.1f}/s, 单个 {entry['per_worker_solves_per_s']:.1f}/s"
+        )
+
+    return report
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="验证码离线基准测试")
+    parser.add_argument("corpus_dir", nargs="?", default=DEFAULT_CORPUS_DIR, help="已标注的验证码图片目录")
+    parser.add_argument("--engines", nargs="+", default=registered_engines(), help="待测试的OCR引擎")
+    parser.add_argument("--no-preprocess-variants", action="store_true", help="仅测试各引擎默认的预处理配置")
+    parser.add_argument("--case-sensitive", action="store_true", help="比较结果时区分大小写")
+    parser.add_argument("--scaling", type=int, metavar="N", help="测试1..N个并行识别器的吞吐(使用 --engines 中的第一个引擎)")
+    parser.add_argument("--rounds", type=int, default=5, help="扩展测试中每个识别器遍历语料的轮数")
+    parser.add_argument("--thread-budget", type=int, help="扩展测试的总线程预算(默认CPU核心数)")
+    parser.add_argument("--unbudgeted", action="store_true", help="扩展测试中不限制线程数(用于对比CPU超额订阅)")
+    parser.add_argument("-o", "--output", help="结果JSON输出路径(默认输出到标准输出)")
+    args = parser.parse_args()
+
+    if args.scaling:
+        report = run_scaling_benchmark(
+            args.corpus_dir,
+            args.engines[0],
+            args.scaling,
+            rounds=args.rounds,
+            thread_budget=args.thread_budget,
+            budgeted=not args.unbudgeted,
+        )
+    else:
+        report = run_benchmark(
+            args.corpus_dir,
+            args.engines,
+            preprocess_variants=not args.no_preprocess_variants,
+            case_sensitive=args.case_sensitive,
+        )
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+        logger.info(f"基准测试结果已保存: {args.output}")
+    else:
+        print(text)
+
+    return 0 if report["results"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
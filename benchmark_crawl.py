@@ -0,0 +1,270 @@
+"""
+爬取吞吐基准测试 - 在本地模拟站点(mock_site.py)上端到端运行爬虫
+
+每种模式在独立子进程中运行(仅爬清单 / 完整爬取含PDF下载), 父进程负责启动模拟站点并统计:
+    - 每分钟处理的标准数(items/min)
+    - 子进程树的CPU时间(用户态+内核态, 含浏览器进程)
+    - 峰值内存(子进程树中最大的单个进程RSS)
+    - 子进程内的各阶段耗时汇总(见 metrics.py)
+
+用法:
+    python benchmark_crawl.py -o output/bench_crawl.json
+    python benchmark_crawl.py --modes list --list-count 2000 --latency 0.05
+    python benchmark_crawl.py --modes full --full-count 50 --error-rate 0.05 --ocr-engine ddddocr
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from utils import setup_logger
+from mock_site import MockSite, point_scraper_at
+
+logger = setup_logger("benchmark_crawl")
+
+MODES = ("list", "full")
+
+# 各模式成功运行后必然出现的阶段(缺少时说明爬取中途失败, 如浏览器启动失败)
+EXPECTED_STAGES = {
+    "list": ("list_page",),
+    "full": ("list_page", "detail_page", "pdf_download"),
+}
+
+def _children_usage() -> Optional[Dict[str, float]]:
+    """已结束子进程(含其子孙进程)的累计资源使用"""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    # ru_maxrss 在 Linux 上单位为KB, macOS 上为字节
+    rss_mb = usage.ru_maxrss / (1024 * 1024) if sys.platform == "darwin" else usage.ru_maxrss / 1024
+    return {"cpu_s": usage.ru_utime + usage.ru_stime, "max_rss_mb": rss_mb}
+
+def _configure_child(base_url: str, output_dir: str, ocr_engine: Optional[str]) -> None:
+    """
+    子进程: 在导入爬虫模块之前把输出目录、延迟和目标站点改为基准测试配置
+    """
+    import config
+
+    config.OUTPUT_DIR = output_dir
+    config.PDF_DIR = os.path.join(output_dir, "pdfs")
+    config.EXCEL_OUTPUT = os.path.join(output_dir, "standards.xlsx")
+    config.CAPTCHA_CORPUS_CONFIG["dir"] = os.path.join(output_dir, "captcha_corpus")
+    config.METRICS_CONFIG["prom_file"] = os.path.join(output_dir, "metrics.prom")
+    config.METRICS_CONFIG["summary_file"] = os.path.join(output_dir, "metrics_summary.json")
+
+    # 基准测试只关心爬虫自身的开销, 去掉随机延迟
+    for key in config.DELAY_CONFIG:
+        config.DELAY_CONFIG[key] = (0, 0)
+    config.BROWSER_CONFIG["headless"] = True
+    config.FILTER_CONFIG.update({"department": None, "industry_code": None, "status": None})
+    if ocr_engine:
+        config.CAPTCHA_CONFIG["ocr_engine"] = ocr_engine
+
+    point_scraper_at(base_url)
+
+def run_child(mode: str, base_url: str, output_dir: str, result_file: str, ocr_engine: Optional[str]) -> int:
+    """
+    子进程入口: 运行一次爬取并写出结果
+
+    Returns:
+        退出码
+    """
+    _configure_child(base_url, output_dir, ocr_engine)
+
+    from metrics import metrics
+    if mode == "list":
+        from scraper_list_only import ListOnlyScraper as Scraper
+    else:
+        from scraper import IndustryStandardScraper as Scraper
+
+    scraper = Scraper()
+    start = time.perf_counter()
+    scraper.run()
+    elapsed = time.perf_counter() - start
+
+    standards = scraper.data_processor.standards_data
+    stages = metrics.summary()["stages"]
+    result = {
+        "mode": mode,
+        "items": len(standards),
+        "pdfs": len([s for s in standards if s.get("PDF文件名")]),
+        "run_s": round(elapsed, 3),
+        "stages": stages,
+    }
+    # scraper.run() 会捕获所有异常, 需根据结果判断爬取是否真正完成
+    recorded = {stage.get("stage") for stage in stages}
+    missing = [stage for stage in EXPECTED_STAGES[mode] if stage not in recorded]
+    if not standards or missing:
+        result["error"] = "未爬取到任何标准" if not standards else f"缺少阶段: {', '.join(missing)}"
+        logger.error(f"{mode} 模式爬取失败: {result['error']}")
+    with open(result_file, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False)
+    return 1 if "error" in result else 0
+
+def benchmark_mode(mode: str, site: MockSite, ocr_engine: Optional[str], timeout: float) -> Dict:
+    """
+    在子进程中运行一种模式并统计吞吐与资源占用
+
+    Args:
+        mode: "list" 或 "full"
+        site: 已启动的模拟站点
+        ocr_engine: 完整模式使用的OCR引擎
+        timeout: 子进程超时(秒)
+
+    Returns:
+        该模式的结果
+    """
+    with tempfile.TemporaryDirectory(prefix=f"bench_crawl_{mode}_") as output_dir:
+        result_file = os.path.join(output_dir, "result.json")
+        cmd = [
+            sys.executable, os.path.abspath(__file__),
+            "--child", mode,
+            "--base-url", site.url,
+            "--output-dir", output_dir,
+            "--result-file", result_file,
+        ]
+        if ocr_engine:
+            cmd += ["--ocr-engine", ocr_engine]
+
+        before = _children_usage()
+        wall_start = time.perf_counter()
+        try:
+            proc = subprocess.run(cmd, timeout=timeout)
+            returncode = proc.returncode
+        except subprocess.TimeoutExpired:
+            logger.error(f"{mode} 模式超时({timeout}s)")
+            returncode = None
+        wall = time.perf_counter() - wall_start
+        after = _children_usage()
+
+        result = {"mode": mode, "returncode": returncode, "wall_s": round(wall, 3)}
+        if Path(result_file).exists():
+            with open(result_file, encoding="utf-8") as f:
+                result.update(json.load(f))
+
+    items = result.get("items", 0)
+    run_s = result.get("run_s") or wall
+    result["items_per_min"] = round(items / run_s * 60, 1) if run_s > 0 else 0.0
+
+    if before and after:
+        cpu = after["cpu_s"] - before["cpu_s"]
+        result["cpu_s"] = round(cpu, 3)
+        result["cpu_ms_per_item"] = round(cpu / items * 1000, 1) if items else None
+        # RUSAGE_CHILDREN 的 maxrss 为历史最大值, 仅在其增长时可归因于本模式
+        result["max_rss_mb"] = round(after["max_rss_mb"], 1)
+    return result
+
+def run_crawl_benchmark(modes: List[str], list_count: int, full_count: int, latency: float, jitter: float,
+                        error_rate: float, not_public_rate: float, seed: int = 0,
+                        ocr_engine: Optional[str] = None, timeout: float = 3600) -> Dict:
+    """
+    运行端到端爬取基准测试
+
+    Returns:
+        完整的基准测试报告
+    """
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "site": {
+            "latency_s": latency,
+            "jitter_s": jitter,
+            "error_rate": error_rate,
+            "not_public_rate": not_public_rate,
+            "seed": seed,
+        },
+        "results": [],
+    }
+
+    for mode in modes:
+        count = list_count if mode == "list" else full_count
+        site = MockSite(
+            count=count,
+            seed=seed,
+            latency=latency,
+            jitter=jitter,
+            error_rate=error_rate,
+            not_public_rate=not_public_rate,
+        )
+        site.start()
+        logger.info(f"开始测试 {mode} 模式({count} 条标准)")
+        try:
+            result = benchmark_mode(mode, site, ocr_engine, timeout)
+        finally:
+            site.stop()
+        result["catalogue_size"] = count
+        result["site_stats"] = dict(site.stats)
+        report["results"].append(result)
+
+        logger.info(
+            f"  {mode}: {result.get('items', 0)} 条, {result['items_per_min']:.1f} 条/分钟, "
+            f"CPU {result.get('cpu_s', 'N/A')}s, 峰值内存 {result.get('max_rss_mb', 'N/A')}MB"
+        )
+
+    return report
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="爬取吞吐基准测试(本地模拟站点)")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES), help="测试模式")
+    parser.add_argument("--list-count", type=int, default=500, help="仅爬清单模式的标准数量")
+    parser.add_argument("--full-count", type=int, default=30, help="完整爬取模式的标准数量")
+    parser.add_argument("--latency", type=float, default=0.02, help="模拟站点每个请求的基础延迟(秒)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="模拟站点额外随机延迟上限(秒)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="模拟站点返回503的请求比例")
+    parser.add_argument("--not-public-rate", type=float, default=0.1, help="未公开标准比例")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--ocr-engine", help="完整模式使用的OCR引擎(默认使用配置)")
+    parser.add_argument("--timeout", type=float, default=3600, help="每种模式的超时时间(秒)")
+    parser.add_argument("-o", "--output", help="结果JSON输出路径(默认输出到标准输出)")
+
+    # 内部参数: 子进程模式
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    parser.add_argument("--output-dir", help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return run_child(args.child, args.base_url, args.output_dir, args.result_file, args.ocr_engine)
+
+    report = run_crawl_benchmark(
+        args.modes,
+        list_count=args.list_count,
+        full_count=args.full_count,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        not_public_rate=args.not_public_rate,
+        seed=args.seed,
+        ocr_engine=args.ocr_engine,
+        timeout=args.timeout,
+    )
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+        logger.info(f"基准测试结果已保存: {args.output}")
+    else:
+        print(text)
+
+    return 0 if all(r.get("returncode") == 0 for r in report["results"]) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""
+DataProcessor 扩展性基准测试 - 用模拟目录在不同规模下测量各操作耗时
+
+对每个规模依次测量: 添加列表数据、合并详情信息、统计、保存/加载检查点、导出Excel/CSV,
+并根据相邻规模的耗时计算增长指数(耗时 ∝ n^k)。k 明显大于1说明存在超线性(如O(n²))行为。
+
+用法:
+    python benchmark_data_processor.py                          # 1000, 10000 条
+    python benchmark_data_processor.py --sizes 1000 10000 100000 -o output/bench_dp.json
+    python benchmark_data_processor.py --sizes 100000 --ops add merge statistics
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from utils import setup_logger, format_pdf_filename
+from catalogue_generator import generate_catalogue, list_fields, detail_fields
+from data_processor import DataProcessor
+
+logger = setup_logger("benchmark_data_processor")
+
+OPERATIONS = ("add", "merge", "statistics", "save_checkpoint", "load_checkpoint", "export_excel", "export_csv")
+
+# 增长指数超过该值时标记为超线性
+SUPERLINEAR_EXPONENT = 1.3
+
+def _timed(func: Callable[[], object]) -> float:
+    """执行并返回耗时(秒)"""
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+def benchmark_size(size: int, ops: List[str], seed: int = 0) -> Dict[str, float]:
+    """
+    在一个规模下测量各操作耗时
+
+    Args:
+        size: 标准数量
+        ops: 待测量的操作
+        seed: 目录随机种子
+
+    Returns:
+        {操作: 耗时(秒)}
+    """
+    records = generate_catalogue(size, seed)
+    list_items = [list_fields(r, i) for i, r in enumerate(records, 1)]
+    details = []
+    for i, record in enumerate(records):
+        detail = detail_fields(record)
+        # 约3/4的标准已下载PDF
+        detail["PDF文件名"] = format_pdf_filename(record["标准号"], record["标准名称"]) if i % 4 else ""
+        details.append((record["标准号"], detail))
+
+    timings: Dict[str, float] = {}
+    processor = DataProcessor()
+
+    def add_all():
+        for item in list_items:
+            processor.add_standard(item)
+
+    def merge_all():
+        for std_code, detail in details:
+            processor.merge_detail_info(std_code, detail)
+
+    # 添加与合并是后续操作的前提, 即使未选中也要执行
+    elapsed = _timed(add_all)
+    if "add" in ops:
+        timings["add"] = elapsed
+    elapsed = _timed(merge_all)
+    if "merge" in ops:
+        timings["merge"] = elapsed
+
+    if "statistics" in ops:
+        timings["statistics"] = _timed(processor.get_statistics)
+
+    with tempfile.TemporaryDirectory(prefix="bench_dp_") as tmp:
+        checkpoint = os.path.join(tmp, "checkpoint.xlsx")
+        if "save_checkpoint" in ops or "load_checkpoint" in ops:
+            elapsed = _timed(lambda: processor.save_checkpoint(checkpoint))
+            if "save_checkpoint" in ops:
+                timings["save_checkpoint"] = elapsed
+        if "load_checkpoint" in ops:
+            timings["load_checkpoint"] = _timed(lambda: DataProcessor().load_checkpoint(checkpoint))
+        if "export_excel" in ops:
+            timings["export_excel"] = _timed(lambda: processor.export_to_excel(os.path.join(tmp, "standards.xlsx")))
+        if "export_csv" in ops:
+            timings["export_csv"] = _timed(lambda: processor.export_to_csv(os.path.join(tmp, "standards.csv")))
+
+    return timings
+
+def growth_exponents(results: List[Dict]) -> Dict[str, List[float]]:
+    """
+    计算相邻规模之间各操作的增长指数 k (t2/t1 = (n2/n1)^k)
+
+    Args:
+        results: 按规模升序的结果 [{"size": n, "timings": {...}}]
+
+    Returns:
+        {操作: [k, ...]}
+    """
+    exponents: Dict[str, List[float]] = {}
+    for prev, cur in zip(results, results[1:]):
+        ratio = math.log(cur["size"] / prev["size"])
+        for op, t2 in cur["timings"].items():
+            t1 = prev["timings"].get(op)
+            # 过短的耗时受计时噪声影响, 不参与计算
+            if not t1 or t1 < 1e-3 or t2 <= 0:
+                continue
+            exponents.setdefault(op, []).append(round(math.log(t2 / t1) / ratio, 2))
+    return exponents
+
+def run_data_processor_benchmark(sizes: List[int], ops: List[str], seed: int = 0) -> Dict:
+    """
+    运行全部规模的基准测试
+
+    Returns:
+        完整的基准测试报告
+    """
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "results": [],
+    }
+
+    for size in sorted(sizes):
+        logger.info(f"测试规模: {size} 条")
+        timings = benchmark_size(size, ops, seed)
+        report["results"].append({
+            "size": size,
+            "timings": {op: round(t, 4) for op, t in timings.items()},
+            "us_per_item": {op: round(t / size * 1e6, 2) for op, t in timings.items()},
+        })
+        for op, t in timings.items():
+            logger.info(f"  {op:<16} {t:>9.3f}s  ({t / size * 1e6:.1f} µs/条)")
+
+    exponents = growth_exponents(report["results"])
+    report["growth_exponents"] = exponents
+    report["superlinear"] = sorted(op for op, ks in exponents.items() if max(ks) > SUPERLINEAR_EXPONENT)
+    if report["superlinear"]:
+        logger.warning(f"以下操作的耗时随规模超线性增长: {', '.join(report['superlinear'])}")
+    return report
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="DataProcessor 扩展性基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000], help="测试的标准数量")
+    parser.add_argument("--ops", nargs="+", choices=OPERATIONS, default=list(OPERATIONS), help="测试的操作")
+    parser.add_argument("--seed", type=int, default=0, help="目录随机种子")
+    parser.add_argument("-o", "--output", help="结果JSON输出路径(默认输出到标准输出)")
+    args = parser.parse_args()
+
+    report = run_data_processor_benchmark(args.sizes, args.ops, args.seed)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+        logger.info(f"基准测试结果已保存: {args.output}")
+    else:
+        print(text)
+
+    return 0 if not report["superlinear"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
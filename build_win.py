@@ -28,6 +28,12 @@ def build_app():
         '--hidden-import=PIL',
         '--hidden-import=openpyxl',
         '--hidden-import=PySide6',
+        
+        # OCR引擎按需导入, 不打包 EasyOCR/torch 等重量级依赖
+        '--exclude-module=easyocr',
+        '--exclude-module=torch',
+        '--exclude-module=torchvision',
+        '--exclude-module=pytesseract',
     ]
     
     # Check for icon (Windows uses .ico)
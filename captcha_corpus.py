@@ -0,0 +1,209 @@
+"""
+验证码语料收集模块 - 根据下载结果自动标注验证码图片
+
+下载能否开始即是网站给出的验证码判定: 下载开始说明识别正确(accepted),
+否则说明识别错误(rejected)。每张验证码按图片哈希去重保存, 并记录提交文本、
+引擎、置信度和判定结果, 用于离线评估与调优识别准确率(见 benchmark_captcha.py)。
+
+目录结构:
+    <corpus_dir>/images/<sha1>.png   验证码图片
+    <corpus_dir>/index.jsonl         追加写入的元数据(同一哈希以最后一条为准)
+"""
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from utils import setup_logger, ensure_dir
+from config import CAPTCHA_CORPUS_CONFIG
+
+logger = setup_logger("captcha_corpus")
+
+ACCEPTED = "accepted"
+REJECTED = "rejected"
+
+class CaptchaCorpus:
+    """验证码语料库(按图片哈希去重, 按数量和容量封顶)"""
+
+    def __init__(self, corpus_dir: str = None, max_images: int = None, max_bytes: int = None):
+        """
+        初始化语料库
+
+        Args:
+            corpus_dir: 语料目录
+            max_images: 最多保存的图片数量
+            max_bytes: 图片总容量上限(字节)
+        """
+        self.corpus_dir = Path(corpus_dir or CAPTCHA_CORPUS_CONFIG["dir"])
+        self.image_dir = self.corpus_dir / "images"
+        self.index_file = self.corpus_dir / "index.jsonl"
+        self.max_images = max_images or CAPTCHA_CORPUS_CONFIG.get("max_images", 5000)
+        self.max_bytes = max_bytes or CAPTCHA_CORPUS_CONFIG.get("max_mb", 50) * 1024 * 1024
+
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        self._total_bytes = 0
+
+        ensure_dir(str(self.image_dir))
+        self._load_index()
+
+    def _load_index(self) -> None:
+        """加载索引(同一哈希以最后一条记录为准)"""
+        if not self.index_file.exists():
+            return
+
+        with open(self.index_file, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self._entries[entry["hash"]] = entry
+
+        self._total_bytes = sum(e.get("size", 0) for e in self._entries.values())
+        logger.debug(f"已加载验证码语料索引: {len(self._entries)} 条")
+
+    def _append_index(self, entry: Dict) -> None:
+        """追加一条索引记录"""
+        with open(self.index_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(
+        self,
+        img_bytes: bytes,
+        text: str,
+        engine: str,
+        confidence: Optional[float],
+        outcome: str,
+    ) -> Optional[str]:
+        """
+        记录一次验证码提交
+
+        Args:
+            img_bytes: 验证码图片字节数据
+            text: 提交的验证码文本
+            engine: 识别引擎
+            confidence: 识别置信度(引擎不提供时为None)
+            outcome: 判定结果 (accepted/rejected)
+
+        Returns:
+            图片哈希, 失败时返回None
+        """
+        try:
+            img_hash = hashlib.sha1(img_bytes).hexdigest()
+
+            with self._lock:
+                existing = self._entries.get(img_hash)
+                # 已被网站确认的标注不会被之后的错误提交覆盖
+                if existing and existing["outcome"] == ACCEPTED and outcome != ACCEPTED:
+                    return img_hash
+
+                filename = f"{img_hash}.png"
+                if not existing:
+                    (self.image_dir / filename).write_bytes(img_bytes)
+                    self._total_bytes += len(img_bytes)
+
+                entry = {
+                    "hash": img_hash,
+                    "file": filename,
+                    "text": text,
+                    "engine": engine,
+                    "confidence": confidence,
+                    "outcome": outcome,
+                    "size": len(img_bytes),
+                    "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+                }
+                self._entries[img_hash] = entry
+                self._append_index(entry)
+                self._enforce_limits()
+
+            logger.debug(f"验证码样本已记录: {text} ({outcome})")
+            return img_hash
+
+        except Exception as e:
+            logger.error(f"记录验证码样本失败: {e}")
+            return None
+
+    def update_outcome(self, img_hash: str, outcome: str) -> bool:
+        """
+        更新已记录样本的判定结果(如下载后发现服务器返回验证码错误页面)
+
+        Args:
+            img_hash: 图片哈希
+            outcome: 判定结果
+
+        Returns:
+            是否更新成功
+        """
+        with self._lock:
+            entry = self._entries.get(img_hash)
+            if not entry:
+                return False
+            entry = dict(entry, outcome=outcome, timestamp=time.strftime("%Y-%m-%d %H:%M:%S"))
+            self._entries[img_hash] = entry
+            self._append_index(entry)
+        return True
+
+    def _enforce_limits(self) -> None:
+        """超出数量或容量上限时淘汰最旧的样本(优先淘汰被拒绝的样本)"""
+        if len(self._entries) <= self.max_images and self._total_bytes <= self.max_bytes:
+            return
+
+        # 被拒绝的样本没有可靠标注, 先淘汰; 同类按时间从旧到新
+        candidates = sorted(
+            self._entries.values(),
+            key=lambda e: (e["outcome"] == ACCEPTED, e["timestamp"]),
+        )
+        removed = 0
+        for entry in candidates:
+            if len(self._entries) <= self.max_images and self._total_bytes <= self.max_bytes:
+                break
+            self._entries.pop(entry["hash"], None)
+            self._total_bytes -= entry.get("size", 0)
+            (self.image_dir / entry["file"]).unlink(missing_ok=True)
+            removed += 1
+
+        # 重写索引, 避免追加日志无限增长
+        tmp_file = self.index_file.with_suffix(".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            for entry in self._entries.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        tmp_file.replace(self.index_file)
+        logger.info(f"验证码语料超出上限, 已淘汰 {removed} 个样本")
+
+    def labelled_samples(self) -> List[Tuple[Path, str]]:
+        """
+        获取已被网站确认的标注样本
+
+        Returns:
+            [(图片路径, 标注文本)]
+        """
+        with self._lock:
+            return [
+                (self.image_dir / e["file"], e["text"])
+                for e in self._entries.values()
+                if e["outcome"] == ACCEPTED
+            ]
+
+    def get_statistics(self) -> Dict:
+        """
+        获取语料统计信息
+
+        Returns:
+            统计信息字典
+        """
+        with self._lock:
+            stats = {"总数": len(self._entries), "容量(KB)": round(self._total_bytes / 1024, 1)}
+            by_engine: Dict[str, Dict[str, int]] = {}
+            for entry in self._entries.values():
+                counts = by_engine.setdefault(entry["engine"], {ACCEPTED: 0, REJECTED: 0})
+                counts[entry["outcome"]] = counts.get(entry["outcome"], 0) + 1
+            stats["按引擎"] = by_engine
+            return stats
@@ -0,0 +1,202 @@
+"""
+验证码图片预处理模块
+
+OpenCV/NumPy/PIL 仅在首次调用时导入, 避免仅导入爬虫模块时就承担其加载开销
+"""
+import io
+from typing import Dict, List, Tuple
+from utils import setup_logger
+
+logger = setup_logger("captcha_preprocess")
+
+def decode_image(img_bytes: bytes):
+    """
+    将图片字节解码为RGB numpy数组(不做预处理)
+
+    Args:
+        img_bytes: 原始图片字节数据
+
+    Returns:
+        RGB图片(numpy数组)
+    """
+    import numpy as np
+    from PIL import Image
+    return np.array(Image.open(io.BytesIO(img_bytes)).convert("RGB"))
+
+def encode_png(img_array) -> bytes:
+    """
+    将numpy数组编码为PNG字节
+
+    Args:
+        img_array: 图片数组
+
+    Returns:
+        PNG字节数据
+    """
+    import cv2
+    ok, encoded = cv2.imencode(".png", img_array)
+    if not ok:
+        raise ValueError("PNG编码失败")
+    return encoded.tobytes()
+
+def preprocess_image(img_bytes: bytes):
+    """
+    预处理验证码图片(针对彩色字符和干扰线优化)
+
+    Args:
+        img_bytes: 原始图片字节数据
+
+    Returns:
+        预处理后的图片(numpy数组)
+    """
+    import cv2
+    import numpy as np
+    from PIL import Image
+
+    try:
+        # 转换为PIL Image
+        img = Image.open(io.BytesIO(img_bytes))
+
+        # 转换为numpy数组
+        img_array = np.array(img)
+
+        # 如果是RGBA,转换为RGB
+        if len(img_array.shape) == 3 and img_array.shape[2] == 4:
+            img_array = cv2.cvtColor(img_array, cv2.COLOR_RGBA2RGB)
+
+        # 转换为灰度图
+        if len(img_array.shape) == 3:
+            gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
+        else:
+            gray = img_array
+
+        # 放大图片(提高识别率)
+        scale_factor = 3
+        height, width = gray.shape
+        gray = cv2.resize(gray, (width * scale_factor, height * scale_factor),
+                        interpolation=cv2.INTER_CUBIC)
+
+        # 高斯模糊(去除噪点)
+        blurred = cv2.GaussianBlur(gray, (3, 3), 0)
+
+        # 自适应阈值二值化(对不均匀光照更有效)
+        binary = cv2.adaptiveThreshold(
+            blurred, 255,
+            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+            cv2.THRESH_BINARY,
+            11, 2
+        )
+
+        # 反转颜色(如果背景是白色,字符是黑色)
+        # 检查平均亮度,如果背景较暗则反转
+        if np.mean(binary) < 127:
+            binary = cv2.bitwise_not(binary)
+
+        # 形态学操作(去除小噪点,连接断裂字符)
+        kernel = np.ones((2, 2), np.uint8)
+
+        # 先腐蚀(去除小噪点)
+        eroded = cv2.erode(binary, kernel, iterations=1)
+
+        # 再膨胀(恢复字符大小)
+        dilated = cv2.dilate(eroded, kernel, iterations=1)
+
+        # 中值滤波(进一步降噪)
+        cleaned = cv2.medianBlur(dilated, 3)
+
+        logger.debug("图片预处理完成(增强版)")
+        return cleaned
+
+    except Exception as e:
+        logger.error(f"图片预处理失败: {e}")
+        # 返回原始图片
+        img = Image.open(io.BytesIO(img_bytes))
+        return np.array(img)
+
+def _batch_supported(img_array) -> bool:
+    """批量路径仅处理常见的8位灰度/RGB/RGBA图片, 其他格式走单张路径以保证结果一致"""
+    import numpy as np
+    if img_array.dtype != np.uint8:
+        return False
+    return img_array.ndim == 2 or (img_array.ndim == 3 and img_array.shape[2] in (3, 4))
+
+def preprocess_images(img_bytes_list: List[bytes]) -> list:
+    """
+    批量预处理验证码图片, 结果与逐张调用 preprocess_image 完全一致
+
+    同尺寸的图片解码到同一个预分配的灰度栈中, 之后的放大、模糊、二值化、
+    形态学和中值滤波均写入复用的缓冲区(OpenCV dst 参数), 避免每一步都分配新数组。
+    同尺寸图片的结果是同一个 (N, 3H, 3W) 数组栈的视图。
+
+    Args:
+        img_bytes_list: 原始图片字节数据列表
+
+    Returns:
+        预处理后的图片列表(与输入顺序一致)
+    """
+    import cv2
+    import numpy as np
+    from PIL import Image
+
+    results = [None] * len(img_bytes_list)
+
+    # 仅读取文件头即可得到尺寸, 按尺寸分组
+    groups: Dict[Tuple[int, int], List[Tuple[int, object]]] = {}
+    for idx, img_bytes in enumerate(img_bytes_list):
+        try:
+            img = Image.open(io.BytesIO(img_bytes))
+        except Exception:
+            results[idx] = preprocess_image(img_bytes)
+            continue
+        width, height = img.size
+        groups.setdefault((height, width), []).append((idx, img))
+
+    scale_factor = 3
+    kernel = np.ones((2, 2), np.uint8)
+
+    for (height, width), items in groups.items():
+        big = (height * scale_factor, width * scale_factor)
+
+        # 每组一次性分配: 灰度栈、输出栈以及各步骤复用的缓冲区
+        gray_stack = np.empty((len(items), height, width), dtype=np.uint8)
+        out_stack = np.empty((len(items),) + big, dtype=np.uint8)
+        rgb_buf = np.empty((height, width, 3), dtype=np.uint8)
+        upscaled = np.empty(big, dtype=np.uint8)
+        blurred = np.empty(big, dtype=np.uint8)
+        binary = np.empty(big, dtype=np.uint8)
+        eroded = np.empty(big, dtype=np.uint8)
+
+        for pos, (idx, img) in enumerate(items):
+            img_array = np.asarray(img)
+            if not _batch_supported(img_array):
+                results[idx] = preprocess_image(img_bytes_list[idx])
+                continue
+
+            gray = gray_stack[pos]
+            if img_array.ndim == 2:
+                np.copyto(gray, img_array)
+            elif img_array.shape[2] == 4:
+                cv2.cvtColor(img_array, cv2.COLOR_RGBA2RGB, dst=rgb_buf)
+                cv2.cvtColor(rgb_buf, cv2.COLOR_RGB2GRAY, dst=gray)
+            else:
+                cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY, dst=gray)
+
+            cv2.resize(gray, (big[1], big[0]), dst=upscaled, interpolation=cv2.INTER_CUBIC)
+            cv2.GaussianBlur(upscaled, (3, 3), 0, dst=blurred)
+            cv2.adaptiveThreshold(
+                blurred, 255,
+                cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                cv2.THRESH_BINARY,
+                11, 2,
+                dst=binary,
+            )
+            if binary.mean() < 127:
+                cv2.bitwise_not(binary, dst=binary)
+            cv2.erode(binary, kernel, dst=eroded, iterations=1)
+            cv2.dilate(eroded, kernel, dst=binary, iterations=1)
+            cv2.medianBlur(binary, 3, dst=out_stack[pos])
+
+            results[idx] = out_stack[pos]
+
+    logger.debug(f"批量预处理完成: {len(img_bytes_list)} 张")
+    return results
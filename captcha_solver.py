@@ -1,102 +1,116 @@
 """
 验证码识别模块 - 支持多种OCR引擎
+
+具体的识别后端见 ocr_engines.py, 仅在选中时才导入对应依赖
 """
 import base64
-import io
-import cv2
-import numpy as np
+import threading
+import time
 from pathlib import Path
-from typing import Optional, Tuple
-from PIL import Image
+from typing import List, Optional, Tuple
 from playwright.sync_api import Page
 from utils import setup_logger
-from config import CAPTCHA_CONFIG
-
-# 修复 Pillow 10.0+ 移除 ANTIALIAS 的问题,以兼容 ddddocr
-if not hasattr(Image, 'ANTIALIAS'):
-    Image.ANTIALIAS = Image.LANCZOS
+from config import CAPTCHA_CONFIG, CAPTCHA_CORPUS_CONFIG
+from captcha_corpus import CaptchaCorpus, ACCEPTED, REJECTED
+from ocr_engines import OCREngine, create_engine, get_engine_class, threads_per_worker
+from captcha_preprocess import preprocess_image, preprocess_images
+from metrics import metrics
+from retry_policy import classify_error, CAPTCHA
 
 logger = setup_logger("captcha_solver")
 
 class CaptchaSolver:
     """验证码识别器 - 支持多种OCR引擎"""
     
-    def __init__(self, ocr_engine: str = None, use_manual: bool = False):
+    def __init__(
+        self,
+        ocr_engine: str = None,
+        use_manual: bool = False,
+        preprocess: Optional[bool] = None,
+        lazy: bool = False,
+        threads: Optional[int] = None,
+    ):
         """
         初始化验证码识别器
         
         Args:
-            ocr_engine: OCR引擎类型 ("easyocr", "tesseract", "ddddocr", "manual")
+            ocr_engine: OCR引擎类型 ("easyocr", "tesseract", "ddddocr", "template", "manual")
             use_manual: 是否强制使用人工输入
+            preprocess: 识别前是否预处理图片(None表示使用引擎默认值)
+            lazy: 是否延迟加载引擎(由 start_warmup 在后台加载, 或首次识别时加载)
+            threads: 推理线程数(None表示按 CAPTCHA_CONFIG 的线程预算和识别器数量分配)
         """
         self.use_manual = use_manual
         self.ocr_engine_type = ocr_engine or CAPTCHA_CONFIG.get("ocr_engine", "easyocr")
-        self.ocr = None
+        self.preprocess = preprocess
+        self.threads = threads or threads_per_worker()
+        self.engine: Optional[OCREngine] = None
+        
+        # 最近一次识别的置信度(引擎不提供时为None)及最近记录的语料样本哈希
+        self.last_confidence: Optional[float] = None
+        self.last_sample_hash: Optional[str] = None
+        self.corpus = CaptchaCorpus() if CAPTCHA_CORPUS_CONFIG.get("enabled") else None
         
-        if not use_manual:
+        # 引擎加载状态: 后台预热线程完成后置位
+        self._engine_ready = threading.Event()
+        self._warmup_thread: Optional[threading.Thread] = None
+        
+        if use_manual:
+            self._engine_ready.set()
+        elif not lazy:
             self._init_ocr_engine()
+            self._engine_ready.set()
     
     def _init_ocr_engine(self):
         """初始化OCR引擎"""
+        if get_engine_class(self.ocr_engine_type) is None:
+            logger.warning(f"未知的OCR引擎: {self.ocr_engine_type},将使用人工输入模式")
+            self.use_manual = True
+            return
+        
         try:
-            if self.ocr_engine_type == "easyocr":
-                self._init_easyocr()
-            elif self.ocr_engine_type == "tesseract":
-                self._init_tesseract()
-            elif self.ocr_engine_type == "ddddocr":
-                self._init_ddddocr()
-            else:
-                logger.warning(f"未知的OCR引擎: {self.ocr_engine_type},将使用人工输入模式")
-                self.use_manual = True
+            self.engine = create_engine(self.ocr_engine_type, preprocess=self.preprocess, threads=self.threads)
+            self.preprocess = self.engine.preprocess
         except Exception as e:
             logger.error(f"OCR引擎初始化失败: {e},将使用人工输入模式")
             self.use_manual = True
     
-    def _init_easyocr(self):
-        """初始化EasyOCR"""
-        try:
-            import easyocr
-            langs = CAPTCHA_CONFIG.get("easyocr_langs", ['en'])
-            gpu = CAPTCHA_CONFIG.get("easyocr_gpu", False)
-            
-            logger.info(f"正在初始化EasyOCR (语言: {langs}, GPU: {gpu})...")
-            self.ocr = easyocr.Reader(langs, gpu=gpu)
-            logger.info("EasyOCR初始化成功")
-        except ImportError:
-            logger.error("EasyOCR未安装,请运行: pip install easyocr")
-            raise
-        except Exception as e:
-            logger.error(f"EasyOCR初始化失败: {e}")
-            raise
+    def start_warmup(self) -> None:
+        """
+        在后台线程中加载OCR引擎并做一次预热推理
+        
+        与启动浏览器、应用筛选条件并行进行; 首次识别时仅在预热尚未完成时才会等待
+        """
+        if self._engine_ready.is_set() or self._warmup_thread is not None:
+            return
+        
+        self._warmup_thread = threading.Thread(target=self._warmup, name="ocr-warmup", daemon=True)
+        self._warmup_thread.start()
+        logger.info(f"OCR引擎 {self.ocr_engine_type} 正在后台预热...")
     
-    def _init_tesseract(self):
-        """初始化Tesseract OCR"""
+    def _warmup(self) -> None:
+        """后台预热线程"""
+        start = time.perf_counter()
         try:
-            import pytesseract
-            # 测试Tesseract是否可用
-            pytesseract.get_tesseract_version()
-            self.ocr = pytesseract
-            logger.info("Tesseract OCR初始化成功")
-        except ImportError:
-            logger.error("pytesseract未安装,请运行: pip install pytesseract")
-            raise
-        except Exception as e:
-            logger.error(f"Tesseract OCR初始化失败: {e}")
-            logger.error("请确保已安装Tesseract: brew install tesseract (Mac) 或访问 https://github.com/tesseract-ocr/tesseract")
-            raise
+            self._init_ocr_engine()
+            if self.engine:
+                self.engine.warm_up()
+                logger.info(f"OCR引擎预热完成, 耗时 {time.perf_counter() - start:.1f} 秒")
+        finally:
+            self._engine_ready.set()
     
-    def _init_ddddocr(self):
-        """初始化ddddocr"""
-        try:
-            import ddddocr
-            self.ocr = ddddocr.DdddOcr()  # 新版本不需要show_ad参数
-            logger.info("ddddocr初始化成功")
-        except ImportError:
-            logger.error("ddddocr未安装或不兼容当前Python版本")
-            raise
-        except Exception as e:
-            logger.error(f"ddddocr初始化失败: {e}")
-            raise
+    def _ensure_engine(self) -> None:
+        """确保引擎已加载(预热未完成时等待, 未启动预热时同步加载)"""
+        if self._engine_ready.is_set():
+            return
+        
+        if self._warmup_thread is None:
+            self._init_ocr_engine()
+            self._engine_ready.set()
+            return
+        
+        logger.info("等待OCR引擎预热完成...")
+        self._engine_ready.wait()
     
     def extract_captcha_image(self, page: Page) -> Optional[bytes]:
         """
@@ -136,7 +150,7 @@ class CaptchaSolver:
             logger.error(f"提取验证码图片失败: {e}")
             return None
     
-    def preprocess_image(self, img_bytes: bytes) -> np.ndarray:
+    def preprocess_image(self, img_bytes: bytes):
         """
         预处理验证码图片(针对彩色字符和干扰线优化)
         
@@ -146,65 +160,19 @@ class CaptchaSolver:
         Returns:
             预处理后的图片(numpy数组)
         """
-        try:
-            # 转换为PIL Image
-            img = Image.open(io.BytesIO(img_bytes))
-            
-            # 转换为numpy数组
-            img_array = np.array(img)
-            
-            # 如果是RGBA,转换为RGB
-            if len(img_array.shape) == 3 and img_array.shape[2] == 4:
-                img_array = cv2.cvtColor(img_array, cv2.COLOR_RGBA2RGB)
-            
-            # 转换为灰度图
-            if len(img_array.shape) == 3:
-                gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
-            else:
-                gray = img_array
-            
-            # 放大图片(提高识别率)
-            scale_factor = 3
-            height, width = gray.shape
-            gray = cv2.resize(gray, (width * scale_factor, height * scale_factor), 
-                            interpolation=cv2.INTER_CUBIC)
-            
-            # 高斯模糊(去除噪点)
-            blurred = cv2.GaussianBlur(gray, (3, 3), 0)
-            
-            # 自适应阈值二值化(对不均匀光照更有效)
-            binary = cv2.adaptiveThreshold(
-                blurred, 255, 
-                cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                cv2.THRESH_BINARY, 
-                11, 2
-            )
-            
-            # 反转颜色(如果背景是白色,字符是黑色)
-            # 检查平均亮度,如果背景较暗则反转
-            if np.mean(binary) < 127:
-                binary = cv2.bitwise_not(binary)
-            
-            # 形态学操作(去除小噪点,连接断裂字符)
-            kernel = np.ones((2, 2), np.uint8)
-            
-            # 先腐蚀(去除小噪点)
-            eroded = cv2.erode(binary, kernel, iterations=1)
-            
-            # 再膨胀(恢复字符大小)
-            dilated = cv2.dilate(eroded, kernel, iterations=1)
-            
-            # 中值滤波(进一步降噪)
-            cleaned = cv2.medianBlur(dilated, 3)
-            
-            logger.debug("图片预处理完成(增强版)")
-            return cleaned
+        return preprocess_image(img_bytes)
+    
+    def preprocess_batch(self, img_bytes_list: List[bytes]) -> list:
+        """
+        批量预处理验证码图片(结果与逐张调用 preprocess_image 一致)
+        
+        Args:
+            img_bytes_list: 原始图片字节数据列表
             
-        except Exception as e:
-            logger.error(f"图片预处理失败: {e}")
-            # 返回原始图片
-            img = Image.open(io.BytesIO(img_bytes))
-            return np.array(img)
+        Returns:
+            预处理后的图片列表
+        """
+        return preprocess_images(img_bytes_list)
     
     def solve_captcha(self, img_bytes: bytes) -> Optional[str]:
         """
@@ -216,101 +184,18 @@ class CaptchaSolver:
         Returns:
             识别结果
         """
-        if self.use_manual:
+        self.last_confidence = None
+        self._ensure_engine()
+        if self.use_manual or self.engine is None:
             return self._manual_input(img_bytes)
         
         try:
-            if self.ocr_engine_type == "easyocr":
-                return self._solve_with_easyocr(img_bytes)
-            elif self.ocr_engine_type == "tesseract":
-                return self._solve_with_tesseract(img_bytes)
-            elif self.ocr_engine_type == "ddddocr":
-                return self._solve_with_ddddocr(img_bytes)
-            else:
-                return self._manual_input(img_bytes)
-                
-        except Exception as e:
-            logger.error(f"验证码识别失败: {e}")
-            return self._manual_input(img_bytes)
-    
-    def _solve_with_easyocr(self, img_bytes: bytes) -> Optional[str]:
-        """使用EasyOCR识别"""
-        try:
-            # 预处理图片
-            img_array = self.preprocess_image(img_bytes)
-            
-            # 识别
-            results = self.ocr.readtext(img_array, detail=1)
-            
-            if not results:
-                logger.warning("EasyOCR未识别到文本")
-                return None
-            
-            # 提取置信度最高的结果
-            best_result = max(results, key=lambda x: x[2])
-            text, confidence = best_result[1], best_result[2]
-            
-            # 清理结果
-            text = text.strip().replace(" ", "").replace("-", "")
-            
-            logger.info(f"EasyOCR识别结果: {text} (置信度: {confidence:.2f})")
-            
-            # 检查置信度
-            threshold = CAPTCHA_CONFIG.get("confidence_threshold", 0.6)
-            if confidence < threshold:
-                logger.warning(f"识别置信度过低 ({confidence:.2f} < {threshold})")
-                return None
-            
+            with metrics.span("captcha_ocr", engine=self.ocr_engine_type):
+                text, confidence = self.engine.solve(img_bytes)
+            self.last_confidence = confidence
             return text
-            
         except Exception as e:
-            logger.error(f"EasyOCR识别失败: {e}")
-            return None
-    
-    def _solve_with_tesseract(self, img_bytes: bytes) -> Optional[str]:
-        """使用Tesseract OCR识别"""
-        try:
-            # 预处理图片
-            img_array = self.preprocess_image(img_bytes)
-            
-            # 转换为PIL Image
-            img = Image.fromarray(img_array)
-            
-            # 获取配置
-            config = CAPTCHA_CONFIG.get("tesseract_config", "--psm 7 --oem 3")
-            
-            # 识别
-            text = self.ocr.image_to_string(img, config=config)
-            
-            # 清理结果
-            text = text.strip().replace(" ", "").replace("\n", "")
-            
-            logger.info(f"Tesseract识别结果: {text}")
-            
-            if not text:
-                logger.warning("Tesseract未识别到文本")
-                return None
-            
-            return text
-            
-        except Exception as e:
-            logger.error(f"Tesseract识别失败: {e}")
-            return None
-    
-    def _solve_with_ddddocr(self, img_bytes: bytes) -> Optional[str]:
-        """使用ddddocr识别"""
-        try:
-            # ddddocr不需要预处理
-            result = self.ocr.classification(img_bytes)
-            
-            # 清理结果
-            result = result.strip().replace(" ", "")
-            
-            logger.info(f"ddddocr识别结果: {result}")
-            return result
-            
-        except Exception as e:
-            logger.error(f"ddddocr识别失败: {e}")
+            logger.error(f"{self.ocr_engine_type}识别失败: {e}")
             return None
     
     def _manual_input(self, img_bytes: bytes) -> Optional[str]:
@@ -344,6 +229,23 @@ class CaptchaSolver:
             logger.error(f"人工输入验证码失败: {e}")
             return None
     
+    def _record_sample(self, img_bytes: bytes, text: str, outcome: str) -> None:
+        """将一次验证码提交及其判定结果写入语料库"""
+        if not self.corpus:
+            return
+        engine = "manual" if self.use_manual else self.ocr_engine_type
+        self.last_sample_hash = self.corpus.add(img_bytes, text, engine, self.last_confidence, outcome)
+    
+    def mark_last_rejected(self) -> None:
+        """
+        将最近一次提交的验证码标记为错误
+        
+        用于下载事件已触发, 但服务器返回的是验证码错误页面而非PDF的情况
+        """
+        metrics.inc("captcha_late_rejections")
+        if self.corpus and self.last_sample_hash:
+            self.corpus.update_outcome(self.last_sample_hash, REJECTED)
+    
     def refresh_captcha(self, page: Page) -> bool:
         """
         刷新验证码
@@ -359,8 +261,9 @@ class CaptchaSolver:
             refresh_btn = page.query_selector(".fa-refresh")
             
             if refresh_btn:
-                refresh_btn.click()
-                page.wait_for_timeout(1000) # 等待新验证码加载
+                with metrics.span("captcha_refresh"):
+                    refresh_btn.click()
+                    page.wait_for_timeout(1000) # 等待新验证码加载
                 logger.info("验证码已刷新")
                 return True
             else:
@@ -388,12 +291,17 @@ class CaptchaSolver:
         Returns:
             (Download对象, 错误信息)
         """
+        self.last_sample_hash = None
         for attempt in range(max_retry):
+            img_bytes = None
+            captcha_text = None
+            submitted = False
             try:
                 logger.info(f"验证码识别尝试 {attempt + 1}/{max_retry}")
                 
                 # 提取验证码图片
-                img_bytes = self.extract_captcha_image(page)
+                with metrics.span("captcha_extract"):
+                    img_bytes = self.extract_captcha_image(page)
                 if not img_bytes:
                     logger.error("无法提取验证码图片")
                     continue
@@ -402,6 +310,7 @@ class CaptchaSolver:
                 captcha_text = self.solve_captcha(img_bytes)
                 if not captcha_text:
                     logger.error("验证码识别失败")
+                    metrics.inc("captcha_attempts", result="unrecognized")
                     # 刷新验证码重试
                     self.refresh_captcha(page)
                     continue
@@ -425,25 +334,34 @@ class CaptchaSolver:
                     return None, "未找到下载按钮"
                 
                 # 监听下载事件
-                with page.expect_download(timeout=30000) as download_info:
-                    download_btn.click()
-                    logger.info("已点击下载按钮,等待下载...")
-                
-                download = download_info.value
+                with metrics.span("captcha_download_wait"):
+                    with page.expect_download(timeout=30000) as download_info:
+                        submitted = True
+                        download_btn.click()
+                        logger.info("已点击下载按钮,等待下载...")
+                    
+                    download = download_info.value
                 logger.info(f"下载成功: {download.suggested_filename}")
+                # 下载开始即说明验证码被网站接受
+                self._record_sample(img_bytes, captcha_text, ACCEPTED)
+                metrics.inc("captcha_attempts", result=ACCEPTED)
                 return download, None
                 
             except Exception as e:
                 error_msg = str(e)
                 logger.warning(f"第 {attempt + 1} 次尝试失败: {error_msg}")
                 
-                # 检查是否是验证码错误
-                if "验证码" in error_msg or "captcha" in error_msg.lower():
-                    # 刷新验证码重试
+                # 已提交但下载未开始, 视为验证码被拒绝
+                if submitted:
+                    self._record_sample(img_bytes, captcha_text, REJECTED)
+                    metrics.inc("captcha_attempts", result=REJECTED)
+                
+                # 已提交但下载未开始(网站不提示错误, 表现为等待下载超时)或明确的验证码错误: 刷新验证码重试
+                if submitted or classify_error(e) == CAPTCHA:
                     self.refresh_captcha(page)
                     continue
                 else:
-                    # 其他错误,直接返回
+                    # 其他错误(超时、网络等)交给调用方按阶段重试策略处理
                     return None, error_msg
         
         return None, f"验证码识别失败,已重试{max_retry}次"
@@ -0,0 +1,288 @@
+"""
+模拟标准目录生成器 - 生成确定性的大规模标准记录, 用于扩展性测试
+
+同一 (count, seed) 始终生成相同的记录: 标准号按行业代码编号, 名称由行业词汇组合而成,
+部委/行业取自 constants.py, 并带有发布/实施/备案日期、制修订关系和起草人信息。
+生成的记录可直接供 mock_site.py 提供服务, 也可拆分为列表页/详情页字段喂给 DataProcessor
+(见 benchmark_data_processor.py)。
+
+用法:
+    python catalogue_generator.py --count 100000 -o output/catalogue.jsonl
+    python catalogue_generator.py --count 500 -o output/catalogue.xlsx --pdf-dir output/dummy_pdfs
+"""
+import argparse
+import hashlib
+import json
+import random
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List
+from utils import setup_logger, ensure_dir, format_pdf_filename
+from constants import DEPARTMENTS, INDUSTRIES
+
+logger = setup_logger("catalogue_generator")
+
+# 名称词汇: 对象 + 主题
+NAME_SUBJECTS = [
+    "安全生产", "作业场所", "电气设备", "压力容器", "危险化学品", "信息系统", "数据接口", "检测仪器",
+    "工程施工", "产品质量", "环境监测", "应急救援", "计量器具", "管道输送", "储存设施", "运输车辆",
+    "消防设施", "通信网络", "能源计量", "职业健康", "标识标志", "包装材料", "服务平台", "档案管理",
+]
+NAME_TOPICS = [
+    "通用技术条件", "安全技术规范", "检验方法", "试验方法", "术语和定义", "设计规范", "技术要求",
+    "管理规范", "评价指南", "验收规范", "运行维护规程", "分类与代码", "数据元", "测定方法",
+]
+NAME_PARTS = ["第1部分：总则", "第2部分：技术要求", "第3部分：试验方法", "第4部分：检验规则"]
+STANDARD_CATEGORIES = ["方法", "产品", "基础", "管理", "安全", "卫生", "环保", "其他"]
+DRAFT_ORG_SUFFIXES = ["研究院", "研究所", "检测中心", "标准化技术委员会", "有限公司", "协会", "大学"]
+DRAFT_ORG_PREFIXES = ["中国", "国家", "北京", "上海", "广东", "江苏", "浙江", "四川", "湖北", "山东"]
+SURNAMES = "王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗郑梁谢宋唐许韩冯邓曹彭曾萧田董潘袁蔡蒋余于杜叶程魏苏吕丁任沈姚卢"
+GIVEN_CHARS = "伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚桂英华玉萍红娥玲芬燕彬鹏斌辉宇浩凯健俊帆帅旭宁"
+
+# 未公开标准的原因
+NOT_PUBLIC_REASONS = ["无", "该标准为采标标准, 不予公开"]
+
+def _hash_id(std_code: str) -> str:
+    """由标准号生成与真实站点格式一致的64位十六进制 hash_id"""
+    return hashlib.sha256(std_code.encode("utf-8")).hexdigest()
+
+def _person(rng: random.Random) -> str:
+    """随机姓名(2-3个字)"""
+    return rng.choice(SURNAMES) + "".join(rng.choice(GIVEN_CHARS) for _ in range(rng.choice((1, 2))))
+
+def iter_catalogue(count: int, seed: int = 0, start_date: date = date(2005, 1, 1),
+                   end_date: date = date(2025, 12, 31)) -> Iterator[Dict]:
+    """
+    逐条生成模拟标准记录(不在内存中保留整个目录)
+
+    Args:
+        count: 记录数
+        seed: 随机种子
+        start_date: 最早发布日期
+        end_date: 最晚发布日期(固定值, 保证不同日期运行结果一致)
+
+    Yields:
+        标准记录(包含列表页与详情页的全部字段)
+    """
+    rng = random.Random(seed)
+    departments = [name for name, code in DEPARTMENTS if code]
+    industries = [(label.split(" - ", 1)[-1], code) for label, code in INDUSTRIES if code]
+    span_days = (end_date - start_date).days
+
+    # 每个行业固定归口一个部委, 使部委/行业筛选的结果彼此一致
+    industry_dept = {code: departments[i % len(departments)] for i, (_, code) in enumerate(industries)}
+    # 各行业的标准数量差异较大: 按顺序赋予递减的权重(长尾分布)
+    weights = [1 / (rank + 1) ** 0.8 for rank in range(len(industries))]
+    rng.shuffle(weights)
+    next_number: Dict[str, int] = {}
+    issued: Dict[str, List[str]] = {}
+
+    for _ in range(count):
+        industry_name, industry_code = rng.choices(industries, weights=weights)[0]
+        number = next_number.get(industry_code, 1000 + rng.randint(0, 50))
+        next_number[industry_code] = number + rng.randint(1, 3)
+
+        publish = start_date + timedelta(days=rng.randint(0, span_days))
+        std_code = f"{industry_code}/T {number}-{publish.year}"
+
+        # 部分标准为修订, 代替本行业更早的标准
+        previous = issued.setdefault(industry_code, [])
+        revising = bool(previous) and rng.random() < 0.3
+        replaces = rng.choice(previous) if revising else ""
+        previous.append(std_code)
+
+        name = f"{industry_name}{rng.choice(NAME_SUBJECTS)}{rng.choice(NAME_TOPICS)}"
+        if rng.random() < 0.15:
+            name += f" {rng.choice(NAME_PARTS)}"
+
+        record_date = publish + timedelta(days=rng.randint(15, 120))
+        yield {
+            "hash_id": _hash_id(std_code),
+            "标准号": std_code,
+            "标准名称": name,
+            "行业代码": industry_code,
+            "行业领域": industry_name,
+            "状态": "现行" if publish.year >= 2012 or rng.random() < 0.3 else "废止",
+            "发布日期": publish.isoformat(),
+            "实施日期": (publish + timedelta(days=rng.choice((90, 180, 183, 365)))).isoformat(),
+            "制修订": "修订" if revising else "制定",
+            "代替标准": replaces,
+            "CCS分类号": f"{rng.choice('ABCDEFGHJKLMNPQRSTUVWXYZ')}{rng.randint(0, 99):02d}",
+            "ICS分类号": f"{rng.randint(1, 97):02d}.{rng.randint(0, 220):03d}" + (f".{rng.randint(1, 99):02d}" if rng.random() < 0.5 else ""),
+            "批准发布部门": industry_dept[industry_code],
+            "标准类别": rng.choice(STANDARD_CATEGORIES),
+            "备案号": f"{rng.randint(10000, 99999)}-{record_date.year}",
+            "备案日期": record_date.isoformat(),
+            "起草单位": "、".join(
+                f"{rng.choice(DRAFT_ORG_PREFIXES)}{industry_name}{rng.choice(DRAFT_ORG_SUFFIXES)}"
+                for _ in range(rng.randint(1, 4))
+            ),
+            "起草人": "、".join(_person(rng) for _ in range(rng.randint(2, 8))),
+        }
+
+def generate_catalogue(count: int, seed: int = 0) -> List[Dict]:
+    """
+    生成模拟标准目录
+
+    Args:
+        count: 记录数
+        seed: 随机种子
+
+    Returns:
+        标准记录列表
+    """
+    return list(iter_catalogue(count, seed))
+
+def load_catalogue(path: str) -> List[Dict]:
+    """
+    读取由本模块导出的 JSON-lines 目录文件
+
+    Args:
+        path: .jsonl 文件路径
+
+    Returns:
+        标准记录列表
+    """
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def assign_not_public(records: List[Dict], rate: float, seed: int = 0) -> Dict[str, str]:
+    """
+    按比例挑选未公开(不可下载)的标准
+
+    Returns:
+        {hash_id: 原因}
+    """
+    rng = random.Random(seed)
+    return {r["hash_id"]: rng.choice(NOT_PUBLIC_REASONS) for r in records if rng.random() < rate}
+
+def list_fields(record: Dict, seq: int, base_url: str = "") -> Dict:
+    """
+    列表页能得到的字段(与 scrape_list_page 的输出一致)
+
+    Args:
+        record: 标准记录
+        seq: 序号
+        base_url: 站点根地址
+
+    Returns:
+        列表页字段
+    """
+    return {
+        "序号": seq,
+        "标准号": record["标准号"],
+        "标准名称": record["标准名称"],
+        "行业领域": record["行业领域"],
+        "状态": record["状态"],
+        "详情页链接": f"{base_url}/stdDetail/{record['hash_id']}",
+        "hash_id": record["hash_id"],
+    }
+
+def detail_fields(record: Dict) -> Dict:
+    """
+    详情页能得到的字段(与 scrape_detail_page 的输出一致)
+
+    Args:
+        record: 标准记录
+
+    Returns:
+        详情页字段
+    """
+    keys = ["发布日期", "实施日期", "制修订", "代替标准", "CCS分类号", "ICS分类号",
+            "批准发布部门", "行业领域", "标准类别", "备案号", "备案日期", "起草单位", "起草人"]
+    return {key: record[key] for key in keys if record.get(key)}
+
+def make_dummy_pdf(title: str, min_bytes: int = 4096) -> bytes:
+    """
+    生成一个结构合法的单页PDF(用注释填充到指定大小)
+
+    Args:
+        title: 页面上显示的文字(非ASCII字符会被替换)
+        min_bytes: 最小文件大小
+
+    Returns:
+        PDF字节数据
+    """
+    text = title.encode("ascii", "replace").replace(b"(", b"[").replace(b")", b"]")
+    content = b"BT /F1 18 Tf 72 720 Td (" + text + b") Tj ET"
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length " + str(len(content)).encode() + b" >>\nstream\n" + content + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{num} 0 obj\n".encode() + obj + b"\nendobj\n"
+
+    # 填充注释, 使文件大小接近真实PDF(爬虫会把过小的文件视为错误页)
+    while len(out) < min_bytes:
+        out += b"% " + b"0" * 76 + b"\n"
+
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+def write_dummy_pdfs(records: List[Dict], pdf_dir: str, min_bytes: int = 4096) -> int:
+    """
+    为每条记录写出一个占位PDF(文件名与爬虫下载时一致)
+
+    Args:
+        records: 标准记录
+        pdf_dir: 输出目录
+        min_bytes: 每个文件的最小大小
+
+    Returns:
+        写出的文件数
+    """
+    ensure_dir(pdf_dir)
+    for record in records:
+        filename = format_pdf_filename(record["标准号"], record["标准名称"])
+        (Path(pdf_dir) / filename).write_bytes(make_dummy_pdf(record["标准号"], min_bytes))
+    return len(records)
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="模拟标准目录生成器")
+    parser.add_argument("--count", type=int, default=10000, help="记录数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("-o", "--output", required=True, help="输出文件(.jsonl / .xlsx / .csv)")
+    parser.add_argument("--pdf-dir", help="同时为每条记录生成占位PDF的目录")
+    parser.add_argument("--pdf-kb", type=int, default=4, help="占位PDF大小(KB)")
+    args = parser.parse_args()
+
+    output = Path(args.output)
+    ensure_dir(str(output.parent))
+
+    if output.suffix == ".jsonl":
+        with open(output, "w", encoding="utf-8") as f:
+            for record in iter_catalogue(args.count, args.seed):
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        records = None
+    else:
+        import pandas as pd
+        records = generate_catalogue(args.count, args.seed)
+        df = pd.DataFrame(records)
+        if output.suffix == ".csv":
+            df.to_csv(output, index=False, encoding="utf-8-sig")
+        else:
+            df.to_excel(output, index=False, engine="openpyxl")
+    logger.info(f"已生成 {args.count} 条模拟标准: {output}")
+
+    if args.pdf_dir:
+        records = records or generate_catalogue(args.count, args.seed)
+        written = write_dummy_pdfs(records, args.pdf_dir, args.pdf_kb * 1024)
+        logger.info(f"已生成 {written} 个占位PDF: {args.pdf_dir}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
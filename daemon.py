@@ -0,0 +1,459 @@
+"""
+守护进程 - 常驻浏览器和OCR引擎, 按计划定时增量同步
+
+与 cron 每次启动一个新进程相比:
+    - 浏览器和OCR引擎只启动一次, 每次同步的额外开销为秒级
+    - 每个任务持久化同步水位(上次成功同步的时间)和已同步的 hash_id:
+      再次同步时按水位选择最小的备案日期范围, 只处理新出现的标准;
+      下载失败的标准不记为已同步, 下次同步时重新处理
+    - 本地健康检查端点: http://127.0.0.1:<health_port>/health (JSON), /metrics (Prometheus)
+
+用法:
+    python daemon.py                                # 按 FILTER_CONFIG 每天同步一次
+    python daemon.py --jobs jobs.json --interval 360
+    python daemon.py --jobs jobs.json --once        # 立即同步所有任务后退出
+
+jobs.json 与 batch_runner.py 相同, 每个任务可额外设置 interval_minutes:
+    [{"name": "应急管理部", "department": "yjglb", "status": "现行", "interval_minutes": 720}]
+"""
+import argparse
+import json
+import os
+import re
+import signal
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from utils import setup_logger, ensure_dir
+from config import FILTER_CONFIG, DAEMON_CONFIG
+from constants import RECORD_DATES
+from data_processor import DataProcessor
+from metrics import metrics
+from retry_policy import classify_error, NOT_PUBLIC
+from scraper import IndustryStandardScraper, add_har_arguments, apply_har_arguments
+from batch_runner import FILTER_OPTIONS, normalize_jobs
+
+logger = setup_logger("daemon")
+
+STATE_FILE = "state.json"
+
+# 增量同步时备案日期范围在距上次同步的时间基础上额外预留的天数(覆盖备案延迟公示)
+WINDOW_MARGIN_DAYS = 7
+
+# 同步失败后的重试间隔上限(分钟)
+FAILURE_RETRY_MINUTES = 30
+
+def incremental_window(last_success: Optional[str], now: datetime = None) -> Optional[str]:
+    """
+    根据同步水位选择覆盖距上次同步时间的最小备案日期范围
+
+    Args:
+        last_success: 上次成功同步的时间(ISO格式), None 表示首次同步
+        now: 当前时间
+
+    Returns:
+        备案日期筛选值(如 "-1"), 需要全量同步时为None
+    """
+    if not last_success:
+        return None
+    now = now or datetime.now()
+    gap_days = (now - datetime.fromisoformat(last_success)).total_seconds() / 86400 + WINDOW_MARGIN_DAYS
+    for _, code in RECORD_DATES:
+        if code and abs(int(code)) * 30 >= gap_days:
+            return code
+    return None
+
+def is_settled(std: Dict) -> bool:
+    """
+    标准是否已处理完毕(之后的同步不再处理)
+
+    下载成功、未公开(永久失败)或没有详情页链接时为True; 下载失败、截止时间前未处理等情况为False
+    """
+    if not std.get("详情页链接") or std.get("下载状态") == "成功":
+        return True
+    return std.get("下载状态") == "失败" and classify_error(std.get("备注") or "") == NOT_PUBLIC
+
+def _safe_name(name: str) -> str:
+    """任务名转换为文件名"""
+    return re.sub(r'[\\/:*?"<>|\s]+', "_", name)
+
+class SyncDaemon:
+    """定时增量同步守护进程"""
+
+    def __init__(self, jobs: List[Dict], list_only: bool = False, state_dir: str = None,
+                 health_port: Optional[int] = None, interval_minutes: float = None):
+        """
+        初始化守护进程
+
+        Args:
+            jobs: 任务列表(筛选字段同 batch_runner, 可带 interval_minutes)
+            list_only: 是否仅同步清单
+            state_dir: 状态目录
+            health_port: 健康检查端口(None 不启动)
+            interval_minutes: 默认同步间隔(分钟)
+        """
+        default_interval = interval_minutes or DAEMON_CONFIG["interval_minutes"]
+        intervals = [job.get("interval_minutes", default_interval) for job in jobs]
+        self.jobs = normalize_jobs([{k: v for k, v in job.items() if k != "interval_minutes"} for job in jobs])
+        for job, interval in zip(self.jobs, intervals):
+            job["interval_minutes"] = float(interval)
+
+        self.list_only = list_only
+        self.state_dir = Path(state_dir or DAEMON_CONFIG["state_dir"])
+        self.health_port = health_port
+        ensure_dir(str(self.state_dir))
+
+        self.scraper = IndustryStandardScraper()
+        self.started = time.time()
+        self.current: Optional[str] = None
+        self.state: Dict[str, Dict] = self._load_state()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._warmed_up = False
+
+    # ---------- 状态持久化 ----------
+
+    def _load_state(self) -> Dict[str, Dict]:
+        path = self.state_dir / STATE_FILE
+        state = {}
+        if path.exists():
+            try:
+                with open(path, encoding="utf-8") as f:
+                    state = json.load(f).get("jobs", {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"同步状态文件损坏, 将重新全量同步: {e}")
+        return {job["name"]: state.get(job["name"], {}) for job in self.jobs}
+
+    def _save_state(self) -> None:
+        path = self.state_dir / STATE_FILE
+        tmp = path.with_name(STATE_FILE + ".tmp")
+        with self._lock:
+            data = {"jobs": self.state}
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+
+    def _ids_path(self, name: str) -> Path:
+        return self.state_dir / f"{_safe_name(name)}.ids"
+
+    def _load_ids(self, name: str) -> Set[str]:
+        path = self._ids_path(name)
+        if not path.exists():
+            return set()
+        return set(path.read_text(encoding="utf-8").split())
+
+    def _append_ids(self, name: str, ids: Iterable[str]) -> None:
+        with open(self._ids_path(name), "a", encoding="utf-8") as f:
+            for hash_id in ids:
+                f.write(hash_id + "\n")
+
+    def _pending_path(self, name: str) -> Path:
+        return self.state_dir / f"{_safe_name(name)}.pending.json"
+
+    def _load_pending(self, name: str) -> List[Dict]:
+        """上次同步未处理完毕的标准(列表页数据)"""
+        path = self._pending_path(name)
+        if not path.exists():
+            return []
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"未完成标准文件损坏, 已忽略: {e}")
+            return []
+
+    def _save_pending(self, name: str, standards: List[Dict]) -> None:
+        path = self._pending_path(name)
+        if not standards:
+            path.unlink(missing_ok=True)
+            return
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(standards, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    # ---------- 浏览器 ----------
+
+    def _ensure_browser(self) -> None:
+        """浏览器未启动(或已因故障关闭)时启动"""
+        if not self._warmed_up and not self.list_only:
+            self.scraper.captcha_solver.start_warmup()
+            self._warmed_up = True
+        if self.scraper.page is None:
+            with metrics.span("browser_start"):
+                self.scraper.start_browser()
+
+    def _reset_browser(self) -> None:
+        """关闭浏览器(同步失败后调用, 下次同步前重新启动)"""
+        try:
+            self.scraper.close_browser()
+        except Exception as e:
+            logger.debug(f"关闭浏览器失败: {e}")
+        self.scraper.page = self.scraper.context = self.scraper.browser = None
+        self.scraper.list_route_installed = False
+        if hasattr(self.scraper, "playwright"):
+            del self.scraper.playwright
+
+    # ---------- 同步 ----------
+
+    def sync(self, job: Dict) -> Dict:
+        """
+        对一个任务执行一次增量同步
+
+        同步的标准中, 处理完毕的(见 is_settled)记入已同步的 hash_id;
+        其余的保存为未完成, 下次同步时即使不在备案日期范围内也会重新处理
+
+        Returns:
+            同步结果(列出数量、新增数量、处理完毕数量、未完成数量、导出文件)
+        """
+        name = job["name"]
+        state = self.state[name]
+        window = job["record_date"] or incremental_window(state.get("last_success"))
+        logger.info(f"同步任务 {name}: 备案日期范围 {window or '全部'}")
+
+        FILTER_CONFIG.update({key: job[key] for key in FILTER_OPTIONS})
+        FILTER_CONFIG["record_date"] = window
+
+        scraper = self.scraper
+        scraper.data_processor = DataProcessor()
+        scraper.total_records = None
+        listed = scraper.scrape_listing()
+        if not listed and scraper.total_records != 0:
+            # 列表页加载失败(如站点故障)时也会返回空列表, 不能当作同步成功推进水位
+            raise RuntimeError(f"未列出任何标准(总记录数: {scraper.total_records})")
+
+        synced = self._load_ids(name)
+        new = [std for std in listed if std.get("hash_id") and std["hash_id"] not in synced]
+        logger.info(f"列出 {len(listed)} 条, 其中新标准 {len(new)} 条")
+        queued = {std["hash_id"] for std in new}
+        pending = [
+            std for std in self._load_pending(name)
+            if std.get("hash_id") not in synced and std.get("hash_id") not in queued
+        ]
+        if pending:
+            logger.info(f"上次未完成的标准 {len(pending)} 条, 本次重新处理")
+        todo = new + pending
+        # 详情信息会合并到这些字典中, 未完成的标准保存合并前的列表页数据
+        list_rows = {std["hash_id"]: dict(std) for std in todo}
+
+        processor = DataProcessor()
+        for std in todo:
+            processor.add_standard(std)
+        scraper.data_processor = processor
+        if todo and not self.list_only:
+            scraper.scrape_details(todo)
+
+        output = None
+        if todo:
+            output = str(self.state_dir / _safe_name(name) / f"{datetime.now():%Y%m%d_%H%M%S}.xlsx")
+            ensure_dir(str(Path(output).parent))
+            processor.export_to_excel(output)
+        settled = [std for std in todo if self.list_only or is_settled(std)]
+        unfinished = [list_rows[std["hash_id"]] for std in todo if not (self.list_only or is_settled(std))]
+        self._append_ids(name, (std["hash_id"] for std in settled))
+        self._save_pending(name, unfinished)
+        if unfinished:
+            logger.warning(f"{len(unfinished)} 条标准未处理完毕(下载失败或截止时间前未处理), 下次同步时重试")
+        return {
+            "listed": len(listed),
+            "new": len(new),
+            "settled": len(settled),
+            "pending": len(unfinished),
+            "output": output,
+        }
+
+    def run_job(self, job: Dict) -> None:
+        """运行一个任务并更新其状态"""
+        name = job["name"]
+        started = datetime.now()
+        with self._lock:
+            self.current = name
+            self.state[name]["last_start"] = started.isoformat(timespec="seconds")
+
+        try:
+            self._ensure_browser()
+            with metrics.span("daemon_sync", job=name):
+                result = self.sync(job)
+            with self._lock:
+                self.state[name].update(
+                    last_success=started.isoformat(timespec="seconds"),
+                    last_result="success",
+                    last_error=None,
+                    last_listed=result["listed"],
+                    last_new=result["new"],
+                    last_pending=result["pending"],
+                    last_output=result["output"],
+                    synced=self.state[name].get("synced", 0) + result["settled"],
+                )
+            metrics.inc("daemon_syncs", result="success")
+        except Exception as e:
+            logger.error(f"同步任务 {name} 失败: {e}", exc_info=True)
+            with self._lock:
+                self.state[name].update(last_result="failed", last_error=str(e))
+            metrics.inc("daemon_syncs", result="failed")
+            self._reset_browser()
+        finally:
+            finished = time.time()
+            interval = job["interval_minutes"]
+            with self._lock:
+                if self.state[name].get("last_result") == "failed":
+                    interval = min(interval, FAILURE_RETRY_MINUTES)
+                self.state[name]["last_duration_s"] = round(finished - started.timestamp(), 1)
+                self.state[name]["next_run"] = datetime.fromtimestamp(
+                    finished + interval * 60
+                ).isoformat(timespec="seconds")
+                self.current = None
+            self._save_state()
+            metrics.write_prometheus()
+            if self.scraper.response_cache:
+                self.scraper.response_cache.flush()
+
+    def _next_due(self) -> float:
+        """最早到期任务的时间戳"""
+        times = []
+        for job in self.jobs:
+            next_run = self.state[job["name"]].get("next_run")
+            times.append(datetime.fromisoformat(next_run).timestamp() if next_run else 0.0)
+        return min(times)
+
+    def run_once(self) -> None:
+        """立即同步所有任务"""
+        for job in self.jobs:
+            if self._stop.is_set():
+                break
+            self.run_job(job)
+
+    def run_forever(self) -> None:
+        """按计划循环同步, 直到收到停止信号"""
+        while not self._stop.is_set():
+            now = time.time()
+            for job in self.jobs:
+                if self._stop.is_set():
+                    break
+                next_run = self.state[job["name"]].get("next_run")
+                if not next_run or datetime.fromisoformat(next_run).timestamp() <= now:
+                    self.run_job(job)
+            wait = max(1.0, self._next_due() - time.time())
+            logger.info(f"下次同步: {datetime.fromtimestamp(time.time() + wait):%Y-%m-%d %H:%M:%S}")
+            self._stop.wait(wait)
+
+    def stop(self, *_) -> None:
+        """请求停止(当前同步完成后退出)"""
+        logger.info("收到停止信号, 当前同步完成后退出")
+        self._stop.set()
+
+    # ---------- 健康检查 ----------
+
+    def status(self) -> Dict:
+        """当前状态(健康端点返回的JSON)"""
+        with self._lock:
+            return {
+                "status": "syncing" if self.current else "idle",
+                "uptime_s": round(time.time() - self.started, 1),
+                "browser": self.scraper.page is not None,
+                "current_job": self.current,
+                "progress": dict(self.scraper.progress) if self.current else None,
+                "jobs": {name: dict(state) for name, state in self.state.items()},
+            }
+
+    def start_health_server(self) -> None:
+        """在后台线程启动健康检查端点"""
+        if self.health_port is None:
+            return
+        daemon = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split("?")[0]
+                if path == "/health":
+                    body = json.dumps(daemon.status(), ensure_ascii=False).encode("utf-8")
+                    content_type = "application/json; charset=utf-8"
+                elif path == "/metrics":
+                    body = metrics.to_prometheus().encode("utf-8")
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer(("127.0.0.1", self.health_port), _Handler)
+        except OSError as e:
+            logger.warning(f"健康检查端点启动失败(端口 {self.health_port}): {e}")
+            return
+        threading.Thread(target=self._server.serve_forever, name="daemon-health", daemon=True).start()
+        logger.info(f"健康检查端点: http://127.0.0.1:{self._server.server_port}/health")
+
+    def run(self, once: bool = False) -> None:
+        """
+        启动守护进程
+
+        Args:
+            once: 立即同步所有任务后退出
+        """
+        # 信号处理只能在主线程中注册(嵌入其他程序的后台线程中运行时由调用方调用 stop)
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self.stop)
+        self.start_health_server()
+        logger.info(f"守护进程启动: {len(self.jobs)} 个同步任务")
+        try:
+            if once:
+                self.run_once()
+            else:
+                self.run_forever()
+        except KeyboardInterrupt:
+            logger.warning("用户中断守护进程")
+        finally:
+            if self._server is not None:
+                self._server.shutdown()
+                self._server.server_close()
+            self._reset_browser()
+            self.scraper.export_metrics()
+            self._save_state()
+            logger.info("守护进程已退出")
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="定时增量同步守护进程")
+    parser.add_argument("--jobs", default=DAEMON_CONFIG["jobs_file"], help="同步任务JSON文件")
+    parser.add_argument("--interval", type=float, default=DAEMON_CONFIG["interval_minutes"],
+                        help="默认同步间隔(分钟)")
+    parser.add_argument("--health-port", type=int, default=DAEMON_CONFIG["health_port"],
+                        help="健康检查端口(0 表示随机端口)")
+    parser.add_argument("--state-dir", default=DAEMON_CONFIG["state_dir"], help="同步状态目录")
+    parser.add_argument("--list-only", action="store_true", default=DAEMON_CONFIG["list_only"], help="仅同步清单")
+    parser.add_argument("--once", action="store_true", help="立即同步所有任务后退出")
+    add_har_arguments(parser)
+    args = parser.parse_args()
+    apply_har_arguments(args)
+
+    try:
+        if args.jobs:
+            with open(args.jobs, encoding="utf-8") as f:
+                jobs = json.load(f)
+        else:
+            jobs = [{key: FILTER_CONFIG.get(key) for key in FILTER_OPTIONS}]
+        daemon = SyncDaemon(jobs, list_only=args.list_only, state_dir=args.state_dir,
+                            health_port=args.health_port, interval_minutes=args.interval)
+    except (OSError, ValueError) as e:
+        logger.error(f"加载同步任务失败: {e}")
+        return 1
+
+    daemon.run(once=args.once)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
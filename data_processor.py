@@ -1,22 +1,101 @@
 """
 数据处理模块
 """
+import re
 import pandas as pd
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
 from utils import setup_logger, ensure_dir
 from config import EXCEL_OUTPUT, OUTPUT_DIR
+from metrics import metrics
 
 logger = setup_logger("data_processor")
 
+# 导出列顺序
+EXPORT_COLUMNS = [
+    "序号",
+    "标准号",
+    "标准名称",
+    "行业领域",
+    "状态",
+    "发布日期",
+    "实施日期",
+    "制修订",
+    "代替标准",
+    "CCS分类号",
+    "ICS分类号",
+    "批准发布部门",
+    "标准类别",
+    "备案号",
+    "备案日期",
+    "起草单位",
+    "起草人",
+    "PDF文件名",
+    "详情页链接",
+    "备注",
+]
+
+# Excel 工作表名中不允许的字符
+_INVALID_SHEET_CHARS = re.compile(r"[\[\]:*?/\\]")
+
+def _to_export_frame(rows: List[Dict]) -> "pd.DataFrame":
+    """按导出列顺序生成 DataFrame(缺失的列补为空)"""
+    df = pd.DataFrame(rows)
+    for col in EXPORT_COLUMNS:
+        if col not in df.columns:
+            df[col] = ""
+    return df[EXPORT_COLUMNS]
+
+def export_sheets_to_excel(sheets: Dict[str, List[Dict]], filename: str) -> bool:
+    """
+    将多组数据导出到同一个Excel文件的不同工作表
+    
+    Args:
+        sheets: 工作表名 -> 标准数据列表
+        filename: 输出文件名
+        
+    Returns:
+        是否导出成功
+    """
+    try:
+        used = set()
+        with metrics.span("export_excel"):
+            with pd.ExcelWriter(filename, engine='openpyxl') as writer:
+                for name, rows in sheets.items():
+                    # 工作表名最长31个字符且不能重复
+                    sheet = _INVALID_SHEET_CHARS.sub("_", name)[:31] or "Sheet"
+                    base, n = sheet, 2
+                    while sheet in used:
+                        suffix = f"_{n}"
+                        sheet, n = base[:31 - len(suffix)] + suffix, n + 1
+                    used.add(sheet)
+                    _to_export_frame(rows).to_excel(writer, sheet_name=sheet, index=False)
+        
+        logger.info(f"数据已导出到: {filename} ({len(sheets)} 个工作表)")
+        return True
+        
+    except Exception as e:
+        logger.error(f"导出Excel失败: {e}")
+        return False
+
 class DataProcessor:
     """数据处理器"""
     
     def __init__(self):
         """初始化数据处理器"""
         self.standards_data = []
+        # 标准号 -> 记录(同一标准号以最先添加的为准), 使合并详情信息为O(1)
+        self._code_index: Dict[str, Dict] = {}
+        # 未指定路径时保存/加载的检查点(None 表示 output/checkpoint.xlsx)
+        self.checkpoint_file: Optional[str] = None
         ensure_dir(OUTPUT_DIR)
     
+    def _rebuild_index(self) -> None:
+        """根据 standards_data 重建标准号索引"""
+        self._code_index = {}
+        for standard in self.standards_data:
+            self._code_index.setdefault(standard.get("标准号"), standard)
+    
     def add_standard(self, data: Dict) -> None:
         """
         添加标准数据
@@ -25,6 +104,7 @@ class DataProcessor:
             data: 标准数据字典
         """
         self.standards_data.append(data)
+        self._code_index.setdefault(data.get("标准号"), data)
         logger.debug(f"已添加标准: {data.get('标准号', 'N/A')}")
     
     def merge_detail_info(self, std_code: str, detail_info: Dict) -> bool:
@@ -38,8 +118,14 @@ class DataProcessor:
         Returns:
             是否合并成功
         """
-        for standard in self.standards_data:
-            if standard.get("标准号") == std_code:
+        with metrics.span("merge_detail"):
+            standard = self._code_index.get(std_code)
+            if standard is None and len(self._code_index) != len(self.standards_data):
+                # standards_data 被直接修改过, 重建索引后再查一次
+                self._rebuild_index()
+                standard = self._code_index.get(std_code)
+            
+            if standard is not None:
                 standard.update(detail_info)
                 logger.debug(f"已合并详情信息: {std_code}")
                 return True
@@ -64,43 +150,13 @@ class DataProcessor:
         try:
             output_file = filename or EXCEL_OUTPUT
             
-            # 定义列顺序
-            columns = [
-                "序号",
-                "标准号",
-                "标准名称",
-                "行业领域",
-                "状态",
-                "发布日期",
-                "实施日期",
-                "制修订",
-                "代替标准",
-                "CCS分类号",
-                "ICS分类号",
-                "批准发布部门",
-                "标准类别",
-                "备案号",
-                "备案日期",
-                "起草单位",
-                "起草人",
-                "PDF文件名",
-                "详情页链接",
-                "备注",
-            ]
-            
-            # 创建DataFrame
-            df = pd.DataFrame(self.standards_data)
-            
-            # 确保所有列都存在
-            for col in columns:
-                if col not in df.columns:
-                    df[col] = ""
             
-            # 按指定顺序排列列
-            df = df[columns]
+            # 按导出列顺序创建DataFrame
+            df = _to_export_frame(self.standards_data)
             
             # 导出到Excel
-            df.to_excel(output_file, index=False, engine='openpyxl')
+            with metrics.span("export_excel"):
+                df.to_excel(output_file, index=False, engine='openpyxl')
             
             logger.info(f"数据已导出到: {output_file}")
             logger.info(f"共导出 {len(df)} 条标准记录")
@@ -143,17 +199,18 @@ class DataProcessor:
         保存检查点(用于断点续爬)
         
         Args:
-            checkpoint_file: 检查点文件路径
+            checkpoint_file: 检查点文件路径(默认 self.checkpoint_file)
             
         Returns:
             是否保存成功
         """
         try:
-            checkpoint_file = checkpoint_file or Path(OUTPUT_DIR) / "checkpoint.xlsx"
+            checkpoint_file = checkpoint_file or self.checkpoint_file or Path(OUTPUT_DIR) / "checkpoint.xlsx"
             
             if self.standards_data:
-                df = pd.DataFrame(self.standards_data)
-                df.to_excel(checkpoint_file, index=False, engine='openpyxl')
+                with metrics.span("save_checkpoint"):
+                    df = pd.DataFrame(self.standards_data)
+                    df.to_excel(checkpoint_file, index=False, engine='openpyxl')
                 logger.info(f"检查点已保存: {checkpoint_file}")
                 return True
             
@@ -168,13 +225,13 @@ class DataProcessor:
         加载检查点
         
         Args:
-            checkpoint_file: 检查点文件路径
+            checkpoint_file: 检查点文件路径(默认 self.checkpoint_file)
             
         Returns:
             是否加载成功
         """
         try:
-            checkpoint_file = checkpoint_file or Path(OUTPUT_DIR) / "checkpoint.xlsx"
+            checkpoint_file = checkpoint_file or self.checkpoint_file or Path(OUTPUT_DIR) / "checkpoint.xlsx"
             
             if not Path(checkpoint_file).exists():
                 logger.info("检查点文件不存在")
@@ -182,6 +239,7 @@ class DataProcessor:
             
             df = pd.read_excel(checkpoint_file, engine='openpyxl')
             self.standards_data = df.to_dict('records')
+            self._rebuild_index()
             
             logger.info(f"已加载检查点: {checkpoint_file}")
             logger.info(f"已加载 {len(self.standards_data)} 条记录")
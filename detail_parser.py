@@ -0,0 +1,180 @@
+"""
+详情页字段解析 - 从详情页HTML中提取字段(不依赖浏览器)
+
+字段映射同时被在线爬取(scraper.py, 在页面DOM上提取)和离线重新解析(reparse_snapshots.py)使用,
+新增字段或修正字段名时只需修改这里。
+
+解析规则与在线提取一致:
+    1. dt.basicInfo-item.name 文本等于字段名时, 取其后一个兄弟元素的文本(基础信息区域)
+    2. 否则在 <p> 中查找 "字段名：值"(备案信息、起草信息区域)
+
+安装了 lxml 时使用 lxml 解析, 否则使用标准库 html.parser(结果相同, 速度较慢)。
+"""
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Tuple
+from utils import clean_text
+
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+# 页面字段名 -> 输出列名
+BASIC_FIELDS = {
+    "发布日期": "发布日期",
+    "实施日期": "实施日期",
+    "制修订": "制修订",
+    "代替标准": "代替标准",
+    "中国标准分类号": "CCS分类号",
+    "国际标准分类号": "ICS分类号",
+    "批准发布部门": "批准发布部门",
+    "行业分类": "行业领域",  # 可能与列表页重复
+    "标准类别": "标准类别",
+}
+
+RECORD_FIELDS = {
+    "备案号": "备案号",
+    "备案日期": "备案日期",
+}
+
+DRAFT_FIELDS = {
+    "起草单位": "起草单位",
+    "起草人": "起草人",
+}
+
+# 基础信息区域的标题(页面中没有该标题时不提取基础信息字段)
+BASIC_SECTION_TITLE = "基础信息"
+
+# 无结束标签的元素, 不影响嵌套深度
+_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+class _DetailHTMLParser(HTMLParser):
+    """收集 dt.basicInfo-item.name 与其后一个兄弟元素的文本, 以及所有 <p> 的文本"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.depth = 0
+        self.dt_values: Dict[str, str] = {}
+        self.paragraphs: List[str] = []
+        self._dt_depth = None      # 正在读取的 dt 所在深度
+        self._dt_text: List[str] = []
+        self._pending = None       # (字段名, 深度): 等待 dt 的下一个兄弟元素
+        self._value = None         # (字段名, 深度, 文本片段): 正在读取的值元素
+        self._p_depth = None
+        self._p_text: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if self._pending and self.depth == self._pending[1]:
+            if tag in _VOID_TAGS:
+                self.dt_values.setdefault(self._pending[0], "")
+            else:
+                self._value = (self._pending[0], self.depth, [])
+            self._pending = None
+
+        if tag in _VOID_TAGS:
+            return
+
+        if tag == "dt" and self._dt_depth is None:
+            classes = (dict(attrs).get("class") or "").split()
+            if "basicInfo-item" in classes and "name" in classes:
+                self._dt_depth = self.depth
+                self._dt_text = []
+        elif tag == "p" and self._p_depth is None:
+            self._p_depth = self.depth
+            self._p_text = []
+
+        self.depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in _VOID_TAGS:
+            return
+        self.depth = max(0, self.depth - 1)
+
+        if self._dt_depth is not None and self.depth == self._dt_depth:
+            self._pending = ("".join(self._dt_text).strip(), self.depth)
+            self._dt_depth = None
+        elif self._pending and self.depth < self._pending[1]:
+            # 父元素结束, dt 没有后续兄弟元素
+            self._pending = None
+
+        if self._value and self.depth == self._value[1]:
+            name, _, parts = self._value
+            self.dt_values.setdefault(name, "".join(parts).strip())
+            self._value = None
+
+        if self._p_depth is not None and self.depth == self._p_depth:
+            self.paragraphs.append("".join(self._p_text))
+            self._p_depth = None
+
+    def handle_data(self, data):
+        if self._dt_depth is not None:
+            self._dt_text.append(data)
+        if self._value:
+            self._value[2].append(data)
+        if self._p_depth is not None:
+            self._p_text.append(data)
+
+def _collect_stdlib(html: str) -> Tuple[Dict[str, str], List[str]]:
+    """使用标准库解析"""
+    parser = _DetailHTMLParser()
+    parser.feed(html)
+    parser.close()
+    return parser.dt_values, parser.paragraphs
+
+def _collect_lxml(html: str) -> Tuple[Dict[str, str], List[str]]:
+    """使用 lxml 解析"""
+    tree = lxml_html.fromstring(html)
+    dt_values: Dict[str, str] = {}
+    for dt in tree.xpath(
+        '//dt[contains(concat(" ", normalize-space(@class), " "), " basicInfo-item ")'
+        ' and contains(concat(" ", normalize-space(@class), " "), " name ")]'
+    ):
+        sibling = dt.getnext()
+        # 跳过注释等非元素节点
+        while sibling is not None and not isinstance(sibling.tag, str):
+            sibling = sibling.getnext()
+        if sibling is not None:
+            dt_values.setdefault(dt.text_content().strip(), sibling.text_content().strip())
+    paragraphs = [p.text_content() for p in tree.iter("p")]
+    return dt_values, paragraphs
+
+def _field_value(field_name: str, dt_values: Dict[str, str], paragraphs: List[str]) -> str:
+    """按在线提取的规则查找字段值"""
+    if field_name in dt_values:
+        return clean_text(dt_values[field_name])
+
+    pattern = re.compile(re.escape(field_name) + r"[:\s：]+(.+)")
+    for text in paragraphs:
+        if field_name in text:
+            match = pattern.search(text)
+            if match:
+                return clean_text(match.group(1))
+    return ""
+
+def parse_detail_html(html: str) -> Dict:
+    """
+    从详情页HTML中提取全部字段
+
+    Args:
+        html: 详情页HTML
+
+    Returns:
+        详情信息字典(输出列名 -> 值, 不含空值)
+    """
+    if not html:
+        return {}
+
+    dt_values, paragraphs = _collect_lxml(html) if lxml_html is not None else _collect_stdlib(html)
+
+    groups = [RECORD_FIELDS, DRAFT_FIELDS]
+    if BASIC_SECTION_TITLE in html:
+        groups.insert(0, BASIC_FIELDS)
+
+    info = {}
+    for fields_map in groups:
+        for field_name, output_name in fields_map.items():
+            value = _field_value(field_name, dt_values, paragraphs)
+            if value:
+                info[output_name] = value
+    return info
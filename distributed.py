@@ -0,0 +1,269 @@
+"""
+分布式爬取 - 协调节点列举标准并入队, 多个工作节点从共享队列租用任务并上报结果
+
+    - 协调节点: 爬取列表页, 每爬完一页即把该页的标准入队(按 hash_id 去重), 可等待全部完成后导出
+    - 工作节点: 各自启动浏览器和OCR引擎, 租用任务(详情页 + PDF下载), 后台线程定期续约;
+      节点崩溃时其任务在租约过期后自动重新入队
+    - 每个工作节点可单独限速(max_tasks_per_minute), 节点使用不同出口IP时总吞吐随节点数近似线性增长
+
+用法:
+    python distributed.py coordinator --queue /mnt/shared/queue.db [--wait -o output/standards.xlsx]
+    python distributed.py worker --queue /mnt/shared/queue.db         # 在每台机器上运行
+    python distributed.py status --queue /mnt/shared/queue.db
+    python distributed.py export --queue /mnt/shared/queue.db -o output/standards.xlsx
+"""
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List
+
+from utils import setup_logger
+from config import DISTRIBUTED_CONFIG
+from data_processor import DataProcessor
+from metrics import metrics
+from scraper import IndustryStandardScraper, add_har_arguments, apply_har_arguments
+from work_queue import WorkQueue, PENDING, LEASED, DONE, FAILED
+
+logger = setup_logger("distributed")
+
+TASK_KIND = "standard"
+META_ENUMERATED = "enumeration_done"
+
+def run_coordinator(queue: WorkQueue) -> int:
+    """
+    协调节点: 爬取列表页并逐页入队
+
+    Returns:
+        入队的任务数
+    """
+    scraper = IndustryStandardScraper()
+    added = 0
+
+    def enqueue_page(standards: List[Dict]) -> None:
+        nonlocal added
+        added += queue.enqueue_many(TASK_KIND, standards)
+
+    queue.set_meta(META_ENUMERATED, "")
+    try:
+        with metrics.span("browser_start"):
+            scraper.start_browser()
+        listed = scraper.scrape_listing(on_page=enqueue_page)
+        queue.set_meta(META_ENUMERATED, datetime.now().isoformat(timespec="seconds"))
+        logger.info(f"列举完成: 共 {len(listed)} 条标准, 新入队 {added} 个任务")
+    finally:
+        scraper.close_browser()
+        scraper.export_metrics()
+    return added
+
+def wait_for_completion(queue: WorkQueue, poll_seconds: float = None) -> Dict[str, int]:
+    """
+    等待所有任务完成(期间定期回收过期租约并打印进度)
+
+    Returns:
+        各状态的任务数
+    """
+    poll_seconds = poll_seconds or DISTRIBUTED_CONFIG["poll_seconds"]
+    while True:
+        queue.requeue_expired()
+        counts = queue.counts(TASK_KIND)
+        total = sum(counts.values())
+        logger.info(
+            f"进度: 完成 {counts[DONE]}/{total}, 处理中 {counts[LEASED]}, 待处理 {counts[PENDING]}, 失败 {counts[FAILED]}"
+        )
+        if counts[PENDING] == 0 and counts[LEASED] == 0:
+            return counts
+        time.sleep(poll_seconds)
+
+def export_results(queue: WorkQueue, output: str = None) -> bool:
+    """
+    将队列中的结果(列表数据 + 详情信息)导出为Excel
+
+    Returns:
+        是否导出成功
+    """
+    processor = DataProcessor()
+    for task in queue.iter_tasks(TASK_KIND):
+        std = dict(task["payload"])
+        if task["status"] == DONE:
+            std.update(task["result"] or {})
+        else:
+            std.update({"下载状态": "失败", "备注": f"处理失败({task['attempts']}次): {task['error']}"})
+        processor.add_standard(std)
+    return processor.export_to_excel(output)
+
+class Worker:
+    """工作节点"""
+
+    def __init__(self, queue: WorkQueue, worker_id: str = None, max_tasks_per_minute: float = None,
+                 exit_when_done: bool = True):
+        """
+        初始化工作节点
+
+        Args:
+            queue: 任务队列
+            worker_id: 节点ID(默认 主机名-进程号)
+            max_tasks_per_minute: 每分钟最多处理的任务数(None 不限)
+            exit_when_done: 列举完成且队列为空时退出
+        """
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.min_interval = 60.0 / max_tasks_per_minute if max_tasks_per_minute else 0.0
+        self.exit_when_done = exit_when_done
+        self.scraper = IndustryStandardScraper()
+        self.current_ids: set = set()
+        self.stats = {"done": 0, "failed": 0}
+        self._stop = threading.Event()
+        self._last_start = 0.0
+
+    def _heartbeat_loop(self) -> None:
+        """后台线程: 定期续约当前任务"""
+        interval = DISTRIBUTED_CONFIG["heartbeat_seconds"]
+        while not self._stop.wait(interval):
+            try:
+                ids = list(self.current_ids)
+                renewed = self.queue.heartbeat(self.worker_id, ids)
+                if ids and renewed < len(ids):
+                    logger.warning("部分任务租约已被收回(续约超时), 结果可能被其他节点覆盖")
+            except Exception as e:
+                logger.warning(f"续约失败: {e}")
+
+    def _pace(self) -> None:
+        """按 max_tasks_per_minute 限速"""
+        wait = self._last_start + self.min_interval - time.time()
+        if wait > 0:
+            time.sleep(wait)
+        self._last_start = time.time()
+
+    def _drained(self) -> bool:
+        """列举已完成且没有待处理或处理中的任务"""
+        if not self.queue.get_meta(META_ENUMERATED):
+            return False
+        counts = self.queue.counts(TASK_KIND)
+        return counts[PENDING] == 0 and counts[LEASED] == 0
+
+    def _restart_browser(self) -> None:
+        """任务异常后重启浏览器, 避免后续任务连续失败"""
+        try:
+            self.scraper.close_browser()
+        except Exception as e:
+            logger.debug(f"关闭浏览器失败: {e}")
+        self.scraper.page = self.scraper.context = self.scraper.browser = None
+        self.scraper.list_route_installed = False
+        if hasattr(self.scraper, "playwright"):
+            del self.scraper.playwright
+        self.scraper.start_browser()
+
+    def process(self, task: Dict) -> None:
+        """处理一个任务并上报结果"""
+        std = task["payload"]
+        self.scraper.data_processor = DataProcessor()
+        self.scraper.data_processor.add_standard(std)
+        self.current_ids = {task["id"]}
+        try:
+            with metrics.span("distributed_task"):
+                detail_info = self.scraper.process_standard(std)
+            if detail_info is None:
+                self.queue.fail(task["id"], self.worker_id, "没有详情页链接")
+                self.stats["failed"] += 1
+            elif self.queue.complete(task["id"], self.worker_id, detail_info):
+                self.stats["done"] += 1
+            else:
+                logger.warning(f"任务 {task['key']} 的租约已被收回, 结果未记录")
+        except Exception as e:
+            status = self.queue.fail(task["id"], self.worker_id, str(e))
+            self.stats["failed"] += 1
+            logger.error(f"任务 {task['key']} 失败(第 {task['attempts']} 次, {status}): {e}")
+            self._restart_browser()
+        finally:
+            self.current_ids = set()
+
+    def run(self) -> Dict[str, int]:
+        """
+        循环租用并处理任务
+
+        Returns:
+            本节点的处理统计
+        """
+        self.queue.register_worker(self.worker_id)
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="queue-heartbeat", daemon=True)
+        heartbeat.start()
+        logger.info(f"工作节点 {self.worker_id} 启动, 队列: {self.queue.path}")
+
+        try:
+            self.scraper.captcha_solver.start_warmup()
+            with metrics.span("browser_start"):
+                self.scraper.start_browser()
+
+            while not self._stop.is_set():
+                tasks = self.queue.lease(self.worker_id, TASK_KIND, limit=1)
+                if not tasks:
+                    if self.exit_when_done and self._drained():
+                        logger.info("队列已处理完毕")
+                        break
+                    self._stop.wait(DISTRIBUTED_CONFIG["poll_seconds"])
+                    continue
+
+                self._pace()
+                self.process(tasks[0])
+                if not self.scraper.proxy_pool:
+                    self.scraper._delay("download")
+
+        except KeyboardInterrupt:
+            logger.warning("用户中断工作节点(未完成的任务将在租约过期后重新入队)")
+        finally:
+            self._stop.set()
+            if self.scraper.response_cache:
+                self.scraper.response_cache.flush()
+            self.scraper.close_browser()
+            self.scraper.export_metrics()
+            logger.info(f"工作节点 {self.worker_id} 退出: {self.stats}")
+        return self.stats
+
+def print_status(queue: WorkQueue) -> None:
+    """打印队列和各工作节点状态"""
+    counts = queue.counts(TASK_KIND)
+    enumerated = queue.get_meta(META_ENUMERATED)
+    print(f"列举: {'完成于 ' + enumerated if enumerated else '进行中或未开始'}")
+    print("任务: " + ", ".join(f"{status} {n}" for status, n in counts.items()))
+    now = time.time()
+    for worker in queue.workers():
+        print(
+            f"  {worker['id']:<30} 完成 {worker['done']:>6}  失败 {worker['failed']:>4}  "
+            f"最近心跳 {now - worker['heartbeat']:.0f}s 前"
+        )
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="分布式爬取(共享任务队列)")
+    parser.add_argument("role", choices=["coordinator", "worker", "status", "export"], help="运行角色")
+    parser.add_argument("--queue", default=DISTRIBUTED_CONFIG["queue_path"], help="SQLite 队列路径(多机时放在共享存储上)")
+    parser.add_argument("--wait", action="store_true", help="协调节点: 入队后等待全部完成并导出")
+    parser.add_argument("-o", "--output", help="导出的Excel路径")
+    parser.add_argument("--worker-id", help="工作节点ID(默认 主机名-进程号)")
+    parser.add_argument("--max-tasks-per-minute", type=float, default=DISTRIBUTED_CONFIG["max_tasks_per_minute"],
+                        help="工作节点每分钟最多处理的任务数")
+    parser.add_argument("--keep-running", action="store_true", help="工作节点: 队列为空时继续等待新任务")
+    add_har_arguments(parser)
+    args = parser.parse_args()
+    apply_har_arguments(args)
+
+    queue = WorkQueue(args.queue)
+    if args.role == "coordinator":
+        run_coordinator(queue)
+        if args.wait:
+            wait_for_completion(queue)
+            export_results(queue, args.output)
+    elif args.role == "worker":
+        Worker(queue, args.worker_id, args.max_tasks_per_minute, exit_when_done=not args.keep_running).run()
+    elif args.role == "status":
+        print_status(queue)
+    else:
+        export_results(queue, args.output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -19,6 +19,8 @@ import config
 from scraper import IndustryStandardScraper
 from scraper_list_only import ListOnlyScraper as ListScraper
 from constants import DEPARTMENTS, INDUSTRIES, STATUSES, RECORD_DATES
+from ocr_engines import available_engines
+from utils import add_log_handler
 
 # ==========================================
 # 日志处理
@@ -158,6 +160,12 @@ class MainWindow(QMainWindow):
         self.status_combo.setCurrentText("现行")
         form_layout.addRow("标准状态:", self.status_combo)
         
+        # 备案日期下拉
+        self.date_combo = QComboBox()
+        for name, code in RECORD_DATES:
+            self.date_combo.addItem(name, code)
+        form_layout.addRow("备案日期:", self.date_combo)
+        
         filter_layout.addLayout(form_layout)
         filter_group.setLayout(filter_layout)
         left_layout.addWidget(filter_group)
@@ -188,10 +196,18 @@ class MainWindow(QMainWindow):
         adv_layout.addRow(self.chk_browser)
         
         # OCR引擎
+        # 仅列出依赖已安装的引擎(打包版不包含 EasyOCR/torch)
         self.ocr_combo = QComboBox()
-        self.ocr_combo.addItem("ddddocr (推荐, 100%成功率)", "ddddocr")
-        self.ocr_combo.addItem("EasyOCR (较慢)", "easyocr")
-        self.ocr_combo.addItem("Tesseract (不推荐)", "tesseract")
+        engine_labels = [
+            ("ddddocr", "ddddocr (推荐, 100%成功率)"),
+            ("template", "模板匹配 (极快, 需先训练模板)"),
+            ("easyocr", "EasyOCR (较慢)"),
+            ("tesseract", "Tesseract (不推荐)"),
+        ]
+        installed = available_engines()
+        for engine, label in engine_labels:
+            if engine in installed:
+                self.ocr_combo.addItem(label, engine)
         adv_layout.addRow("验证码引擎:", self.ocr_combo)
         
         # 延迟设置
@@ -340,8 +356,9 @@ class MainWindow(QMainWindow):
         self.log_handler.log_signal.connect(self.append_log)
         formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', datefmt='%H:%M:%S')
         self.log_handler.setFormatter(formatter)
-        logging.getLogger().addHandler(self.log_handler)
-        logging.getLogger().setLevel(logging.INFO)
+        self.log_handler.setLevel(logging.INFO)
+        # 挂到后台日志线程上, 与文件/控制台共用同一个队列
+        add_log_handler(self.log_handler)
 
     @Slot(str)
     def append_log(self, msg):
@@ -365,7 +382,8 @@ class MainWindow(QMainWindow):
         filter_config = {
             "department": dept_code,
             "industry_code": industry_code,
-            "status": status_code
+            "status": status_code,
+            "record_date": self.date_combo.currentData(),
         }
         
         # 2. 获取高级配置
@@ -386,6 +404,7 @@ class MainWindow(QMainWindow):
         self.dept_combo.setEnabled(False)
         self.industry_combo.setEnabled(False)
         self.status_combo.setEnabled(False)
+        self.date_combo.setEnabled(False)
         self.rb_dept.setEnabled(False)
         self.rb_industry.setEnabled(False)
         
@@ -422,6 +441,7 @@ class MainWindow(QMainWindow):
         self.stop_btn.setEnabled(False)
         self.adv_group.setEnabled(True)
         self.status_combo.setEnabled(True)
+        self.date_combo.setEnabled(True)
         self.rb_dept.setEnabled(True)
         self.rb_industry.setEnabled(True)
         self.mode_combo.setEnabled(True)
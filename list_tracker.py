@@ -0,0 +1,136 @@
+"""
+翻页一致性 - 列表按位置分页, 爬取期间站点新增或撤下标准时, 记录会在页与页之间移动
+
+    - 按 hash_id 去重: 重复的行不进入详情页/下载阶段, 序号按去重后的顺序编号
+    - 出现重复行: 当前位置之前新增了同样多条标准, 它们落在已爬过的页中;
+      重新核对时从第1页起逐页查找, 找齐后停止
+    - 分页信息中的总数("总共 N 条")减少: 之前的位置有标准被撤下, 后面的记录前移到上一页末尾,
+      重新爬取上一页和本页
+    - 某页行数少于预期(加载失败等): 重新爬取该页
+    - 总页数增加: 爬取新增的末页
+重新核对期间仍可能发生变化, 最多核对 LIST_CONSISTENCY_CONFIG["max_rounds"] 轮。
+"""
+import math
+from typing import Dict, List, Optional, Set
+from utils import setup_logger
+from metrics import metrics
+
+logger = setup_logger("list_tracker")
+
+def record_key(row: Dict) -> str:
+    """去重键: hash_id(缺失时用标准号)"""
+    return row.get("hash_id") or row.get("标准号") or ""
+
+class ListingTracker:
+    """列表页去重与翻页错位检测"""
+
+    def __init__(self, total: Optional[int], page_size: int, total_pages: int):
+        """
+        Args:
+            total: 开始爬取时的总记录数(未知时为None)
+            page_size: 每页数量
+            total_pages: 开始爬取时的总页数
+        """
+        self.total = total
+        self.page_size = page_size
+        self.total_pages = total_pages
+        self.seen: Set[str] = set()
+        self.last_page = 0
+        self.duplicates = 0
+        self.rechecked = 0
+        # 待重新爬取的页(必须核对)
+        self._recheck: Set[int] = set()
+        # 已爬过的页中尚未找到的新增标准数, 及需要从第1页核对到的页码
+        self.missing_new = 0
+        self._scan_until = 0
+        # 本轮核对的必查页
+        self._required: Set[int] = set()
+
+    def _expected_rows(self, page_num: int) -> int:
+        if self.total is None:
+            return 0
+        return max(0, min(self.page_size, self.total - (page_num - 1) * self.page_size))
+
+    def accept(self, page_num: int, rows: List[Dict], total_now: Optional[int] = None,
+               recheck: bool = False) -> List[Dict]:
+        """
+        记录一页的结果, 返回其中未见过的标准(序号按去重后的顺序重新编号)
+
+        Args:
+            page_num: 页码
+            rows: 该页的标准列表
+            total_now: 爬取该页时分页信息中的总数(无法读取时为None)
+            recheck: 是否为重新核对(此时重复行是预期的)
+
+        Returns:
+            新的标准列表
+        """
+        new, duplicates = [], 0
+        for row in rows:
+            key = record_key(row)
+            if key in self.seen:
+                duplicates += 1
+                continue
+            self.seen.add(key)
+            row["序号"] = len(self.seen)
+            new.append(row)
+
+        if recheck:
+            self.rechecked += 1
+            self.missing_new = max(0, self.missing_new - len(new))
+            if new:
+                logger.info(f"重新核对第 {page_num} 页: 找到 {len(new)} 条之前遗漏的标准")
+                metrics.inc("list_recovered", len(new))
+        else:
+            self.last_page = max(self.last_page, page_num)
+            if duplicates:
+                # 前面新增了标准, 记录整体后移: 本页开头是上一页末尾的记录, 新标准落在已爬过的页中
+                self.duplicates += duplicates
+                self.missing_new += duplicates
+                self._scan_until = max(self._scan_until, page_num)
+                metrics.inc("list_duplicates", duplicates)
+                logger.warning(f"第 {page_num} 页有 {duplicates} 条与之前的页重复(爬取期间站点新增了标准), 已跳过")
+
+        if total_now is not None and self.total is not None and total_now != self.total:
+            logger.warning(f"列表总数在爬取期间变化: {self.total} → {total_now}(第 {page_num} 页)")
+            metrics.inc("list_drift")
+            if total_now < self.total and page_num > 1:
+                # 前面撤下了标准, 记录整体前移: 本页原来开头的记录落到了上一页末尾
+                # (之后再有新增时又会移回本页开头, 因此两页都核对)
+                self._recheck.update((page_num - 1, page_num))
+            self.total = total_now
+            self.total_pages = max(1, math.ceil(total_now / self.page_size))
+
+        if len(rows) < self._expected_rows(page_num):
+            logger.warning(f"第 {page_num} 页只有 {len(rows)} 条(预期 {self._expected_rows(page_num)} 条), 稍后重新爬取")
+            self._recheck.add(page_num)
+        return new
+
+    def take_pending(self) -> List[int]:
+        """
+        开始新一轮核对, 返回需要重新爬取的页码(升序); 没有时返回空列表
+        """
+        required = set(self._recheck)
+        # 总页数增加: 末尾新增的页从未爬取过
+        required.update(range(self.last_page + 1, self.total_pages + 1))
+        pages = set(required)
+        if self.missing_new:
+            pages.update(range(1, self._scan_until + 1))
+        self._recheck.clear()
+        self._scan_until = 0
+        self._required = required
+        self.last_page = max(self.last_page, self.total_pages)
+        return sorted(p for p in pages if 1 <= p <= self.total_pages)
+
+    def can_skip(self, page_num: int) -> bool:
+        """本轮核对中该页是否可以跳过(新增的标准已经找齐)"""
+        return page_num not in self._required and self.missing_new <= 0
+
+    def summary(self) -> Dict:
+        return {
+            "unique": len(self.seen),
+            "total": self.total,
+            "duplicates": self.duplicates,
+            "rechecked_pages": self.rechecked,
+            "missing_new": self.missing_new,
+        }
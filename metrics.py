@@ -0,0 +1,341 @@
+"""
+运行指标模块 - 各阶段耗时统计、计数器及导出
+
+用法:
+    from metrics import metrics
+
+    with metrics.span("detail_navigate"):
+        page.goto(url)
+    metrics.inc("pdf_downloads", result="success")
+
+导出方式:
+    - Prometheus 文本格式文件(METRICS_CONFIG["prom_file"]), 可由 node_exporter textfile 采集
+    - 本地 HTTP 端点 http://127.0.0.1:<http_port>/metrics (http_port 为 None 时不启动)
+    - 运行结束时的 JSON 汇总(METRICS_CONFIG["summary_file"]), 按总耗时排序列出各阶段
+"""
+import json
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from utils import setup_logger, ensure_dir
+from config import METRICS_CONFIG
+
+logger = setup_logger("metrics")
+
+# 阶段耗时直方图的桶边界(秒), 覆盖从字段提取(毫秒级)到页面加载/下载(数十秒)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# 每个阶段保留的最近耗时样本数(仅用于汇总中的分位数)
+RECENT_SAMPLES = 2000
+
+STAGE_METRIC = "stage_duration_seconds"
+STAGE_ERRORS = "stage_errors"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    """将标签字典转换为可哈希的有序元组"""
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    """格式化为 Prometheus 标签文本"""
+    pairs = key + extra
+    if not pairs:
+        return ""
+    escaped = [(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in pairs]
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+def _format_value(value: float) -> str:
+    """格式化数值(整数不带小数点)"""
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class _Histogram:
+    """单个标签组合的直方图"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.recent.append(value)
+
+    def percentile(self, q: float) -> float:
+        """最近样本的分位数(最近秩法)"""
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        idx = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+        return ordered[idx]
+
+class MetricsRegistry:
+    """指标注册表(线程安全)"""
+
+    def __init__(self, namespace: str = "scraper", buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        初始化指标注册表
+
+        Args:
+            namespace: 指标名前缀
+            buckets: 直方图桶边界(秒)
+        """
+        self.namespace = namespace
+        self.buckets = tuple(sorted(buckets))
+        self.enabled = METRICS_CONFIG.get("enabled", True)
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+        self._help: Dict[str, str] = {
+            STAGE_METRIC: "各阶段耗时(秒)",
+            STAGE_ERRORS: "各阶段抛出异常的次数",
+        }
+        self._started = time.time()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def describe(self, name: str, help_text: str) -> None:
+        """设置指标说明(导出为 # HELP)"""
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """
+        计数器累加
+
+        Args:
+            name: 指标名(不含前缀和 _total 后缀)
+            value: 增量
+            **labels: 标签
+        """
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """
+        记录一次直方图观测值
+
+        Args:
+            name: 指标名(不含前缀)
+            value: 观测值
+            **labels: 标签
+        """
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = _Histogram(self.buckets)
+            hist.observe(value)
+
+    @contextmanager
+    def span(self, stage: str, **labels) -> Iterator[None]:
+        """
+        计时一个阶段, 结束时记入 stage_duration_seconds{stage=...}
+
+        阶段内抛出的异常会计入 stage_errors 后继续向外抛出
+
+        Args:
+            stage: 阶段名
+            **labels: 附加标签
+        """
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.inc(STAGE_ERRORS, stage=stage, **labels)
+            raise
+        finally:
+            self.observe(STAGE_METRIC, time.perf_counter() - start, stage=stage, **labels)
+
+    def reset(self) -> None:
+        """清空所有指标"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._started = time.time()
+
+    def to_prometheus(self) -> str:
+        """
+        导出为 Prometheus 文本格式
+
+        Returns:
+            指标文本
+        """
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(self._counters):
+                full = f"{self.namespace}_{name}_total"
+                if name in self._help:
+                    lines.append(f"# HELP {full} {self._help[name]}")
+                lines.append(f"# TYPE {full} counter")
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f"{full}{_format_labels(key)} {_format_value(value)}")
+
+            for name in sorted(self._histograms):
+                full = f"{self.namespace}_{name}"
+                if name in self._help:
+                    lines.append(f"# HELP {full} {self._help[name]}")
+                lines.append(f"# TYPE {full} histogram")
+                for key, hist in sorted(self._histograms[name].items()):
+                    for bound, count in zip(hist.buckets, hist.counts):
+                        lines.append(f"{full}_bucket{_format_labels(key, (('le', _format_value(bound)),))} {count}")
+                    lines.append(f"{full}_bucket{_format_labels(key, (('le', '+Inf'),))} {hist.count}")
+                    lines.append(f"{full}_sum{_format_labels(key)} {_format_value(round(hist.total, 6))}")
+                    lines.append(f"{full}_count{_format_labels(key)} {hist.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict:
+        """
+        生成 JSON 汇总: 各阶段次数、总耗时、平均/分位数耗时(按总耗时降序)及计数器
+
+        Returns:
+            汇总字典
+        """
+        with self._lock:
+            stages = []
+            for key, hist in self._histograms.get(STAGE_METRIC, {}).items():
+                labels = dict(key)
+                errors = self._counters.get(STAGE_ERRORS, {}).get(key, 0)
+                stages.append({
+                    **labels,
+                    "count": hist.count,
+                    "errors": int(errors),
+                    "total_s": round(hist.total, 3),
+                    "mean_s": round(hist.total / hist.count, 4) if hist.count else 0.0,
+                    "p50_s": round(hist.percentile(0.50), 4),
+                    "p95_s": round(hist.percentile(0.95), 4),
+                    "max_s": round(hist.max, 4),
+                })
+
+            counters = {}
+            for name, series in self._counters.items():
+                if name == STAGE_ERRORS:
+                    continue
+                for key, value in series.items():
+                    suffix = ",".join(f"{k}={v}" for k, v in key)
+                    counters[f"{name}{{{suffix}}}" if suffix else name] = value
+
+        stages.sort(key=lambda s: s["total_s"], reverse=True)
+        elapsed = time.time() - self._started
+        for stage in stages:
+            stage["share"] = round(stage["total_s"] / elapsed, 4) if elapsed > 0 else 0.0
+
+        return {
+            "started_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self._started)),
+            "elapsed_s": round(elapsed, 3),
+            "stages": stages,
+            "counters": counters,
+        }
+
+    def write_prometheus(self, path: str = None) -> Optional[str]:
+        """
+        将指标写入 Prometheus 文本文件(先写临时文件再替换, 避免采集到半截内容)
+
+        Returns:
+            文件路径(未配置时为None)
+        """
+        path = path or METRICS_CONFIG.get("prom_file")
+        if not path:
+            return None
+        ensure_dir(str(Path(path).parent))
+        tmp = Path(str(path) + ".tmp")
+        tmp.write_text(self.to_prometheus(), encoding="utf-8")
+        tmp.replace(path)
+        return str(path)
+
+    def write_summary(self, path: str = None) -> Dict:
+        """
+        写出 JSON 汇总并在日志中打印耗时最多的阶段
+
+        Returns:
+            汇总字典
+        """
+        data = self.summary()
+        path = path or METRICS_CONFIG.get("summary_file")
+        if path:
+            ensure_dir(str(Path(path).parent))
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            logger.info(f"运行指标汇总已保存: {path}")
+
+        for stage in data["stages"][:10]:
+            logger.info(
+                f"  {stage['stage']:<22} 次数 {stage['count']:>6}  总耗时 {stage['total_s']:>9.1f}s  "
+                f"平均 {stage['mean_s']:.3f}s  p95 {stage['p95_s']:.3f}s"
+            )
+        return data
+
+    def start_http_server(self, port: int = None, host: str = "127.0.0.1") -> Optional[ThreadingHTTPServer]:
+        """
+        在后台线程启动 /metrics 端点
+
+        Args:
+            port: 端口(None时使用配置, 配置也为None时不启动)
+            host: 监听地址
+
+        Returns:
+            HTTP服务器对象
+        """
+        port = port if port is not None else METRICS_CONFIG.get("http_port")
+        if not self.enabled or port is None or self._server is not None:
+            return self._server
+
+        registry = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer((host, port), _Handler)
+        except OSError as e:
+            logger.warning(f"指标端点启动失败({host}:{port}): {e}")
+            return None
+
+        thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+        thread.start()
+        logger.info(f"指标端点已启动: http://{host}:{self._server.server_port}/metrics")
+        return self._server
+
+    def stop_http_server(self) -> None:
+        """停止 /metrics 端点"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+# 进程内共享的指标注册表
+metrics = MetricsRegistry()
@@ -0,0 +1,688 @@
+"""
+本地模拟站点 - 在本机复现 hbba.sacinfo.org.cn 的页面结构, 用于离线测试与性能基准
+
+复现的页面:
+    /stdList                  列表页(筛选 onclick、bootstrap-table 风格分页、.pagination-info)
+    /stdQueryList             列表数据接口(POST, 列表页的 JS 调用)
+    /stdDetail/{hash_id}      详情页(dt/dd 基础信息 + p 标签备案/起草信息)
+    /portal/online/{hash_id}  在线预览页(验证码弹窗, 或 .tip 未公开提示)
+    /portal/captcha           刷新验证码
+    /portal/download/{hash_id}?code=&token=   验证码正确时返回PDF, 否则返回HTML错误页
+
+验证码图片取自 captcha_samples/ (文件名即答案), 可通过延迟与故障注入模拟慢速/不稳定的服务器。
+
+用法:
+    python mock_site.py --port 8800 --count 500 --latency 0.05 --error-rate 0.02
+    # 然后让爬虫指向模拟站点(见 point_scraper_at)
+
+    # 按客户端限流(每分钟30个请求, 超出返回429), 并在 8801-8803 端口启动3个本地代理
+    python mock_site.py --rate-limit 30 --proxies 3
+
+    # 爬取期间每5次列表查询置顶新增1条标准、每7次撤下1条(翻页错位)
+    python mock_site.py --publish-every 5 --withdraw-every 7
+"""
+import argparse
+import base64
+import hashlib
+import json
+import random
+import secrets
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import date, datetime, timedelta, timezone
+from email.utils import format_datetime
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+from utils import setup_logger
+from config import BASE_DIR
+from constants import DEPARTMENTS, INDUSTRIES, STATUSES, RECORD_DATES
+from catalogue_generator import generate_catalogue, load_catalogue, assign_not_public, make_dummy_pdf
+from proxy_pool import ProxyStandIn
+
+logger = setup_logger("mock_site")
+
+DEFAULT_CAPTCHA_DIR = Path(BASE_DIR) / "captcha_samples"
+
+LIST_PAGE_SIZES = (15, 25, 50, 100)
+
+# 部委代码 -> 名称
+DEPARTMENT_NAMES = {code: name for name, code in DEPARTMENTS if code}
+
+class MockSite:
+    """模拟站点(后台线程中运行的 HTTP 服务器)"""
+
+    def __init__(
+        self,
+        records: List[Dict] = None,
+        count: int = 200,
+        seed: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        not_public_rate: float = 0.1,
+        captcha_dir: str = None,
+        rate_limit: int = None,
+        publish_every: int = None,
+        withdraw_every: int = None,
+    ):
+        """
+        初始化模拟站点
+
+        Args:
+            records: 标准记录(为None时按 count/seed 由 catalogue_generator 生成)
+            count: 生成的标准数量
+            seed: 随机种子(决定记录内容、未公开标准和故障注入序列)
+            latency: 每个请求的基础延迟(秒)
+            jitter: 额外的随机延迟上限(秒)
+            error_rate: 返回 503 的请求比例(列表接口、详情页、在线预览页、下载)
+            not_public_rate: 未公开(不可下载)标准的比例
+            captcha_dir: 验证码图片目录(文件名即答案)
+            rate_limit: 每个客户端每分钟最多请求数, 超出返回 429(客户端按 X-Forwarded-For 区分)
+            publish_every: 每N次列表查询在最前面新增1条标准(模拟爬取期间发布新标准)
+            withdraw_every: 每N次列表查询随机撤下1条标准
+        """
+        self.records = records if records is not None else generate_catalogue(count, seed)
+        self.by_hash = {r["hash_id"]: r for r in self.records}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self._client_requests: Dict[str, deque] = defaultdict(deque)
+
+        self.publish_every = publish_every
+        self.withdraw_every = withdraw_every
+        self._list_queries = 0
+        if publish_every or withdraw_every:
+            # 目录会被修改, 不影响调用方传入的列表
+            self.records = list(self.records)
+            self._unpublished = (
+                r for r in generate_catalogue(max(count, 100), seed + 1) if r["hash_id"] not in self.by_hash
+            )
+
+        self.not_public = assign_not_public(self.records, not_public_rate, seed)
+        # 备案日期筛选("近N月")以目录中最新的备案日期为基准, 使结果不随运行日期变化
+        self.latest_record_date = max((r["备案日期"] for r in self.records), default=date.today().isoformat())
+        self._fault_rng = random.Random(seed + 1)
+        self._lock = threading.Lock()
+
+        self.captchas = self._load_captchas(Path(captcha_dir) if captcha_dir else DEFAULT_CAPTCHA_DIR)
+        self._tokens: Dict[str, str] = {}
+
+        self.stats = {"requests": 0, "errors_injected": 0, "downloads": 0, "captcha_rejected": 0, "not_modified": 0,
+                      "rate_limited": 0, "published": 0, "withdrawn": 0}
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _load_captchas(captcha_dir: Path) -> List[Tuple[str, bytes]]:
+        """加载验证码图片 [(答案, PNG字节)]"""
+        captchas = [(p.stem.split("_")[0], p.read_bytes()) for p in sorted(captcha_dir.glob("*.png"))]
+        if not captchas:
+            raise FileNotFoundError(f"验证码目录中没有图片: {captcha_dir}")
+        return captchas
+
+    @property
+    def url(self) -> str:
+        """站点根地址"""
+        if self._server is None:
+            raise RuntimeError("模拟站点尚未启动")
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self, port: int = 0, host: str = "127.0.0.1") -> str:
+        """
+        在后台线程启动服务器
+
+        Args:
+            port: 端口(0表示自动分配)
+            host: 监听地址
+
+        Returns:
+            站点根地址
+        """
+        site = self
+
+        class _Handler(_MockHandler):
+            mock = site
+
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-site", daemon=True)
+        self._thread.start()
+        logger.info(f"模拟站点已启动: {self.url} ({len(self.records)} 条标准, 未公开 {len(self.not_public)} 条)")
+        return self.url
+
+    def stop(self) -> None:
+        """停止服务器"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    # ---------- 请求处理辅助 ----------
+
+    def delay(self) -> None:
+        """模拟网络/服务器延迟"""
+        wait = self.latency + (self._fault_rng.uniform(0, self.jitter) if self.jitter else 0)
+        if wait > 0:
+            time.sleep(wait)
+
+    def inject_error(self) -> bool:
+        """按 error_rate 决定本次请求是否返回故障"""
+        with self._lock:
+            self.stats["requests"] += 1
+            failed = self.error_rate > 0 and self._fault_rng.random() < self.error_rate
+            if failed:
+                self.stats["errors_injected"] += 1
+            return failed
+
+    def throttle(self, client: str) -> bool:
+        """按 rate_limit 决定本次请求是否被限流(最近60秒内的请求数)"""
+        if not self.rate_limit:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            recent = self._client_requests[client]
+            while recent and now - recent[0] > 60:
+                recent.popleft()
+            if len(recent) >= self.rate_limit:
+                self.stats["rate_limited"] += 1
+                return True
+            recent.append(now)
+            return False
+
+    def new_captcha(self) -> Tuple[str, str]:
+        """生成一张新验证码, 返回 (token, data URI)"""
+        with self._lock:
+            answer, png = self._fault_rng.choice(self.captchas)
+            token = secrets.token_hex(8)
+            self._tokens[token] = answer
+        return token, "data:image/png;base64," + base64.b64encode(png).decode("ascii")
+
+    def check_captcha(self, token: str, code: str) -> bool:
+        """校验验证码(每个token只能使用一次)"""
+        with self._lock:
+            answer = self._tokens.pop(token, None)
+            ok = answer is not None and code.strip().lower() == answer.lower()
+            self.stats["downloads" if ok else "captcha_rejected"] += 1
+            return ok
+
+    def churn(self) -> None:
+        """按 publish_every/withdraw_every 在列表查询之间新增或撤下标准"""
+        with self._lock:
+            self._list_queries += 1
+            if self.publish_every and self._list_queries % self.publish_every == 0:
+                record = next(self._unpublished, None)
+                if record:
+                    self.records.insert(0, record)
+                    self.by_hash[record["hash_id"]] = record
+                    self.stats["published"] += 1
+            if self.withdraw_every and self._list_queries % self.withdraw_every == 0 and self.records:
+                record = self.records.pop(self._fault_rng.randrange(len(self.records)))
+                self.by_hash.pop(record["hash_id"], None)
+                self.stats["withdrawn"] += 1
+
+    def query(self, params: Dict[str, str]) -> Dict:
+        """列表数据接口: 按筛选条件过滤并分页"""
+        if self.publish_every or self.withdraw_every:
+            self.churn()
+        rows = self.records
+        if params.get("ministry"):
+            # 部委参数为代码(与页面筛选链接一致), 也接受名称
+            ministry = DEPARTMENT_NAMES.get(params["ministry"], params["ministry"])
+            rows = [r for r in rows if r["批准发布部门"] == ministry]
+        if params.get("industry"):
+            rows = [r for r in rows if r["行业代码"] == params["industry"]]
+        if params.get("status"):
+            rows = [r for r in rows if r["状态"] == params["status"]]
+        if params.get("date"):
+            months = abs(int(params["date"]))
+            latest = date.fromisoformat(self.latest_record_date)
+            since = (latest - timedelta(days=30 * months)).isoformat()
+            rows = [r for r in rows if r["备案日期"] >= since]
+
+        current = max(1, int(params.get("current") or 1))
+        size = int(params.get("size") or LIST_PAGE_SIZES[0])
+        page_rows = rows[(current - 1) * size:current * size]
+        return {
+            "total": len(rows),
+            "current": current,
+            "size": size,
+            "records": [
+                {
+                    "seq": (current - 1) * size + i + 1,
+                    "code": r["标准号"],
+                    "name": r["标准名称"],
+                    "industry": r["行业领域"],
+                    "status": r["状态"],
+                    "recordDate": r["备案日期"],
+                    "pk": r["hash_id"],
+                }
+                for i, r in enumerate(page_rows)
+            ],
+        }
+
+class _MockHandler(BaseHTTPRequestHandler):
+    """模拟站点请求处理"""
+
+    mock: MockSite = None
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Dict[str, str] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _html(self, html: str, status: int = 200) -> None:
+        self._send(status, html.encode("utf-8"), "text/html; charset=utf-8")
+
+    def _unavailable(self) -> None:
+        self._html("<html><body><h1>503 Service Unavailable</h1></body></html>", status=503)
+
+    def _throttled(self) -> bool:
+        """客户端超出限流时返回 429"""
+        client = self.headers.get("X-Forwarded-For") or self.client_address[0]
+        if not self.mock.throttle(client):
+            return False
+        self._send(429, b"<html><body><h1>429 Too Many Requests</h1></body></html>", "text/html; charset=utf-8",
+                   {"Retry-After": "60"})
+        return True
+
+    def _detail(self, record: Dict) -> None:
+        """详情页(带 ETag/Last-Modified, 支持条件请求)"""
+        body = render_detail_page(record).encode("utf-8")
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        modified = datetime.fromisoformat(record["备案日期"]).replace(tzinfo=timezone.utc)
+        headers = {"ETag": etag, "Last-Modified": format_datetime(modified, usegmt=True)}
+        if self.headers.get("If-None-Match") == etag:
+            with self.mock._lock:
+                self.mock.stats["not_modified"] += 1
+            self.send_response(304)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.end_headers()
+            return
+        self._send(200, body, "text/html; charset=utf-8", headers)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        path = parsed.path
+        self.mock.delay()
+        if self._throttled():
+            return
+
+        if path in ("/", "/stdList"):
+            self._html(render_list_page())
+            return
+
+        if path.startswith("/stdDetail/"):
+            record = self.mock.by_hash.get(path.rsplit("/", 1)[-1])
+            if record is None:
+                self._html("<html><body>标准不存在</body></html>", status=404)
+            elif self.mock.inject_error():
+                self._unavailable()
+            else:
+                self._detail(record)
+            return
+
+        if path.startswith("/portal/online/"):
+            hash_id = path.rsplit("/", 1)[-1]
+            record = self.mock.by_hash.get(hash_id)
+            if record is None:
+                self._html("<html><body>标准不存在</body></html>", status=404)
+            elif self.mock.inject_error():
+                self._unavailable()
+            elif hash_id in self.mock.not_public:
+                self._html(render_not_public_page(record, self.mock.not_public[hash_id]))
+            else:
+                token, src = self.mock.new_captcha()
+                self._html(render_online_page(record, token, src))
+            return
+
+        if path == "/portal/captcha":
+            token, src = self.mock.new_captcha()
+            self._send(200, json.dumps({"token": token, "src": src}).encode("utf-8"), "application/json")
+            return
+
+        if path.startswith("/portal/download/"):
+            hash_id = path.rsplit("/", 1)[-1]
+            params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+            record = self.mock.by_hash.get(hash_id)
+            if record is None or hash_id in self.mock.not_public:
+                self._html("<html><body>标准不存在</body></html>", status=404)
+            elif self.mock.inject_error():
+                self._unavailable()
+            elif not self.mock.check_captcha(params.get("token", ""), params.get("code", "")):
+                # 与真实站点一致: 验证码错误时下载到的是一个很小的HTML页面
+                self._send(200, "<html><body>验证码错误</body></html>".encode("utf-8"), "text/html; charset=utf-8",
+                           {"Content-Disposition": f'attachment; filename="{hash_id}.pdf"'})
+            else:
+                self._send(200, make_dummy_pdf(record["hash_id"]), "application/pdf",
+                           {"Content-Disposition": f'attachment; filename="{hash_id}.pdf"'})
+            return
+
+        self._html("<html><body>Not Found</body></html>", status=404)
+
+    def do_POST(self):
+        parsed = urlparse(self.path)
+        self.mock.delay()
+        if self._throttled():
+            return
+
+        if parsed.path == "/stdQueryList":
+            length = int(self.headers.get("Content-Length") or 0)
+            params = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode("utf-8")).items()}
+            if self.mock.inject_error():
+                self._unavailable()
+                return
+            body = json.dumps(self.mock.query(params), ensure_ascii=False).encode("utf-8")
+            self._send(200, body, "application/json; charset=utf-8")
+            return
+
+        self._html("<html><body>Not Found</body></html>", status=404)
+
+# ==================== 页面模板 ====================
+
+_LIST_SCRIPT = """
+var state = {current: 1, size: 15, ministry: '', industry: '', status: '', date: ''};
+
+function esc(s) {
+    return String(s).replace(/[&<>"']/g, function (c) {
+        return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+    });
+}
+
+function loadTable() {
+    var body = new URLSearchParams();
+    Object.keys(state).forEach(function (k) { body.append(k, state[k]); });
+    document.querySelector('#hbtable tbody').innerHTML = '<tr class="loading"><td colspan="6">正在加载...</td></tr>';
+    fetch('/stdQueryList', {method: 'POST', body: body})
+        .then(function (r) { if (!r.ok) { throw new Error(r.status); } return r.json(); })
+        .then(renderTable)
+        .catch(function () {
+            document.querySelector('#hbtable tbody').innerHTML = '<tr class="error"><td colspan="6">加载失败</td></tr>';
+        });
+}
+
+function renderTable(data) {
+    var html = data.records.map(function (r) {
+        return '<tr><td>' + r.seq + '</td><td>' + esc(r.code) + '</td>' +
+            '<td><a href="/stdDetail/' + r.pk + '" target="_blank">' + esc(r.name) + '</a></td>' +
+            '<td>' + esc(r.industry) + '</td><td>' + esc(r.status) + '</td><td>' + esc(r.recordDate) + '</td></tr>';
+    }).join('');
+    document.querySelector('#hbtable tbody').innerHTML = html || '<tr class="no-records-found"><td colspan="6">没有找到匹配的记录</td></tr>';
+
+    var start = data.total ? (data.current - 1) * data.size + 1 : 0;
+    var end = Math.min(data.current * data.size, data.total);
+    document.querySelector('.pagination-info').textContent =
+        '显示第 ' + start + ' 到第 ' + end + ' 条记录，总共 ' + data.total + ' 条记录';
+    document.querySelector('.page-size').textContent = data.size;
+
+    var pages = Math.max(1, Math.ceil(data.total / data.size));
+    var from = Math.max(1, data.current - 2), to = Math.min(pages, data.current + 2);
+    var items = [];
+    if (data.current > 1) {
+        items.push('<li class="page-pre"><a href="javascript:void(0)" onclick="goPage(' + (data.current - 1) + ')">‹</a></li>');
+    }
+    if (from > 1) {
+        items.push('<li class="page-number"><a href="javascript:void(0)" onclick="goPage(1)">1</a></li>');
+        if (from > 2) { items.push('<li class="page-last-separator disabled"><a>...</a></li>'); }
+    }
+    for (var p = from; p <= to; p++) {
+        items.push('<li class="page-number' + (p === data.current ? ' active' : '') + '">' +
+            '<a href="javascript:void(0)" onclick="goPage(' + p + ')">' + p + '</a></li>');
+    }
+    if (to < pages) {
+        if (to < pages - 1) { items.push('<li class="page-last-separator disabled"><a>...</a></li>'); }
+        items.push('<li class="page-number"><a href="javascript:void(0)" onclick="goPage(' + pages + ')">' + pages + '</a></li>');
+    }
+    if (data.current < pages) {
+        items.push('<li class="page-next"><a href="javascript:void(0)" onclick="goPage(' + (data.current + 1) + ')">›</a></li>');
+    }
+    document.querySelector('ul.pagination').innerHTML = items.join('');
+}
+
+function goPage(n) { state.current = n; loadTable(); }
+function searchByDept(v) { state.ministry = v; state.current = 1; loadTable(); }
+function searchByIndustry(v) { state.industry = v; state.current = 1; loadTable(); }
+function searchByStatus(v) { state.status = v; state.current = 1; loadTable(); }
+function searchByDate(v) { state.date = v; state.current = 1; loadTable(); }
+function toggleSizeMenu() {
+    var menu = document.querySelector('.dropdown-menu');
+    menu.style.display = menu.style.display === 'block' ? 'none' : 'block';
+}
+function setPageSize(n) {
+    document.querySelector('.dropdown-menu').style.display = 'none';
+    state.size = n; state.current = 1; loadTable();
+}
+
+loadTable();
+"""
+
+def _page(title: str, body: str, script: str = "") -> str:
+    """拼装完整HTML页面"""
+    return (
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\">"
+        f"<title>{escape(title)}</title></head><body>{body}"
+        + (f"<script>{script}</script>" if script else "")
+        + "</body></html>"
+    )
+
+def render_list_page() -> str:
+    """列表页"""
+    dept_links = "".join(
+        f"<li><a href=\"javascript:void(0)\" onclick=\"searchByDept('{code}')\">{escape(name)}</a></li>"
+        for name, code in DEPARTMENTS if code
+    )
+    industry_links = "".join(
+        f"<li><a href=\"javascript:void(0)\" onclick=\"searchByIndustry('{code}')\">"
+        f"<span class=\"industry-code\">{code}</span> {escape(label.split(' - ')[-1])}</a></li>"
+        for label, code in INDUSTRIES if code
+    )
+    status_links = "".join(
+        f"<li><a href=\"javascript:void(0)\" onclick=\"searchByStatus('{code}')\">{escape(name)}</a></li>"
+        for name, code in STATUSES if code
+    )
+    date_links = "".join(
+        f"<li><a href=\"javascript:void(0)\" onclick=\"searchByDate('{code}')\">{escape(name)}</a></li>"
+        for name, code in RECORD_DATES if code
+    )
+    size_options = "".join(
+        f"<li><a href=\"javascript:void(0)\" onclick=\"setPageSize({n})\">{n}</a></li>" for n in LIST_PAGE_SIZES
+    )
+    body = f"""
+<div class="filter-box">
+  <div class="filter-row"><span class="filter-name">部委</span><ul class="dept-list">{dept_links}</ul></div>
+  <div class="filter-row"><span class="filter-name">行业</span><ul class="industry-list">{industry_links}</ul></div>
+  <div class="filter-row"><span class="filter-name">状态</span><ul class="status-list">{status_links}</ul></div>
+  <div class="filter-row"><span class="filter-name">备案日期</span><ul class="date-list">{date_links}</ul></div>
+</div>
+<table id="hbtable">
+  <thead><tr><th>序号</th><th>标准号</th><th>标准名称</th><th>行业领域</th><th>状态</th><th>备案日期</th></tr></thead>
+  <tbody></tbody>
+</table>
+<div class="fixed-table-pagination">
+  <div class="pull-left pagination-detail">
+    <span class="pagination-info"></span>
+    <span class="page-list">每页显示
+      <span class="btn-group dropup">
+        <button type="button" class="btn btn-default dropdown-toggle" onclick="toggleSizeMenu()">
+          <span class="page-size">15</span> <span class="caret"></span>
+        </button>
+        <ul class="dropdown-menu" role="menu" style="display: none">{size_options}</ul>
+      </span> 条记录
+    </span>
+  </div>
+  <div class="pull-right pagination-wrapper"><ul class="pagination"></ul></div>
+</div>
+"""
+    return _page("行业标准信息服务平台", body, _LIST_SCRIPT)
+
+def render_detail_page(record: Dict) -> str:
+    """详情页"""
+    basic_fields = [
+        ("标准号", record["标准号"]),
+        ("发布日期", record["发布日期"]),
+        ("实施日期", record["实施日期"]),
+        ("制修订", record["制修订"]),
+        ("代替标准", record["代替标准"]),
+        ("中国标准分类号", record["CCS分类号"]),
+        ("国际标准分类号", record["ICS分类号"]),
+        ("批准发布部门", record["批准发布部门"]),
+        ("行业分类", record["行业领域"]),
+        ("标准类别", record["标准类别"]),
+    ]
+    items = "".join(
+        f"<dt class=\"basicInfo-item name\">{escape(label)}</dt>"
+        f"<dd class=\"basicInfo-item value\">{escape(value)}</dd>"
+        for label, value in basic_fields
+    )
+    body = f"""
+<div class="container">
+  <h2 class="std-title">{escape(record["标准号"])} {escape(record["标准名称"])}</h2>
+  <div class="detail-section basic-info"><h3>基础信息</h3><dl>{items}</dl></div>
+  <div class="detail-section record-info"><h3>备案信息</h3>
+    <p>备案号：{escape(record["备案号"])}</p>
+    <p>备案日期：{escape(record["备案日期"])}</p>
+  </div>
+  <div class="detail-section draft-info"><h3>起草信息</h3>
+    <p>起草单位：{escape(record["起草单位"])}</p>
+    <p>起草人：{escape(record["起草人"])}</p>
+  </div>
+  <a class="btn online-btn" href="/portal/online/{record["hash_id"]}">在线预览</a>
+</div>
+"""
+    return _page(record["标准名称"], body)
+
+def render_not_public_page(record: Dict, reason: str) -> str:
+    """在线预览页(未公开)"""
+    body = f"""
+<div class="tip">
+  <h3>该标准文本暂未公开</h3>
+  <p>{escape(reason)}</p>
+</div>
+"""
+    return _page(record["标准名称"], body)
+
+def render_online_page(record: Dict, token: str, captcha_src: str) -> str:
+    """在线预览页(验证码弹窗)"""
+    body = f"""
+<div class="modal captcha-modal" style="display: block">
+  <div class="modal-body">
+    <img id="validate-code" src="{captcha_src}" alt="验证码">
+    <a href="javascript:void(0)" class="fa fa-refresh" onclick="refreshCode()">换一张</a>
+    <input id="captcha-input" type="text" placeholder="请输入验证码">
+    <input id="captcha-token" type="hidden" value="{token}">
+    <button id="download-btn" type="button" onclick="downloadPdf()">下载</button>
+  </div>
+</div>
+"""
+    script = f"""
+function refreshCode() {{
+    fetch('/portal/captcha').then(function (r) {{ return r.json(); }}).then(function (d) {{
+        document.getElementById('validate-code').src = d.src;
+        document.getElementById('captcha-token').value = d.token;
+    }});
+}}
+function downloadPdf() {{
+    var code = document.getElementById('captcha-input').value;
+    var token = document.getElementById('captcha-token').value;
+    window.location.href = '/portal/download/{record["hash_id"]}?code=' + encodeURIComponent(code) + '&token=' + token;
+}}
+"""
+    return _page(record["标准名称"], body, script)
+
+def point_scraper_at(base_url: str) -> None:
+    """
+    让爬虫改为访问指定站点(如模拟站点)
+
+    更新 config 中的URL; 对已导入且通过 from config import 复制了这些URL的模块一并更新。
+    最好在导入 scraper 之前调用。
+
+    Args:
+        base_url: 站点根地址, 如 http://127.0.0.1:8800
+    """
+    base_url = base_url.rstrip("/")
+    urls = {
+        "BASE_URL": base_url,
+        "LIST_URL": f"{base_url}/stdList",
+        "DETAIL_URL_TEMPLATE": f"{base_url}/stdDetail/{{hash_id}}",
+        "ONLINE_URL_TEMPLATE": f"{base_url}/portal/online/{{hash_id}}",
+    }
+    for module_name in ("config", "scraper", "scraper_list_only"):
+        module = sys.modules.get(module_name)
+        if module is None:
+            continue
+        for name, value in urls.items():
+            if hasattr(module, name):
+                setattr(module, name, value)
+    logger.info(f"爬虫目标站点已切换为: {base_url}")
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="本地模拟 hbba 站点")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8800, help="端口")
+    parser.add_argument("--count", type=int, default=200, help="标准数量")
+    parser.add_argument("--catalogue", help="使用 catalogue_generator.py 导出的 .jsonl 目录(忽略 --count)")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的基础延迟(秒)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="额外随机延迟上限(秒)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回503的请求比例")
+    parser.add_argument("--not-public-rate", type=float, default=0.1, help="未公开标准比例")
+    parser.add_argument("--captcha-dir", default=None, help="验证码图片目录(文件名即答案)")
+    parser.add_argument("--rate-limit", type=int, default=None, help="每个客户端每分钟最多请求数(超出返回429)")
+    parser.add_argument("--proxies", type=int, default=0, help="在 port+1 起的端口启动N个本地代理(各自模拟一个出口IP)")
+    parser.add_argument("--proxy-latency", type=float, default=0.0, help="本地代理附加延迟(秒), 第i个代理为 i 倍")
+    parser.add_argument("--proxy-error-rate", type=float, default=0.0, help="本地代理返回502的比例")
+    parser.add_argument("--publish-every", type=int, default=None, help="每N次列表查询在最前面新增1条标准")
+    parser.add_argument("--withdraw-every", type=int, default=None, help="每N次列表查询随机撤下1条标准")
+    args = parser.parse_args()
+
+    site = MockSite(
+        records=load_catalogue(args.catalogue) if args.catalogue else None,
+        count=args.count,
+        seed=args.seed,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        not_public_rate=args.not_public_rate,
+        captcha_dir=args.captcha_dir,
+        rate_limit=args.rate_limit,
+        publish_every=args.publish_every,
+        withdraw_every=args.withdraw_every,
+    )
+    site.start(port=args.port, host=args.host)
+    stand_ins = [
+        ProxyStandIn(f"10.0.0.{i + 1}", latency=args.proxy_latency * i, error_rate=args.proxy_error_rate, seed=i)
+        for i in range(args.proxies)
+    ]
+    proxy_urls = [stand_in.start(port=args.port + i + 1, host=args.host) for i, stand_in in enumerate(stand_ins)]
+    print(f"列表页: {site.url}/stdList  (Ctrl+C 退出)")
+    if proxy_urls:
+        print(f"PROXY_CONFIG['proxies'] = {proxy_urls}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for stand_in in stand_ins:
+            stand_in.stop()
+        site.stop()
+        logger.info(f"模拟站点已停止: {site.stats}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,444 @@
+"""
+OCR引擎注册表 - 可插拔、按需加载的验证码识别后端
+
+每个引擎实现统一接口 solve(img_bytes) -> (text, confidence), 通过 register_engine
+注册。引擎依赖仅在 load() 时导入; 是否可用通过 importlib.util.find_spec 检测,
+不会真正导入依赖包。
+
+新增引擎示例:
+
+    @register_engine
+    class MyEngine(OCREngine):
+        name = "my_engine"
+        requires = ("my_ocr_package",)
+
+        def load(self):
+            import my_ocr_package
+            self.model = my_ocr_package.Model()
+
+        def solve(self, img_bytes):
+            return self.model.predict(img_bytes), None
+"""
+import importlib.util
+import os
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple, Type
+from utils import setup_logger
+from config import CAPTCHA_CONFIG
+from captcha_preprocess import preprocess_image, preprocess_images, decode_image, encode_png
+
+logger = setup_logger("ocr_engines")
+
+_REGISTRY: Dict[str, Type["OCREngine"]] = {}
+
+class OCREngine:
+    """OCR引擎基类"""
+
+    # 引擎名称(对应 CAPTCHA_CONFIG["ocr_engine"])
+    name: str = ""
+    # 依赖的顶层模块, 用于在不导入的情况下检测是否可用
+    requires: Tuple[str, ...] = ()
+    # 默认是否先经过 preprocess_image
+    default_preprocess: bool = False
+
+    def __init__(self, preprocess: Optional[bool] = None, threads: Optional[int] = None):
+        """
+        初始化引擎(不加载模型)
+
+        Args:
+            preprocess: 识别前是否预处理图片(None表示使用引擎默认值)
+            threads: 推理线程数上限(None或0表示使用引擎默认值, 即全部核心)
+        """
+        self.preprocess = self.default_preprocess if preprocess is None else preprocess
+        self.threads = threads or None
+        self.loaded = False
+
+    @classmethod
+    def dependencies_installed(cls) -> bool:
+        """检测依赖是否已安装(不导入)"""
+        return all(importlib.util.find_spec(module) is not None for module in cls.requires)
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """是否可以直接使用(默认即依赖已安装; 需要额外资源的引擎可覆盖)"""
+        return cls.dependencies_installed()
+
+    def load(self) -> None:
+        """导入依赖并加载模型"""
+        raise NotImplementedError
+
+    def solve(self, img_bytes: bytes) -> Tuple[Optional[str], Optional[float]]:
+        """
+        识别验证码
+
+        Args:
+            img_bytes: 验证码图片字节数据
+
+        Returns:
+            (识别结果, 置信度) - 引擎不提供置信度时为None, 识别失败时结果为None
+        """
+        raise NotImplementedError
+
+    def solve_array(self, img_array) -> Tuple[Optional[str], Optional[float]]:
+        """
+        识别已解码/预处理的图片数组(以数组为输入的引擎实现, 供批量路径复用)
+
+        Args:
+            img_array: 图片数组
+
+        Returns:
+            (识别结果, 置信度)
+        """
+        raise NotImplementedError
+
+    def solve_batch(self, img_bytes_list: List[bytes]) -> List[Tuple[Optional[str], Optional[float]]]:
+        """
+        批量识别验证码
+
+        以数组为输入的引擎先通过 preprocess_images 批量预处理, 其余引擎逐张识别
+
+        Args:
+            img_bytes_list: 验证码图片字节数据列表
+
+        Returns:
+            与输入顺序一致的 [(识别结果, 置信度)]
+        """
+        if type(self).solve_array is OCREngine.solve_array:
+            return [self.solve(img_bytes) for img_bytes in img_bytes_list]
+        return [self.solve_array(img_array) for img_array in self.prepare_arrays(img_bytes_list)]
+
+    def warm_up(self) -> None:
+        """
+        用一张空白图片做一次推理, 预热 ONNX/torch 会话
+
+        首次推理通常明显慢于后续推理(内存分配、算子初始化等), 提前在后台完成
+        """
+        import io
+        from PIL import Image
+        buf = io.BytesIO()
+        Image.new("RGB", (120, 40), "white").save(buf, format="PNG")
+        try:
+            self.solve(buf.getvalue())
+        except Exception as e:
+            logger.debug(f"{self.name} 预热推理失败(忽略): {e}")
+
+    def prepare_array(self, img_bytes: bytes):
+        """按 preprocess 设置返回引擎输入数组"""
+        if self.preprocess:
+            return preprocess_image(img_bytes)
+        return decode_image(img_bytes)
+
+    def prepare_arrays(self, img_bytes_list: List[bytes]) -> list:
+        """按 preprocess 设置批量返回引擎输入数组"""
+        if self.preprocess:
+            return preprocess_images(img_bytes_list)
+        return [decode_image(img_bytes) for img_bytes in img_bytes_list]
+
+def threads_per_worker(thread_budget: Optional[int] = None, workers: Optional[int] = None) -> int:
+    """
+    计算每个识别器可用的推理线程数
+
+    onnxruntime/torch 默认按核心数启动线程, 多个识别器(每个分片/工作进程一个)
+    同时运行时会互相争抢CPU, 因此将总线程预算平均分配给各个识别器
+
+    Args:
+        thread_budget: 本机分配给OCR的总线程数(None表示CPU核心数)
+        workers: 同时运行的识别器数量
+
+    Returns:
+        每个识别器的线程数(至少为1)
+    """
+    thread_budget = thread_budget or CAPTCHA_CONFIG.get("thread_budget") or os.cpu_count() or 1
+    workers = workers or CAPTCHA_CONFIG.get("workers") or 1
+    return max(1, thread_budget // workers)
+
+def _limit_opencv_threads(threads: Optional[int]) -> None:
+    """限制OpenCV线程数(预处理/模板匹配使用)"""
+    if not threads:
+        return
+    import cv2
+    cv2.setNumThreads(threads)
+
+def register_engine(cls: Type[OCREngine]) -> Type[OCREngine]:
+    """注册OCR引擎(可用作类装饰器)"""
+    _REGISTRY[cls.name] = cls
+    return cls
+
+def get_engine_class(name: str) -> Optional[Type[OCREngine]]:
+    """按名称获取引擎类"""
+    return _REGISTRY.get(name)
+
+def registered_engines() -> List[str]:
+    """已注册的引擎名称"""
+    return list(_REGISTRY)
+
+def available_engines() -> List[str]:
+    """可以直接使用的引擎名称(见 OCREngine.is_available)"""
+    return [name for name, cls in _REGISTRY.items() if cls.is_available()]
+
+def create_engine(name: str, preprocess: Optional[bool] = None, threads: Optional[int] = None) -> OCREngine:
+    """
+    创建并加载OCR引擎
+
+    Args:
+        name: 引擎名称
+        preprocess: 识别前是否预处理图片
+        threads: 推理线程数上限(None或0表示不限制)
+
+    Returns:
+        已加载的引擎实例
+    """
+    cls = get_engine_class(name)
+    if cls is None:
+        raise ValueError(f"未知的OCR引擎: {name}")
+    if not cls.dependencies_installed():
+        raise ImportError(f"OCR引擎 {name} 的依赖未安装: {', '.join(cls.requires)}")
+
+    engine = cls(preprocess=preprocess, threads=threads)
+    engine.load()
+    engine.loaded = True
+    return engine
+
+@register_engine
+class EasyOCREngine(OCREngine):
+    """EasyOCR (torch CRNN)"""
+
+    name = "easyocr"
+    requires = ("easyocr",)
+    default_preprocess = True
+
+    def load(self) -> None:
+        """初始化EasyOCR"""
+        if self.threads:
+            # torch 线程数为进程级设置, 须在创建模型前设置
+            import torch
+            torch.set_num_threads(self.threads)
+            try:
+                torch.set_num_interop_threads(1)
+            except RuntimeError:
+                # 已有并行任务运行过时不允许再修改 inter-op 线程数
+                pass
+            _limit_opencv_threads(self.threads)
+
+        import easyocr
+        langs = CAPTCHA_CONFIG.get("easyocr_langs", ['en'])
+        gpu = CAPTCHA_CONFIG.get("easyocr_gpu", False)
+
+        logger.info(f"正在初始化EasyOCR (语言: {langs}, GPU: {gpu})...")
+        self.reader = easyocr.Reader(langs, gpu=gpu)
+        logger.info("EasyOCR初始化成功")
+
+    def solve(self, img_bytes: bytes) -> Tuple[Optional[str], Optional[float]]:
+        """使用EasyOCR识别"""
+        return self.solve_array(self.prepare_array(img_bytes))
+
+    def solve_array(self, img_array) -> Tuple[Optional[str], Optional[float]]:
+        """识别图片数组"""
+        return self._pick_best(self.reader.readtext(img_array, detail=1))
+
+    def solve_batch(self, img_bytes_list: List[bytes]) -> List[Tuple[Optional[str], Optional[float]]]:
+        """批量识别: 尺寸一致时使用 readtext_batched 一次推理整批图片"""
+        arrays = self.prepare_arrays(img_bytes_list)
+        if len({a.shape for a in arrays}) != 1:
+            return [self.solve_array(a) for a in arrays]
+        return [self._pick_best(results) for results in self.reader.readtext_batched(arrays, detail=1)]
+
+    def _pick_best(self, results: list) -> Tuple[Optional[str], Optional[float]]:
+        """从EasyOCR结果中选出置信度最高的文本并检查阈值"""
+        if not results:
+            logger.warning("EasyOCR未识别到文本")
+            return None, None
+
+        # 提取置信度最高的结果
+        best_result = max(results, key=lambda x: x[2])
+        text, confidence = best_result[1], float(best_result[2])
+
+        # 清理结果
+        text = text.strip().replace(" ", "").replace("-", "")
+
+        logger.info(f"EasyOCR识别结果: {text} (置信度: {confidence:.2f})")
+
+        # 检查置信度
+        threshold = CAPTCHA_CONFIG.get("confidence_threshold", 0.6)
+        if confidence < threshold:
+            logger.warning(f"识别置信度过低 ({confidence:.2f} < {threshold})")
+            return None, confidence
+
+        return text, confidence
+
+@register_engine
+class TesseractEngine(OCREngine):
+    """Tesseract OCR"""
+
+    name = "tesseract"
+    requires = ("pytesseract",)
+    default_preprocess = True
+
+    def load(self) -> None:
+        """初始化Tesseract OCR"""
+        if self.threads:
+            # tesseract 子进程通过 OpenMP 并行, 以环境变量限制线程数
+            os.environ["OMP_THREAD_LIMIT"] = str(self.threads)
+            _limit_opencv_threads(self.threads)
+
+        import pytesseract
+        try:
+            # 测试Tesseract是否可用
+            pytesseract.get_tesseract_version()
+        except Exception:
+            logger.error("请确保已安装Tesseract: brew install tesseract (Mac) 或访问 https://github.com/tesseract-ocr/tesseract")
+            raise
+        self.tesseract = pytesseract
+        logger.info("Tesseract OCR初始化成功")
+
+    def solve(self, img_bytes: bytes) -> Tuple[Optional[str], Optional[float]]:
+        """使用Tesseract OCR识别"""
+        return self.solve_array(self.prepare_array(img_bytes))
+
+    def solve_array(self, img_array) -> Tuple[Optional[str], Optional[float]]:
+        """识别图片数组"""
+        from PIL import Image
+        img = Image.fromarray(img_array)
+
+        config = CAPTCHA_CONFIG.get("tesseract_config", "--psm 7 --oem 3")
+        text = self.tesseract.image_to_string(img, config=config)
+
+        # 清理结果
+        text = text.strip().replace(" ", "").replace("\n", "")
+
+        logger.info(f"Tesseract识别结果: {text}")
+
+        if not text:
+            logger.warning("Tesseract未识别到文本")
+            return None, None
+
+        return text, None
+
+@register_engine
+class DdddOcrEngine(OCREngine):
+    """ddddocr (ONNX)"""
+
+    name = "ddddocr"
+    requires = ("ddddocr",)
+    default_preprocess = False
+
+    def load(self) -> None:
+        """初始化ddddocr"""
+        from PIL import Image
+        # 修复 Pillow 10.0+ 移除 ANTIALIAS 的问题,以兼容 ddddocr
+        if not hasattr(Image, 'ANTIALIAS'):
+            Image.ANTIALIAS = Image.LANCZOS
+
+        import ddddocr
+        if not self.threads:
+            self.ocr = ddddocr.DdddOcr()  # 新版本不需要show_ad参数
+        else:
+            with self._limited_sessions() as sessions:
+                self.ocr = ddddocr.DdddOcr()
+            if sessions:
+                logger.info(f"ddddocr推理线程数: {self.threads}")
+            else:
+                logger.warning("当前ddddocr版本未通过 onnxruntime.InferenceSession 创建会话, 无法限制推理线程数, 将使用默认线程数")
+        logger.info("ddddocr初始化成功")
+
+    @contextmanager
+    def _limited_sessions(self):
+        """
+        在上下文内创建的 onnxruntime 会话使用限制了 intra/inter-op 线程数的 SessionOptions
+
+        ddddocr 不提供 SessionOptions 参数, 内部会话默认按核心数创建线程。
+        这里临时替换 onnxruntime.InferenceSession(只依赖 onnxruntime 的公开接口),
+        产出本次创建的会话列表, 为空说明替换未生效。
+        """
+        import onnxruntime
+
+        original = onnxruntime.InferenceSession
+        sessions = []
+        threads = self.threads
+
+        class LimitedSession(original):
+            def __init__(self, path_or_bytes, sess_options=None, *args, **kwargs):
+                sess_options = sess_options or onnxruntime.SessionOptions()
+                sess_options.intra_op_num_threads = threads
+                sess_options.inter_op_num_threads = 1
+                sess_options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+                super().__init__(path_or_bytes, sess_options, *args, **kwargs)
+                sessions.append(self)
+
+        onnxruntime.InferenceSession = LimitedSession
+        try:
+            yield sessions
+        finally:
+            onnxruntime.InferenceSession = original
+
+    def solve(self, img_bytes: bytes) -> Tuple[Optional[str], Optional[float]]:
+        """使用ddddocr识别"""
+        # ddddocr默认不需要预处理(开启时将预处理结果重新编码为PNG)
+        if self.preprocess:
+            img_bytes = encode_png(preprocess_image(img_bytes))
+
+        result = self.ocr.classification(img_bytes)
+
+        # 清理结果
+        result = result.strip().replace(" ", "")
+
+        logger.info(f"ddddocr识别结果: {result}")
+        return result, None
+
+@register_engine
+class TemplateEngine(OCREngine):
+    """模板匹配(NumPy/OpenCV), 得分过低时回退到其他引擎"""
+
+    name = "template"
+    requires = ("cv2", "numpy")
+    default_preprocess = False
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """依赖已安装且已训练模板(未训练时GUI不列出该引擎)"""
+        template_path = CAPTCHA_CONFIG.get("template_path")
+        return cls.dependencies_installed() and bool(template_path) and os.path.exists(template_path)
+
+    def load(self) -> None:
+        """加载字符模板; 尚未训练模板时直接使用回退引擎"""
+        _limit_opencv_threads(self.threads)
+
+        from template_ocr import TemplateOCR
+        self.matcher = TemplateOCR()
+        self.fallback: Optional[OCREngine] = None
+        if self.matcher.is_trained:
+            logger.info("模板匹配引擎初始化成功")
+            return
+
+        fallback_name = CAPTCHA_CONFIG.get("template_fallback")
+        logger.warning(f"未找到验证码模板: {self.matcher.template_path}(训练: python template_ocr.py train <语料目录>)")
+        if not fallback_name or fallback_name == self.name:
+            raise FileNotFoundError(self.matcher.template_path)
+        self.fallback = create_engine(fallback_name, threads=self.threads)
+        self.matcher = None
+        logger.warning(f"模板未训练, 直接使用回退引擎: {fallback_name}")
+
+    def solve(self, img_bytes: bytes) -> Tuple[Optional[str], Optional[float]]:
+        """使用模板匹配识别, 得分过低(或模板未训练)时交给回退引擎"""
+        if self.matcher is None:
+            return self.fallback.solve(img_bytes)
+
+        text, score = self.matcher.classify(img_bytes)
+        logger.info(f"模板匹配识别结果: {text} (得分: {score:.2f})")
+
+        threshold = CAPTCHA_CONFIG.get("template_min_score", 0.75)
+        if text and score >= threshold:
+            return text, score
+
+        fallback_name = CAPTCHA_CONFIG.get("template_fallback")
+        if not fallback_name or fallback_name == self.name:
+            logger.warning(f"模板匹配得分过低 ({score:.2f} < {threshold})")
+            return text or None, score
+
+        # 回退引擎按需加载
+        if self.fallback is None:
+            self.fallback = create_engine(fallback_name, threads=self.threads)
+            logger.info(f"已加载回退引擎: {fallback_name}")
+
+        logger.info(f"模板匹配得分过低 ({score:.2f}), 使用 {fallback_name} 识别")
+        return self.fallback.solve(img_bytes)
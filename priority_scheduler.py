@@ -0,0 +1,123 @@
+"""
+优先级调度 - 决定详情页/下载阶段处理标准的顺序
+
+运行被提前中断(或有时间限制)时, 先处理最有价值的标准:
+    pinned       指定的标准号最先处理(按指定顺序)
+    fresh_first  从未处理过的(含截止时间前未下载的) → 上次失败的 → 上次已成功的
+    recent       备案日期/发布日期较新的优先
+策略按配置顺序依次比较, 都相同时保持列表顺序。
+
+"上次"的状态来自开始爬取前的检查点(爬取过程中检查点会被覆盖, 因此需在爬取列表页之前加载)。
+"""
+import re
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence
+from utils import setup_logger
+from config import SCHEDULER_CONFIG
+from time_budget import PENDING_DOWNLOAD
+
+logger = setup_logger("priority_scheduler")
+
+POLICIES = ("pinned", "fresh_first", "recent")
+
+# fresh_first 的排序值
+_NEVER_ATTEMPTED, _FAILED, _SUCCEEDED = 0, 1, 2
+
+def _date_value(text) -> int:
+    """日期文本转为 YYYYMMDD 整数(无法解析时为0)"""
+    match = re.search(r"(\d{4})\D?(\d{1,2})\D?(\d{1,2})", str(text or ""))
+    if not match:
+        return 0
+    year, month, day = (int(g) for g in match.groups())
+    return year * 10000 + month * 100 + day
+
+def load_pinned(path: str) -> List[str]:
+    """读取标准号文件(每行一个, 忽略空行和 # 注释)"""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+class PriorityScheduler:
+    """详情页/下载阶段的优先级调度"""
+
+    def __init__(self, policies: Sequence[str] = None, pinned: Sequence[str] = None, pinned_file: str = None):
+        """
+        初始化调度器(参数未指定时使用 SCHEDULER_CONFIG)
+
+        Args:
+            policies: 策略列表(见 POLICIES)
+            pinned: 优先处理的标准号
+            pinned_file: 优先处理的标准号文件
+        """
+        self.policies = list(SCHEDULER_CONFIG["policies"] if policies is None else policies)
+        unknown = set(self.policies) - set(POLICIES)
+        if unknown:
+            raise ValueError(f"未知的调度策略: {', '.join(sorted(unknown))}")
+
+        pinned = list(SCHEDULER_CONFIG["pinned"] if pinned is None else pinned)
+        pinned_file = pinned_file or SCHEDULER_CONFIG.get("pinned_file")
+        if pinned_file and Path(pinned_file).exists():
+            pinned += load_pinned(pinned_file)
+        self.pinned: Dict[str, int] = {}
+        for code in pinned:
+            self.pinned.setdefault(code, len(self.pinned))
+
+        # 标准号 -> 上次的下载状态(流式爬取时为记录存储的按需查询视图)
+        self.history: Optional[Mapping[str, str]] = None
+
+    @property
+    def needs_history(self) -> bool:
+        return "fresh_first" in self.policies and self.history is None
+
+    def load_history(self, standards: List[Dict]) -> None:
+        """
+        记录上次运行中各标准的下载状态
+
+        Args:
+            standards: 上次运行的数据(如检查点)
+        """
+        self.history = {}
+        for std in standards:
+            status = std.get("下载状态")
+            if isinstance(status, str) and status:
+                self.history[std.get("标准号")] = status
+        logger.info(f"已加载上次运行状态: {len(self.history)} 条")
+
+    def _attempt_rank(self, std: Dict) -> int:
+        status = std.get("下载状态")
+        if (not isinstance(status, str) or not status) and self.history is not None:
+            status = self.history.get(std.get("标准号"))
+        if not status or status == PENDING_DOWNLOAD:
+            return _NEVER_ATTEMPTED
+        return _SUCCEEDED if status == "成功" else _FAILED
+
+    def _key(self, std: Dict) -> tuple:
+        key = []
+        for policy in self.policies:
+            if policy == "pinned":
+                key.append(self.pinned.get(std.get("标准号"), len(self.pinned)))
+            elif policy == "fresh_first":
+                key.append(self._attempt_rank(std))
+            else:
+                key.append(-max(_date_value(std.get("备案日期")), _date_value(std.get("发布日期"))))
+        return tuple(key)
+
+    def order(self, standards: List[Dict]) -> List[Dict]:
+        """
+        按优先级排序(稳定排序, 不修改原列表)
+
+        Args:
+            standards: 标准列表
+
+        Returns:
+            排序后的标准列表
+        """
+        if not self.policies:
+            return list(standards)
+        ordered = sorted(standards, key=self._key)
+        if ordered and ordered != standards:
+            pinned = sum(1 for std in standards if std.get("标准号") in self.pinned)
+            logger.info(
+                f"按优先级处理({' > '.join(self.policies)}): 指定优先 {pinned} 条, "
+                f"首个: {ordered[0].get('标准号')}"
+            )
+        return ordered
@@ -0,0 +1,333 @@
+"""
+记录存储 - 流式爬取时以 SQLite 保存标准数据, 内存中不保留全部记录
+
+    - 列表页的每条标准写入后立即落盘, 详情信息按标准号合并(每条处理完即提交)
+    - 每条记录带运行标识: 导出和统计只包含本次运行列举到的标准;
+      上次运行的下载状态保留在记录中(供 fresh_first 调度策略使用), 列表页全部爬完后清除本次未列举到的旧记录
+    - 导出Excel时逐行写出(openpyxl 只写模式), 不构造 DataFrame
+
+StreamingDataProcessor 与 DataProcessor 接口相同, 爬虫其余代码无需区分两种模式。
+"""
+import csv
+import json
+import sqlite3
+import uuid
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from openpyxl import Workbook
+from utils import setup_logger, ensure_dir
+from config import EXCEL_OUTPUT, OUTPUT_DIR, STREAM_CONFIG
+from data_processor import DataProcessor, EXPORT_COLUMNS
+from metrics import metrics
+
+logger = setup_logger("record_store")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    code TEXT PRIMARY KEY,
+    run TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    status TEXT,
+    pdf TEXT,
+    state TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_records_run ON records (run, position);
+"""
+
+def _record_key(record: Dict) -> str:
+    """记录主键: 标准号(缺失时用 hash_id)"""
+    return record.get("标准号") or f"#{record.get('hash_id', '')}"
+
+class _StatusView(Mapping):
+    """标准号 -> 下载状态的只读视图(按需查询, 不加载到内存)"""
+
+    def __init__(self, store: "RecordStore"):
+        self._store = store
+
+    def __getitem__(self, code: str) -> str:
+        row = self._store.conn.execute(
+            "SELECT status FROM records WHERE code = ? AND status IS NOT NULL AND status != ''", (code,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(code)
+        return row[0]
+
+    def __iter__(self) -> Iterator[str]:
+        for (code,) in self._store.conn.execute("SELECT code FROM records WHERE status IS NOT NULL AND status != ''"):
+            yield code
+
+    def __len__(self) -> int:
+        return self._store.conn.execute(
+            "SELECT COUNT(*) FROM records WHERE status IS NOT NULL AND status != ''"
+        ).fetchone()[0]
+
+class RecordStore:
+    """SQLite 记录存储(单进程使用)"""
+
+    def __init__(self, path: str = None):
+        """
+        打开(或创建)记录存储, 并开始新的一次运行
+
+        Args:
+            path: 数据库路径(默认 STREAM_CONFIG["store_path"])
+        """
+        self.path = path or STREAM_CONFIG["store_path"]
+        ensure_dir(str(Path(self.path).parent))
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self.run = uuid.uuid4().hex
+        self.count = 0
+
+    def _write(self, key: str, record: Dict, position: int) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO records (code, run, position, status, pdf, state, data) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, self.run, position, record.get("下载状态"), record.get("PDF文件名"), record.get("状态"),
+             json.dumps(record, ensure_ascii=False)),
+        )
+
+    def get(self, code: str) -> Optional[Dict]:
+        row = self.conn.execute("SELECT data FROM records WHERE code = ?", (code,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def add(self, record: Dict) -> bool:
+        """
+        写入列表页记录; 上次运行已有的记录保留详情信息, 更新列表页字段
+
+        Returns:
+            是否写入(本次运行中重复的标准号不写入, 以最先添加的为准)
+        """
+        key = _record_key(record)
+        row = self.conn.execute("SELECT run, data FROM records WHERE code = ?", (key,)).fetchone()
+        if row and row[0] == self.run:
+            return False
+        self.count += 1
+        self._write(key, {**json.loads(row[1]), **record} if row else dict(record), self.count)
+        return True
+
+    def merge(self, code: str, info: Dict) -> bool:
+        """
+        合并详情信息并立即提交
+
+        Returns:
+            是否找到该标准
+        """
+        row = self.conn.execute("SELECT position, data FROM records WHERE code = ? AND run = ?", (code, self.run)).fetchone()
+        if row is None:
+            return False
+        record = json.loads(row[1])
+        record.update(info)
+        self._write(code, record, row[0])
+        self.conn.commit()
+        return True
+
+    def commit(self) -> None:
+        self.conn.commit()
+
+    def prune(self) -> int:
+        """删除本次运行未列举到的记录(列表页全部爬完后调用)"""
+        removed = self.conn.execute("DELETE FROM records WHERE run != ?", (self.run,)).rowcount
+        self.conn.commit()
+        if removed:
+            logger.info(f"已清除本次未列举到的旧记录 {removed} 条")
+        return removed
+
+    def iter_records(self) -> Iterator[Dict]:
+        """按本次列举顺序逐条读取本次运行的记录"""
+        cursor = self.conn.execute("SELECT data FROM records WHERE run = ? ORDER BY position", (self.run,))
+        for (data,) in cursor:
+            yield json.loads(data)
+
+    def statuses(self) -> Mapping:
+        """标准号 -> 下载状态(含上次运行的状态)"""
+        return _StatusView(self)
+
+    def statistics(self) -> Dict:
+        total, downloaded = self.conn.execute(
+            "SELECT COUNT(*), COUNT(NULLIF(pdf, '')) FROM records WHERE run = ?", (self.run,)
+        ).fetchone()
+        status_count = {
+            state if state is not None else "未知": n
+            for state, n in self.conn.execute(
+                "SELECT state, COUNT(*) FROM records WHERE run = ? GROUP BY state ORDER BY MIN(position)", (self.run,)
+            )
+        }
+        return {"total": total, "downloaded": downloaded, "status_count": status_count}
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+class StreamingDataProcessor(DataProcessor):
+    """以 RecordStore 为存储的数据处理器(接口与 DataProcessor 相同)"""
+
+    def __init__(self, store_path: str = None):
+        """
+        初始化
+
+        Args:
+            store_path: 记录存储路径(默认 STREAM_CONFIG["store_path"])
+        """
+        super().__init__()
+        self.store = RecordStore(store_path)
+
+    def add_standard(self, data: Dict) -> None:
+        """
+        添加标准数据(写入存储, 由 save_checkpoint 提交)
+
+        Args:
+            data: 标准数据字典
+        """
+        if self.store.add(data):
+            logger.debug(f"已添加标准: {data.get('标准号', 'N/A')}")
+
+    def merge_detail_info(self, std_code: str, detail_info: Dict) -> bool:
+        """
+        合并详情页信息到存储中的记录(立即提交)
+
+        Args:
+            std_code: 标准号
+            detail_info: 详情页信息
+
+        Returns:
+            是否合并成功
+        """
+        with metrics.span("merge_detail"):
+            merged = self.store.merge(std_code, detail_info)
+        if not merged:
+            logger.warning(f"未找到标准 {std_code},无法合并详情信息")
+        return merged
+
+    def _columns(self) -> List[str]:
+        """所有记录中出现过的字段(按首次出现顺序)"""
+        columns = {}
+        for record in self.store.iter_records():
+            columns.update(dict.fromkeys(record))
+        return list(columns)
+
+    def _write_excel(self, filename, columns: List[str]) -> int:
+        """逐行写出Excel(openpyxl 只写模式), 返回写出的记录数"""
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(columns)
+        rows = 0
+        for record in self.store.iter_records():
+            sheet.append([record.get(col) for col in columns])
+            rows += 1
+        workbook.save(filename)
+        return rows
+
+    def export_to_excel(self, filename: str = None) -> bool:
+        """
+        导出数据到Excel, 同时写出Excel格式的检查点(供 retry_failed.py 等工具加载)
+
+        Args:
+            filename: 输出文件名(可选)
+
+        Returns:
+            是否导出成功
+        """
+        if not self.store.statistics()["total"]:
+            logger.warning("没有数据可导出")
+            return False
+
+        try:
+            self.store.commit()
+            output_file = filename or EXCEL_OUTPUT
+            with metrics.span("export_excel"):
+                rows = self._write_excel(output_file, EXPORT_COLUMNS)
+            logger.info(f"数据已导出到: {output_file}")
+            logger.info(f"共导出 {rows} 条标准记录")
+
+            checkpoint_file = Path(OUTPUT_DIR) / "checkpoint.xlsx"
+            with metrics.span("save_checkpoint"):
+                self._write_excel(checkpoint_file, self._columns())
+            logger.info(f"检查点已保存: {checkpoint_file}")
+            return True
+
+        except Exception as e:
+            logger.error(f"导出Excel失败: {e}")
+            return False
+
+    def export_to_csv(self, filename: str = None) -> bool:
+        """
+        导出数据到CSV(逐行写出)
+
+        Args:
+            filename: 输出文件名(可选)
+
+        Returns:
+            是否导出成功
+        """
+        try:
+            output_file = filename or EXCEL_OUTPUT.replace('.xlsx', '.csv')
+            columns = self._columns()
+            if not columns:
+                logger.warning("没有数据可导出")
+                return False
+            with open(output_file, "w", newline="", encoding="utf-8-sig") as f:
+                writer = csv.DictWriter(f, fieldnames=columns)
+                writer.writeheader()
+                writer.writerows(self.store.iter_records())
+            logger.info(f"数据已导出到: {output_file}")
+            return True
+
+        except Exception as e:
+            logger.error(f"导出CSV失败: {e}")
+            return False
+
+    def save_checkpoint(self, checkpoint_file: str = None) -> bool:
+        """
+        提交存储(记录已随处理进度写入数据库, 无需另存文件)
+
+        Args:
+            checkpoint_file: 忽略(Excel格式的检查点在导出时写出)
+
+        Returns:
+            是否保存成功
+        """
+        try:
+            self.store.commit()
+            return True
+        except Exception as e:
+            logger.error(f"保存检查点失败: {e}")
+            return False
+
+    def load_checkpoint(self, checkpoint_file: str = None) -> bool:
+        """不加载Excel检查点(上次运行的状态保留在记录存储中, 见 RecordStore.statuses)"""
+        logger.warning("流式模式不加载Excel检查点")
+        return False
+
+    def get_downloaded_standards(self) -> List[str]:
+        """
+        获取已下载PDF的标准号列表
+
+        Returns:
+            标准号列表
+        """
+        return [
+            code for (code,) in self.store.conn.execute(
+                "SELECT code FROM records WHERE run = ? AND pdf IS NOT NULL AND pdf != '' ORDER BY position",
+                (self.store.run,),
+            )
+        ]
+
+    def get_statistics(self) -> Dict:
+        """
+        获取统计信息
+
+        Returns:
+            统计信息字典
+        """
+        stats = self.store.statistics()
+        if not stats["total"]:
+            return {"总数": 0, "已下载PDF": 0, "未下载PDF": 0}
+        return {
+            "总数": stats["total"],
+            "已下载PDF": stats["downloaded"],
+            "未下载PDF": stats["total"] - stats["downloaded"],
+            "状态分布": stats["status_count"],
+        }
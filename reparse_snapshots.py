@@ -0,0 +1,132 @@
+"""
+离线重新解析详情页快照 - 新增或修正字段后无需重新爬取
+
+读取 SnapshotStore 中保存的详情页HTML(爬取时使用 --save-snapshots 或 SNAPSHOT_CONFIG["enabled"]),
+在进程池中用 detail_parser 提取字段, 按 hash_id 合并到检查点数据后导出Excel。
+
+用法:
+    python reparse_snapshots.py
+    python reparse_snapshots.py --checkpoint output/checkpoint.xlsx -o output/standards_reparsed.xlsx --workers 8
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from utils import setup_logger
+from config import OUTPUT_DIR, SNAPSHOT_CONFIG
+from detail_parser import parse_detail_html, lxml_html
+from snapshot_store import SnapshotStore, read_snapshot, hash_id_from_path
+from data_processor import DataProcessor
+
+logger = setup_logger("reparse_snapshots")
+
+def _parse_snapshot(path: str) -> Tuple[str, Optional[Dict], Optional[str]]:
+    """
+    工作进程: 解析一个快照文件
+
+    Returns:
+        (hash_id, 详情信息, 错误信息)
+    """
+    hash_id = hash_id_from_path(path)
+    try:
+        return hash_id, parse_detail_html(read_snapshot(path)), None
+    except Exception as e:
+        return hash_id, None, str(e)
+
+def parse_snapshots(paths: Iterable[str], workers: int = None,
+                    chunksize: int = 64) -> Iterator[Tuple[str, Optional[Dict], Optional[str]]]:
+    """
+    并行解析快照
+
+    Args:
+        paths: 快照文件路径
+        workers: 进程数(默认CPU核数, 1 表示在当前进程中解析)
+        chunksize: 每次分发给工作进程的文件数
+
+    Yields:
+        (hash_id, 详情信息, 错误信息)
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        yield from map(_parse_snapshot, paths)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_parse_snapshot, paths, chunksize=chunksize)
+
+def reparse(snapshot_dir: str = None, checkpoint: str = None, output: str = None,
+            workers: int = None, chunksize: int = 64) -> Dict:
+    """
+    重新解析全部快照并导出
+
+    Args:
+        snapshot_dir: 快照目录(默认使用配置)
+        checkpoint: 检查点文件(提供列表页数据, 按 hash_id 合并)
+        output: 导出的Excel路径
+        workers: 进程数
+        chunksize: 每次分发给工作进程的文件数
+
+    Returns:
+        统计信息
+    """
+    store = SnapshotStore(snapshot_dir)
+    paths = [str(p) for p in store.iter_paths()]
+    logger.info(f"共 {len(paths)} 个快照, 解析器: {'lxml' if lxml_html is not None else 'html.parser'}")
+
+    processor = DataProcessor()
+    if not processor.load_checkpoint(checkpoint):
+        raise FileNotFoundError(f"无法加载检查点: {checkpoint or '默认检查点'}")
+    code_by_hash = {
+        std["hash_id"]: std.get("标准号")
+        for std in processor.standards_data
+        if isinstance(std.get("hash_id"), str) and std["hash_id"]
+    }
+
+    stats = {"snapshots": len(paths), "merged": 0, "unmatched": 0, "errors": 0}
+    start = time.perf_counter()
+    for hash_id, info, error in parse_snapshots(paths, workers, chunksize):
+        if error is not None:
+            stats["errors"] += 1
+            logger.error(f"解析快照 {hash_id} 失败: {error}")
+            continue
+        std_code = code_by_hash.get(hash_id)
+        if std_code is None:
+            stats["unmatched"] += 1
+            logger.debug(f"快照 {hash_id} 不在检查点中, 跳过")
+            continue
+        if info and processor.merge_detail_info(std_code, info):
+            stats["merged"] += 1
+    elapsed = time.perf_counter() - start
+
+    stats["parse_s"] = round(elapsed, 3)
+    stats["per_second"] = round(len(paths) / elapsed, 1) if elapsed > 0 else 0.0
+    logger.info(
+        f"解析完成: 合并 {stats['merged']} 条, 未匹配 {stats['unmatched']} 条, 失败 {stats['errors']} 条, "
+        f"耗时 {elapsed:.1f}s ({stats['per_second']} 个/秒)"
+    )
+
+    processor.export_to_excel(output or os.path.join(OUTPUT_DIR, "standards_reparsed.xlsx"))
+    return stats
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="离线重新解析详情页快照")
+    parser.add_argument("--snapshot-dir", default=SNAPSHOT_CONFIG["dir"], help="快照目录")
+    parser.add_argument("--checkpoint", default=os.path.join(OUTPUT_DIR, "checkpoint.xlsx"), help="检查点文件")
+    parser.add_argument("-o", "--output", default=os.path.join(OUTPUT_DIR, "standards_reparsed.xlsx"),
+                        help="导出的Excel路径")
+    parser.add_argument("--workers", type=int, default=None, help="进程数(默认CPU核数)")
+    parser.add_argument("--chunksize", type=int, default=64, help="每次分发给工作进程的文件数")
+    args = parser.parse_args()
+
+    try:
+        stats = reparse(args.snapshot_dir, args.checkpoint, args.output, args.workers, args.chunksize)
+    except FileNotFoundError as e:
+        logger.error(str(e))
+        return 1
+    return 0 if stats["errors"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
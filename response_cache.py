@@ -0,0 +1,214 @@
+"""
+详情页响应缓存 - 按 hash_id 持久化详情页HTML, 支持有效期、条件请求校验和按容量的LRU淘汰
+
+已发布标准的详情信息几乎不会变化, 重复运行时命中缓存的详情页无需打开页面:
+    - 未过期(ttl_days 内): 直接从缓存解析字段
+    - 已过期但有 ETag/Last-Modified: 发送条件请求, 304 时续期后继续使用缓存
+    - 其他情况: 重新爬取并更新缓存
+
+目录结构:
+    <dir>/index.json                     条目元数据(按最近使用顺序, 最久未使用的在前)
+    <dir>/<hash_id前两位>/<hash_id>.html.gz  页面HTML
+"""
+import gzip
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from utils import setup_logger, ensure_dir
+from config import RESPONSE_CACHE_CONFIG
+
+logger = setup_logger("response_cache")
+
+INDEX_FILE = "index.json"
+INDEX_VERSION = 1
+
+class ResponseCache:
+    """详情页响应缓存(线程安全)"""
+
+    def __init__(self, root: str = None, ttl_days: float = None, max_mb: float = None):
+        """
+        初始化响应缓存
+
+        Args:
+            root: 缓存目录(默认使用配置)
+            ttl_days: 有效期(天, 默认使用配置)
+            max_mb: 缓存容量上限(MB, 默认使用配置)
+        """
+        self.root = Path(root or RESPONSE_CACHE_CONFIG["dir"])
+        ttl_days = RESPONSE_CACHE_CONFIG["ttl_days"] if ttl_days is None else ttl_days
+        max_mb = RESPONSE_CACHE_CONFIG["max_mb"] if max_mb is None else max_mb
+        self.ttl = ttl_days * 86400
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.stats = {"hit": 0, "revalidated": 0, "stale": 0, "miss": 0, "stored": 0, "evicted": 0}
+
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, Dict]" = OrderedDict()
+        self._total_bytes = 0
+        self._dirty = False
+
+        ensure_dir(str(self.root))
+        self._load_index()
+
+    def _body_path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.html.gz"
+
+    def _load_index(self) -> None:
+        """加载索引(丢弃正文文件已不存在的条目)"""
+        path = self.root / INDEX_FILE
+        if not path.exists():
+            return
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"响应缓存索引损坏, 将重建: {e}")
+            return
+        if data.get("version") != INDEX_VERSION:
+            logger.warning("响应缓存索引版本不匹配, 将重建")
+            return
+
+        for key, entry in data.get("entries", []):
+            if self._body_path(key).exists():
+                self._index[key] = entry
+                self._total_bytes += entry.get("size", 0)
+            else:
+                self._dirty = True
+        logger.info(f"已加载响应缓存: {len(self._index)} 条, {self._total_bytes / 1024 / 1024:.1f}MB")
+
+    def get(self, key: str) -> Optional[Tuple[str, Dict]]:
+        """
+        读取缓存条目(并标记为最近使用)
+
+        Args:
+            key: 缓存键(hash_id)
+
+        Returns:
+            (页面HTML, 元数据), 不存在时为None
+        """
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            self._index.move_to_end(key)
+            entry["accessed_at"] = time.time()
+            self._dirty = True
+            entry = dict(entry)
+
+        try:
+            with gzip.open(self._body_path(key), "rb") as f:
+                return f.read().decode("utf-8"), entry
+        except (OSError, EOFError, UnicodeDecodeError) as e:
+            logger.warning(f"读取缓存 {key} 失败: {e}")
+            self.invalidate(key)
+            return None
+
+    def is_fresh(self, entry: Dict) -> bool:
+        """条目是否仍在有效期内"""
+        return time.time() - entry.get("fetched_at", 0) < self.ttl
+
+    @staticmethod
+    def conditional_headers(entry: Dict) -> Dict[str, str]:
+        """
+        生成条件请求头
+
+        Returns:
+            If-None-Match / If-Modified-Since 请求头(条目没有校验信息时为空)
+        """
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(self, key: str, body: str, url: str = None, etag: str = None, last_modified: str = None) -> None:
+        """
+        写入缓存条目(超出容量时淘汰最久未使用的条目)
+
+        Args:
+            key: 缓存键(hash_id)
+            body: 页面HTML
+            url: 页面URL
+            etag: 响应的 ETag
+            last_modified: 响应的 Last-Modified
+        """
+        if not key:
+            return
+        path = self._body_path(key)
+        ensure_dir(str(path.parent))
+        tmp = path.with_name(path.name + ".tmp")
+        with gzip.open(tmp, "wb", compresslevel=6) as f:
+            f.write(body.encode("utf-8"))
+        os.replace(tmp, path)
+
+        now = time.time()
+        size = path.stat().st_size
+        with self._lock:
+            old = self._index.pop(key, None)
+            if old:
+                self._total_bytes -= old.get("size", 0)
+            self._index[key] = {
+                "url": url,
+                "etag": etag,
+                "last_modified": last_modified,
+                "fetched_at": now,
+                "accessed_at": now,
+                "size": size,
+            }
+            self._total_bytes += size
+            self._dirty = True
+            self.stats["stored"] += 1
+            self._evict()
+
+    def touch(self, key: str) -> None:
+        """条件请求返回304后续期"""
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is not None:
+                entry["fetched_at"] = time.time()
+                self._dirty = True
+
+    def invalidate(self, key: str) -> None:
+        """删除缓存条目"""
+        with self._lock:
+            entry = self._index.pop(key, None)
+            if entry is None:
+                return
+            self._total_bytes -= entry.get("size", 0)
+            self._dirty = True
+        self._body_path(key).unlink(missing_ok=True)
+
+    def _evict(self) -> None:
+        """淘汰最久未使用的条目直到不超过容量上限(调用方持有锁)"""
+        while self._total_bytes > self.max_bytes and len(self._index) > 1:
+            key, entry = self._index.popitem(last=False)
+            self._total_bytes -= entry.get("size", 0)
+            self._body_path(key).unlink(missing_ok=True)
+            self.stats["evicted"] += 1
+
+    def flush(self) -> None:
+        """将索引写入磁盘(先写临时文件再替换)"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"version": INDEX_VERSION, "entries": list(self._index.items())}
+            self._dirty = False
+        path = self.root / INDEX_FILE
+        tmp = path.with_name(INDEX_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
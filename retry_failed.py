@@ -0,0 +1,185 @@
+"""
+失败重跑 - 加载上次运行的检查点, 只重新处理可重试的失败标准(详情页 + PDF下载), 结果合并回同一数据集
+
+    - 选择: 下载状态为"失败"且备注不属于永久失败("未公开"/"不公开")的标准, 错误类型见 retry_policy.classify_error;
+      以及截止时间前未下载("待下载")的标准
+    - 并行: --workers N (N>1) 时将这些标准放入临时任务队列, 启动 N 个工作进程处理(见 distributed.py)
+    - 合并: 按标准号合并回检查点数据, 保存检查点并导出Excel
+
+用法:
+    python retry_failed.py --dry-run                 # 只列出将要重跑的标准
+    python retry_failed.py                           # 单进程
+    python retry_failed.py --workers 4 -o output/standards.xlsx
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from utils import setup_logger
+from config import OUTPUT_DIR
+from data_processor import DataProcessor
+from retry_policy import classify_error, NOT_PUBLIC
+from time_budget import PENDING_DOWNLOAD
+from scraper import IndustryStandardScraper
+from work_queue import WorkQueue, DONE
+from distributed import TASK_KIND, META_ENUMERATED
+
+logger = setup_logger("retry_failed")
+
+RETRY_QUEUE = os.path.join(OUTPUT_DIR, "retry_queue.db")
+
+# 截止时间前未下载的标准(不是失败, 但同样需要重跑)
+PENDING = "pending"
+
+def _clean(std: Dict) -> Dict:
+    """去掉检查点中的空单元格(读取Excel时为NaN)"""
+    return {key: value for key, value in std.items() if value == value and value is not None}
+
+def failure_kind(std: Dict) -> Optional[str]:
+    """
+    失败标准的错误类型
+
+    Returns:
+        错误类型(待下载时为 PENDING), 未失败时为None
+    """
+    if std.get("下载状态") == PENDING_DOWNLOAD:
+        return PENDING
+    if std.get("下载状态") != "失败":
+        return None
+    note = std.get("备注")
+    return classify_error(note if isinstance(note, str) else "")
+
+def select_retryable(standards: List[Dict]) -> Tuple[List[Dict], Counter]:
+    """
+    选出可重试的失败标准
+
+    Returns:
+        (可重试的标准列表, 各错误类型的失败数)
+    """
+    retryable, kinds = [], Counter()
+    for std in standards:
+        kind = failure_kind(std)
+        if kind is None:
+            continue
+        kinds[kind] += 1
+        if kind != NOT_PUBLIC and std.get("详情页链接"):
+            retryable.append(_clean(std))
+    return retryable, kinds
+
+def retry_in_process(processor: DataProcessor, standards: List[Dict]) -> None:
+    """在当前进程中重跑(结果直接合并到 processor)"""
+    scraper = IndustryStandardScraper()
+    scraper.data_processor = processor
+    try:
+        scraper.captcha_solver.start_warmup()
+        scraper.start_browser()
+        scraper.scrape_details(standards)
+    except KeyboardInterrupt:
+        logger.warning("用户中断重跑")
+    finally:
+        if scraper.response_cache:
+            scraper.response_cache.flush()
+        scraper.close_browser()
+        scraper.export_metrics()
+
+def retry_with_workers(processor: DataProcessor, standards: List[Dict], workers: int) -> None:
+    """
+    通过临时任务队列由多个工作进程并行重跑, 完成后合并结果
+
+    Args:
+        processor: 检查点数据
+        standards: 待重跑的标准
+        workers: 工作进程数
+    """
+    Path(RETRY_QUEUE).unlink(missing_ok=True)
+    queue = WorkQueue(RETRY_QUEUE)
+    queue.enqueue_many(TASK_KIND, standards)
+    queue.set_meta(META_ENUMERATED, datetime.now().isoformat(timespec="seconds"))
+
+    script = str(Path(__file__).with_name("distributed.py"))
+    procs = [
+        subprocess.Popen([sys.executable, script, "worker", "--queue", RETRY_QUEUE, "--worker-id", f"retry-{i + 1}"])
+        for i in range(workers)
+    ]
+    logger.info(f"已启动 {workers} 个工作进程")
+    try:
+        for proc in procs:
+            proc.wait()
+    except KeyboardInterrupt:
+        logger.warning("用户中断重跑, 合并已完成的结果")
+        for proc in procs:
+            proc.terminate()
+            proc.wait()
+
+    merged = 0
+    for task in queue.iter_tasks(TASK_KIND, statuses=(DONE,)):
+        if processor.merge_detail_info(task["payload"].get("标准号"), task["result"] or {}):
+            merged += 1
+    logger.info(f"已合并 {merged} 条重跑结果")
+
+def retry_failed(checkpoint: str = None, workers: int = 1, output: str = None, dry_run: bool = False) -> Dict:
+    """
+    重跑上次运行中可重试的失败标准
+
+    Args:
+        checkpoint: 检查点路径(默认 output/checkpoint.xlsx)
+        workers: 并行工作进程数(1 表示在当前进程中运行)
+        output: 导出的Excel路径(默认 EXCEL_OUTPUT)
+        dry_run: 只列出将要重跑的标准
+
+    Returns:
+        统计信息
+    """
+    processor = DataProcessor()
+    # 重跑过程中的定期保存(scrape_details)也写入同一检查点, 不覆盖默认检查点
+    processor.checkpoint_file = checkpoint
+    if not processor.load_checkpoint():
+        logger.error("没有可用的检查点, 请先完整运行一次爬虫")
+        return {}
+
+    retryable, kinds = select_retryable(processor.standards_data)
+    logger.info(f"失败/待下载 {sum(kinds.values())} 条: " + ", ".join(f"{kind} {n}" for kind, n in kinds.most_common()))
+    logger.info(f"可重试 {len(retryable)} 条(跳过未公开 {kinds[NOT_PUBLIC]} 条)")
+    stats = {"failed": sum(kinds.values()), "retryable": len(retryable), "kinds": dict(kinds)}
+    if dry_run or not retryable:
+        for std in retryable:
+            logger.info(f"  {std.get('标准号')}  {std.get('备注')}")
+        return stats
+
+    if workers > 1:
+        retry_with_workers(processor, retryable, workers)
+    else:
+        retry_in_process(processor, retryable)
+
+    keys = {std.get("标准号") for std in retryable}
+    recovered = sum(
+        1 for std in processor.standards_data
+        if std.get("标准号") in keys and std.get("下载状态") == "成功"
+    )
+    stats["recovered"] = recovered
+    logger.info(f"重跑完成: 成功 {recovered}/{len(retryable)}")
+
+    processor.save_checkpoint()
+    processor.export_to_excel(output)
+    processor.print_statistics()
+    return stats
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="只重跑上次运行中可重试的失败标准")
+    parser.add_argument("--checkpoint", help="检查点路径(默认 output/checkpoint.xlsx)")
+    parser.add_argument("--workers", type=int, default=1, help="并行工作进程数")
+    parser.add_argument("-o", "--output", help="导出的Excel路径")
+    parser.add_argument("--dry-run", action="store_true", help="只列出将要重跑的标准")
+    args = parser.parse_args()
+
+    stats = retry_failed(args.checkpoint, max(1, args.workers), args.output, args.dry_run)
+    return 0 if stats else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
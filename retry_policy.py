@@ -0,0 +1,244 @@
+"""
+重试与熔断 - 按错误类型决定是否重试, 按阶段指数退避, 服务器大面积故障时暂停阶段
+
+错误类型:
+    timeout       页面加载/等待超时
+    server_error  5xx
+    throttled     429/403(被限流)
+    network       连接失败、连接重置等
+    captcha       验证码错误(由验证码识别器在同一页面内重试)
+    invalid_file  下载的文件过小或不是PDF(通常是服务器返回了错误页)
+    not_public    未公开/不公开(永久, 不重试)
+    other         其他
+
+熔断器只统计服务器类错误(timeout/server_error/throttled/network): 错误率达到阈值时,
+该阶段的下一次尝试会等待暂停结束后再进行(当前标准不会被记为失败, 后续标准保持顺序),
+暂停结束后试探一次, 成功则恢复, 失败则暂停时间加倍。
+"""
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, TypeVar, Union
+from utils import setup_logger
+from config import RETRY_CONFIG
+from metrics import metrics
+
+logger = setup_logger("retry_policy")
+
+TIMEOUT = "timeout"
+SERVER_ERROR = "server_error"
+THROTTLED = "throttled"
+NETWORK = "network"
+CAPTCHA = "captcha"
+INVALID_FILE = "invalid_file"
+NOT_PUBLIC = "not_public"
+OTHER = "other"
+
+# 计入熔断器的错误类型(说明服务器或网络异常, 而不是单个标准的问题)
+BREAKER_KINDS = {TIMEOUT, SERVER_ERROR, THROTTLED, NETWORK}
+
+# 按顺序匹配错误信息中的关键字
+_ERROR_PATTERNS = (
+    (NOT_PUBLIC, ("未公开", "不公开")),
+    (OTHER, ("未找到验证码",)),
+    # Playwright 等待元素超时的信息会带上选择器(如 "#captcha-input"), 需在验证码关键字之前判断
+    (TIMEOUT, ("ms exceeded", "waiting for locator", "waiting for selector")),
+    (CAPTCHA, ("验证码",)),
+    (THROTTLED, ("HTTP 429", "HTTP 403", "Too Many Requests")),
+    (SERVER_ERROR, ("HTTP 5", "Service Unavailable", "Bad Gateway")),
+    (TIMEOUT, ("Timeout", "timeout", "超时")),
+    (NETWORK, ("net::ERR_", "ECONNRESET", "ECONNREFUSED", "Connection reset", "Connection refused")),
+    (INVALID_FILE, ("过小", "文件格式错误", "可能不是PDF")),
+)
+
+T = TypeVar("T")
+
+class StageError(Exception):
+    """阶段失败(带错误类型)"""
+
+    def __init__(self, kind: str, message: str):
+        super().__init__(message)
+        self.kind = kind
+        self.message = message
+
+def status_kind(status: int) -> str:
+    """HTTP状态码对应的错误类型"""
+    if status in (403, 429):
+        return THROTTLED
+    if status >= 500:
+        return SERVER_ERROR
+    return OTHER
+
+def classify_error(error: Union[BaseException, str, None]) -> str:
+    """
+    判断错误类型
+
+    Args:
+        error: 异常或错误信息(如下载失败的备注)
+
+    Returns:
+        错误类型
+    """
+    if isinstance(error, StageError):
+        return error.kind
+    if isinstance(error, BaseException) and type(error).__name__ == "TimeoutError":
+        return TIMEOUT
+    message = str(error or "")
+    for kind, keywords in _ERROR_PATTERNS:
+        if any(keyword in message for keyword in keywords):
+            return kind
+    return OTHER
+
+class CircuitBreaker:
+    """单个阶段的熔断器(线程安全)"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, stage: str, window: int = 20, min_samples: int = 8, error_rate: float = 0.5,
+                 pause_seconds: float = 60, max_pause_seconds: float = 600):
+        self.stage = stage
+        self.min_samples = min_samples
+        self.error_rate = error_rate
+        self.base_pause = pause_seconds
+        self.max_pause = max_pause_seconds
+        self.pause = pause_seconds
+        self.state = self.CLOSED
+        self.open_until = 0.0
+        self.trips = 0
+        self._results: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def wait(self) -> float:
+        """
+        熔断期间阻塞, 暂停结束后转为试探状态
+
+        Returns:
+            等待的秒数
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                if self.state != self.OPEN:
+                    return waited
+                remaining = self.open_until - time.monotonic()
+                if remaining <= 0:
+                    self.state = self.HALF_OPEN
+                    logger.info(f"{self.stage} 阶段暂停结束, 试探恢复")
+                    return waited
+            with metrics.span(f"{self.stage}_breaker_pause"):
+                time.sleep(min(remaining, 5))
+            waited += min(remaining, 5)
+
+    def record(self, failed: bool) -> None:
+        """记录一次尝试结果(failed 仅指服务器类错误)"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                if failed:
+                    self.pause = min(self.pause * 2, self.max_pause)
+                    self._open("试探失败")
+                else:
+                    self.state = self.CLOSED
+                    self.pause = self.base_pause
+                    self._results.clear()
+                    logger.info(f"{self.stage} 阶段已恢复")
+                return
+
+            self._results.append(failed)
+            errors = sum(self._results)
+            if len(self._results) >= self.min_samples and errors / len(self._results) >= self.error_rate:
+                self._open(f"错误率 {errors}/{len(self._results)}")
+
+    def _open(self, reason: str) -> None:
+        """进入熔断状态(调用方持有锁)"""
+        self.state = self.OPEN
+        self.open_until = time.monotonic() + self.pause
+        self.trips += 1
+        self._results.clear()
+        metrics.inc("breaker_trips", stage=self.stage)
+        logger.warning(f"{self.stage} 阶段熔断({reason}), 暂停 {self.pause:.0f} 秒")
+
+class RetryPolicy:
+    """单个阶段的重试策略"""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 2, max_delay: float = 60, retry_on=()):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on = set(retry_on)
+
+    def should_retry(self, kind: str, attempt: int) -> bool:
+        return kind in self.retry_on and attempt < self.max_attempts
+
+    def backoff(self, attempt: int) -> float:
+        """第 attempt 次失败后的等待秒数(指数退避, 在 [0.5, 1] 倍之间随机抖动)"""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+class RetryEngine:
+    """按阶段执行重试与熔断"""
+
+    def __init__(self, config: Dict = None, enabled: bool = None):
+        """
+        Args:
+            config: 重试配置(默认 RETRY_CONFIG)
+            enabled: 是否启用(默认按配置); 未启用时每个阶段只尝试一次, 不熔断
+        """
+        config = config or RETRY_CONFIG
+        self.enabled = config.get("enabled", True) if enabled is None else enabled
+        self.policies: Dict[str, RetryPolicy] = {
+            stage: RetryPolicy(**options) for stage, options in config.get("stages", {}).items()
+        }
+        self.breakers: Dict[str, CircuitBreaker] = {
+            stage: CircuitBreaker(stage, **config.get("breaker", {})) for stage in self.policies
+        }
+
+    def call(self, stage: str, fn: Callable[[], T]) -> T:
+        """
+        执行一个阶段: 失败时按错误类型重试, 熔断期间先等待
+
+        Args:
+            stage: 阶段名(RETRY_CONFIG["stages"] 中的键)
+            fn: 执行一次该阶段, 失败时抛出异常(StageError 可直接指定错误类型)
+
+        Returns:
+            fn 的返回值
+
+        Raises:
+            最后一次尝试的异常
+        """
+        policy = self.policies.get(stage)
+        if not self.enabled or policy is None:
+            return fn()
+        breaker = self.breakers[stage]
+
+        attempt = 0
+        while True:
+            attempt += 1
+            breaker.wait()
+            try:
+                result = fn()
+            except Exception as e:
+                kind = classify_error(e)
+                breaker.record(kind in BREAKER_KINDS)
+                if not policy.should_retry(kind, attempt):
+                    if attempt > 1:
+                        metrics.inc("retry_exhausted", stage=stage, kind=kind)
+                    raise
+                delay = policy.backoff(attempt)
+                metrics.inc("retries", stage=stage, kind=kind)
+                logger.warning(f"{stage} 第 {attempt} 次尝试失败({kind}): {e}, {delay:.1f} 秒后重试")
+                with metrics.span(f"{stage}_retry_backoff"):
+                    time.sleep(delay)
+            else:
+                breaker.record(False)
+                return result
+
+    def status(self) -> Dict[str, Dict]:
+        """各阶段熔断器状态"""
+        return {
+            stage: {"state": breaker.state, "trips": breaker.trips, "pause": breaker.pause}
+            for stage, breaker in self.breakers.items()
+        }
@@ -1,10 +1,16 @@
 """
 行业标准爬虫 - 主模块
 """
+import argparse
 import asyncio
+import math
+import re
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
-from playwright.sync_api import sync_playwright, Page, Browser, Download
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
+from playwright.sync_api import sync_playwright, Page, Browser, BrowserContext, Download
 from utils import (
     setup_logger, 
     random_delay, 
@@ -17,27 +23,97 @@ from config import (
     FILTER_CONFIG,
     DELAY_CONFIG,
     BROWSER_CONFIG,
+    BASE_URL,
     LIST_URL,
+    LIST_QUERY_PATTERN,
     DETAIL_URL_TEMPLATE,
     ONLINE_URL_TEMPLATE,
     PDF_DIR,
+    OUTPUT_DIR,
     PAGE_SIZE,
     CAPTCHA_CONFIG,
+    HAR_CONFIG,
+    SNAPSHOT_CONFIG,
+    RESPONSE_CACHE_CONFIG,
+    PROXY_CONFIG,
+    SCHEDULER_CONFIG,
+    DEADLINE_CONFIG,
+    STREAM_CONFIG,
+    LIST_CONSISTENCY_CONFIG,
 )
 from captcha_solver import CaptchaSolver
+from detail_parser import BASIC_FIELDS, RECORD_FIELDS, DRAFT_FIELDS, parse_detail_html
+from snapshot_store import SnapshotStore
+from response_cache import ResponseCache
+from proxy_pool import ProxyPool, ProxyIdentity
+from retry_policy import RetryEngine, StageError, classify_error, status_kind, NOT_PUBLIC
+from priority_scheduler import PriorityScheduler, POLICIES
+from time_budget import TimeBudget, PENDING_DOWNLOAD, parse_deadline
 from data_processor import DataProcessor
+from record_store import StreamingDataProcessor
+from list_tracker import ListingTracker
+from metrics import metrics
+from constants import DEPARTMENTS, INDUSTRIES
 
 logger = setup_logger("scraper")
 
+# 筛选条件 -> 列表接口参数
+FILTER_QUERY_PARAMS = {
+    "department": "ministry",
+    "industry_code": "industry",
+    "status": "status",
+    "record_date": "date",
+}
+
 class IndustryStandardScraper:
     """行业标准爬虫"""
     
     def __init__(self):
         """初始化爬虫"""
         self.browser: Optional[Browser] = None
+        self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
-        self.data_processor = DataProcessor()
-        self.captcha_solver = CaptchaSolver(use_manual=CAPTCHA_CONFIG["use_manual"])
+        # 流式爬取: 逐页处理详情页和下载, 记录存放在 SQLite 中(内存占用与目录规模无关)
+        self.streaming = bool(STREAM_CONFIG.get("enabled"))
+        self.data_processor = StreamingDataProcessor() if self.streaming else DataProcessor()
+        # 流式爬取时列表页单独占用一个页面, 翻页状态不受详情页访问影响
+        self.list_page: Optional[Page] = None
+        # OCR引擎延迟加载: 完整爬取时由 run() 在后台预热, 仅爬清单时不加载
+        self.captcha_solver = CaptchaSolver(use_manual=CAPTCHA_CONFIG["use_manual"], lazy=True)
+        
+        # HAR 回放时响应来自本地文件: 缩短固定等待, 跳过随机延迟
+        self.har_mode = HAR_CONFIG.get("mode")
+        self.wait_scale = HAR_CONFIG.get("replay_wait_scale", 0.1) if self.har_mode == "replay" else 1.0
+        
+        # 详情页HTML快照(用于离线重新解析, 见 reparse_snapshots.py)
+        self.snapshot_store = SnapshotStore() if SNAPSHOT_CONFIG.get("enabled") else None
+        # 详情页响应缓存(命中时不打开页面)
+        self.response_cache = ResponseCache() if RESPONSE_CACHE_CONFIG.get("enabled") else None
+        
+        # 代理池(每个代理一个浏览器上下文, 按健康度和速率预算分配标准)
+        self.proxy_pool = ProxyPool() if PROXY_CONFIG.get("enabled") else None
+        if self.proxy_pool and self.har_mode:
+            logger.warning("HAR录制/回放模式下不使用代理池")
+            self.proxy_pool = None
+        self.identity: Optional[ProxyIdentity] = None
+        
+        # 按阶段重试与熔断(回放时响应固定, 重试无意义)
+        self.retry = RetryEngine(enabled=False if self.har_mode == "replay" else None)
+        
+        # 详情页/下载阶段的处理顺序
+        self.scheduler = PriorityScheduler()
+        
+        # 各阶段实测耗时与截止时间(截止前优先完成列表页和详情页, 来不及下载的PDF留待下次)
+        self.budget = TimeBudget()
+        
+        # 列表接口首次应答(筛选以接口参数方式应用时记录, 用于校验和计算总页数)
+        self.list_query: Optional[Dict] = None
+        self.list_route_installed = False
+        # 筛选结果的总记录数(由 get_total_pages 获取, 未知时为None)
+        self.total_records: Optional[int] = None
+        
+        # 当前进度(阶段, 已完成, 总数), 供守护进程健康端点等外部查询
+        self.progress = {"stage": "idle", "done": 0, "total": 0}
         
         # 确保输出目录存在
         ensure_dir(PDF_DIR)
@@ -51,20 +127,107 @@ class IndustryStandardScraper:
             headless=BROWSER_CONFIG["headless"]
         )
         
-        context = self.browser.new_context(
-            viewport=BROWSER_CONFIG["viewport"],
-            user_agent=None,  # 使用默认User-Agent
-        )
+        context_options = {
+            "viewport": BROWSER_CONFIG["viewport"],
+            "user_agent": None,  # 使用默认User-Agent
+        }
         
-        self.page = context.new_page()
+        har_path = HAR_CONFIG.get("path")
+        if self.har_mode == "record":
+            # 录制: 关闭上下文时写出HAR(zip格式时响应体作为附件单独存放)
+            ensure_dir(str(Path(har_path).parent))
+            context_options.update(
+                record_har_path=har_path,
+                record_har_url_filter=HAR_CONFIG.get("url_filter"),
+                record_har_content="attach" if str(har_path).endswith(".zip") else "embed",
+            )
+            logger.info(f"HAR录制模式: {har_path}")
+        
+        if self.proxy_pool:
+            # 每个代理一个上下文(独立的代理、User-Agent 和 Cookie)
+            for identity in self.proxy_pool.identities:
+                identity.context = self.browser.new_context(
+                    **{**context_options, **identity.context_options(self.proxy_pool.bypass)}
+                )
+                identity.page = identity.context.new_page()
+                identity.page.set_default_timeout(BROWSER_CONFIG["timeout"])
+            self._use_identity(self.proxy_pool.identities[0])
+            logger.info(f"浏览器启动成功(代理池: {len(self.proxy_pool.identities)} 个上下文)")
+            return
+        
+        self.context = self.browser.new_context(**context_options)
+        
+        if self.har_mode == "replay":
+            # 回放: 所有请求由HAR文件应答, 未录制的请求直接中止(不访问网络)
+            if not Path(har_path).exists():
+                raise FileNotFoundError(f"HAR文件不存在: {har_path}, 请先以录制模式运行")
+            self.context.route_from_har(har_path, url=HAR_CONFIG.get("url_filter"), not_found="abort")
+            logger.info(f"HAR回放模式: {har_path}")
+        
+        self.page = self.context.new_page()
         self.page.set_default_timeout(BROWSER_CONFIG["timeout"])
         
         logger.info("浏览器启动成功")
     
+    def _use_identity(self, identity: ProxyIdentity) -> None:
+        """切换到代理身份对应的浏览器上下文"""
+        self.identity = identity
+        self.context = identity.context
+        self.page = identity.page
+    
+    def _goto(self, url: str):
+        """
+        打开页面; 使用代理池时记录当前代理的延迟和结果(用于健康度)
+        
+        Returns:
+            页面响应
+            
+        Raises:
+            StageError: 响应状态码 >= 400
+        """
+        start = time.perf_counter()
+        try:
+            response = self.page.goto(url)
+        except Exception:
+            if self.proxy_pool:
+                self.proxy_pool.report(self.identity, False, time.perf_counter() - start)
+            raise
+        status = response.status if response else 200
+        if self.proxy_pool:
+            self.proxy_pool.report(self.identity, status < 400, time.perf_counter() - start, status)
+        if status >= 400:
+            raise StageError(status_kind(status), f"HTTP {status}: {url}")
+        return response
+    
+    def _wait(self, ms: float) -> None:
+        """固定等待(回放模式下按 replay_wait_scale 缩短)"""
+        self.page.wait_for_timeout(ms * self.wait_scale)
+    
+    def _delay(self, kind: str) -> None:
+        """
+        请求间随机延迟(回放模式下跳过)
+        
+        Args:
+            kind: DELAY_CONFIG 中的延迟类型
+        """
+        if self.har_mode == "replay":
+            return
+        with metrics.span("random_delay", kind=kind):
+            random_delay(DELAY_CONFIG[kind])
+    
     def close_browser(self) -> None:
         """关闭浏览器"""
-        if self.page:
-            self.page.close()
+        if self.proxy_pool:
+            for identity in self.proxy_pool.identities:
+                if identity.context:
+                    identity.context.close()
+                identity.context = identity.page = None
+        else:
+            if self.page:
+                self.page.close()
+            if self.context:
+                # 录制模式下HAR在关闭上下文时写出
+                self.context.close()
         if self.browser:
             self.browser.close()
         if hasattr(self, 'playwright'):
@@ -72,10 +235,202 @@ class IndustryStandardScraper:
         
         logger.info("浏览器已关闭")
     
+    def list_query_params(self) -> Dict[str, str]:
+        """
+        当前筛选条件对应的列表接口参数
+        
+        Returns:
+            接口参数(含每页数量)
+        """
+        params = {
+            param: str(FILTER_CONFIG[key])
+            for key, param in FILTER_QUERY_PARAMS.items()
+            if FILTER_CONFIG.get(key)
+        }
+        # 部委可配置为名称或代码, 接口参数使用代码
+        if "ministry" in params:
+            params["ministry"] = next(
+                (code for name, code in DEPARTMENTS if code and name == params["ministry"]), params["ministry"]
+            )
+        params["size"] = str(PAGE_SIZE)
+        params["current"] = "1"
+        return params
+    
+    def _route_list_query(self, route) -> None:
+        """拦截列表接口请求, 写入筛选参数(保留页面自身的页码)"""
+        request = route.request
+        params = self.list_query_params()
+        try:
+            if request.method == "POST":
+                form = dict(parse_qsl(request.post_data or "", keep_blank_values=True))
+                params["current"] = form.get("current") or params["current"]
+                form.update(params)
+                route.fallback(post_data=urlencode(form))
+            else:
+                parts = urlsplit(request.url)
+                query = dict(parse_qsl(parts.query, keep_blank_values=True))
+                params["current"] = query.get("current") or params["current"]
+                query.update(params)
+                route.fallback(url=urlunsplit(parts._replace(query=urlencode(query))))
+        except Exception as e:
+            logger.debug(f"改写列表接口参数失败: {e}")
+            route.fallback()
+    
+    def open_list_page(self) -> None:
+        """
+        访问列表页
+        
+        以接口参数方式筛选时, 在访问前拦截列表接口, 页面首次加载即返回筛选后的数据并记录应答
+        """
+        logger.info(f"正在访问列表页: {LIST_URL}")
+        self.list_query = None
+        if FILTER_CONFIG.get("apply_mode", "query") != "query":
+            self.page.goto(LIST_URL)
+            return
+        
+        if not self.list_route_installed:
+            self.page.route(LIST_QUERY_PATTERN, self._route_list_query)
+            self.list_route_installed = True
+        
+        try:
+            with self.page.expect_response(LIST_QUERY_PATTERN, timeout=BROWSER_CONFIG["timeout"]) as response_info:
+                self.page.goto(LIST_URL)
+            response = response_info.value
+            data = response.json() if response.ok else {}
+            self.list_query = {
+                "url": urlunsplit(urlsplit(response.url)._replace(query="")),
+                "method": response.request.method,
+                "params": self.list_query_params(),
+                "total": int(data["total"]),
+                "size": int(data.get("size") or len(data.get("records", [])) or PAGE_SIZE),
+                "records": data.get("records", []),
+            }
+        except Exception as e:
+            logger.warning(f"未获取到列表接口应答, 将以点击方式筛选: {e}")
+            self.list_query = None
+    
+    def _query_total(self, params: Dict[str, str]) -> Optional[int]:
+        """
+        按指定参数请求列表接口(每页1条), 返回结果总数
+        
+        通过浏览器上下文的请求接口发送(共享 Cookie, 不经过 _route_list_query 改写)
+        
+        Args:
+            params: 接口参数(不含页码和每页数量)
+            
+        Returns:
+            总数(请求失败时为None)
+        """
+        query = {**params, "current": "1", "size": "1"}
+        try:
+            if self.list_query["method"] == "POST":
+                response = self.page.request.post(self.list_query["url"], form=query)
+            else:
+                response = self.page.request.get(self.list_query["url"], params=query)
+            return int(response.json()["total"]) if response.ok else None
+        except Exception as e:
+            logger.debug(f"请求列表接口总数失败: {e}")
+            return None
+    
+    def _verify_filtered_total(self) -> bool:
+        """
+        比较筛选后的总数与不筛选时的总数(只多发一次请求)
+        
+        Returns:
+            筛选结果不为空时为True(为空时多半是接口不识别某个筛选值, 回退到点击筛选)
+        """
+        query = self.list_query
+        params = query["params"]
+        filters = {param: params[param] for param in FILTER_QUERY_PARAMS.values() if param in params}
+        if not filters:
+            return True
+        
+        if query["total"] == 0:
+            logger.warning(f"筛选结果为空(接口可能不识别筛选值), 改用点击筛选: {filters}")
+            return False
+        
+        unfiltered = self._query_total({})
+        if unfiltered is not None and query["total"] >= unfiltered:
+            # 也可能是所有记录都符合筛选条件, 只提示不回退
+            logger.warning(f"筛选后的总数与不筛选时相同({unfiltered}), 请确认筛选条件是否生效: {filters}")
+        else:
+            logger.debug(f"筛选后 {query['total']}/{unfiltered} 条")
+        return True
+    
+    def _verify_list_query(self) -> bool:
+        """
+        校验接口参数筛选是否生效
+        
+        根据应答检查: 每页数量、记录的状态与行业是否与筛选条件一致,
+        再与不筛选时的总数比较(见 _verify_filtered_total)
+        
+        Returns:
+            筛选是否生效(False 时回退到点击筛选)
+        """
+        query = self.list_query
+        total, size, records = query["total"], query["size"], query["records"]
+        logger.info(f"列表接口筛选参数: {query['params']}, 总记录数: {total}")
+        
+        if size != PAGE_SIZE:
+            logger.warning(f"接口未接受每页 {PAGE_SIZE} 条, 实际每页 {size} 条")
+        
+        status = FILTER_CONFIG.get("status")
+        if status and records and any(r.get("status", status) != status for r in records):
+            logger.warning(f"状态筛选未生效: {status}")
+            return False
+        
+        industry_code = FILTER_CONFIG.get("industry_code")
+        industry_name = next(
+            (label.split(" - ")[-1] for label, code in INDUSTRIES if code and code == industry_code), None
+        )
+        if industry_name and records and any(r.get("industry", industry_name) != industry_name for r in records):
+            logger.warning(f"行业筛选未生效: {industry_code}")
+            return False
+        
+        return self._verify_filtered_total()
+    
     def apply_filters(self) -> bool:
         """
         应用筛选条件
         
+        优先使用列表接口参数(由 open_list_page 在页面加载时写入, 无需点击和等待),
+        未获取到接口应答或校验未通过时回退到模拟点击
+        
+        Returns:
+            是否应用成功
+        """
+        if self.list_query is not None:
+            if self._verify_list_query():
+                self._wait_list_rendered(self.list_query["total"])
+                return True
+            # 回退前移除参数改写, 避免与点击筛选叠加
+            self.page.unroute(LIST_QUERY_PATTERN, self._route_list_query)
+            self.list_route_installed = False
+            self.list_query = None
+        
+        return self._apply_filters_by_click()
+    
+    def _wait_list_rendered(self, total: int) -> None:
+        """等待表格按接口应答渲染完成(分页信息显示的总数与应答一致)"""
+        if not total:
+            return
+        try:
+            self.page.wait_for_function(
+                """total => {
+                    const info = document.querySelector('.pagination-info');
+                    const match = info && info.textContent.match(/总共\\s*(\\d+)\\s*条/);
+                    return match && Number(match[1]) === total;
+                }""",
+                arg=total,
+                timeout=10000,
+            )
+        except Exception as e:
+            logger.debug(f"等待列表渲染超时: {e}")
+    
+    def _apply_filters_by_click(self) -> bool:
+        """
+        通过模拟点击应用筛选条件
+        
         Returns:
             是否应用成功
         """
@@ -97,7 +452,7 @@ class IndustryStandardScraper:
                 
                 if dept_link:
                     dept_link.click()
-                    self.page.wait_for_timeout(2000)
+                    self._wait(2000)
                     logger.info(f"已选择部委: {dept}")
                 else:
                     logger.warning(f"未找到部委: {dept} (尝试了代码和文本匹配)")
@@ -123,7 +478,7 @@ class IndustryStandardScraper:
 
                 if code_link:
                     code_link.click()
-                    self.page.wait_for_timeout(2000)
+                    self._wait(2000)
                     logger.info(f"已选择行业代码: {code}")
                 else:
                     logger.warning(f"未找到行业代码: {code}")
@@ -144,13 +499,26 @@ class IndustryStandardScraper:
                 
                 if status_link:
                     status_link.click()
-                    self.page.wait_for_timeout(2000)
+                    self._wait(2000)
                     logger.info(f"已选择状态: {status}")
                 else:
                     logger.warning(f"未找到状态: {status}")
             
+            # 应用备案日期筛选
+            if FILTER_CONFIG.get("record_date"):
+                record_date = FILTER_CONFIG["record_date"]
+                logger.info(f"应用备案日期筛选: {record_date}")
+                
+                date_link = self.page.query_selector(f"[onclick*=\"searchByDate('{record_date}')\"]")
+                if date_link:
+                    date_link.click()
+                    self._wait(2000)
+                    logger.info(f"已选择备案日期: {record_date}")
+                else:
+                    logger.warning(f"未找到备案日期: {record_date}")
+            
             # 等待列表更新
-            self.page.wait_for_timeout(2000)
+            self._wait(2000)
             
             # 设置每页显示数量
             self.set_page_size()
@@ -172,13 +540,13 @@ class IndustryStandardScraper:
             dropdown = self.page.query_selector(".pagination-detail .dropdown-toggle")
             if dropdown:
                 dropdown.click()
-                self.page.wait_for_timeout(500)
+                self._wait(500)
                 
                 # 选择对应的选项: .dropdown-menu li a (text=100)
                 option = self.page.query_selector(f".dropdown-menu li a:text-is('{target_size}')")
                 if option:
                     option.click()
-                    self.page.wait_for_timeout(2000) # 等待页面刷新
+                    self._wait(2000) # 等待页面刷新
                     logger.info(f"已设置每页显示 {target_size} 条")
                 else:
                     logger.warning(f"未找到每页显示 {target_size} 条的选项")
@@ -196,21 +564,23 @@ class IndustryStandardScraper:
             总页数
         """
         try:
-            # 优先从分页信息中获取总条数 (显示第 x 到第 y 条记录，总共 z 条记录)
-            info_elem = self.page.query_selector(".pagination-info")
-            if info_elem:
-                text = info_elem.inner_text()
-                import re
-                match = re.search(r'总共\s*(\d+)\s*条', text)
-                if match:
-                    total_records = int(match.group(1))
-                    import math
-                    # 总是使用实际设置的 PAGE_SIZE (默认为15,除非成功设置了100)
-                    # 这里假设 set_page_size 已经成功执行，或者我们需要重新获取当前的 page size
-                    # 为简单起见，我们使用配置的 PAGE_SIZE，因为我们已经尝试设置它了
-                    total_pages = math.ceil(total_records / PAGE_SIZE)
-                    logger.info(f"总记录数: {total_records},每页: {PAGE_SIZE}, 总页数: {total_pages}")
-                    return total_pages
+            # 筛选以接口参数方式应用时, 直接使用接口应答中的总数和每页数量
+            if self.list_query is not None:
+                self.total_records = self.list_query["total"]
+                total_pages = max(1, math.ceil(self.list_query["total"] / self.list_query["size"]))
+                logger.info(f"总记录数: {self.list_query['total']},每页: {self.list_query['size']}, 总页数: {total_pages}")
+                return total_pages
+            
+            # 优先从分页信息中获取总条数
+            total_records = self._pagination_total()
+            if total_records is not None:
+                self.total_records = total_records
+                # 总是使用实际设置的 PAGE_SIZE (默认为15,除非成功设置了100)
+                # 这里假设 set_page_size 已经成功执行，或者我们需要重新获取当前的 page size
+                # 为简单起见，我们使用配置的 PAGE_SIZE，因为我们已经尝试设置它了
+                total_pages = math.ceil(total_records / PAGE_SIZE)
+                logger.info(f"总记录数: {total_records},每页: {PAGE_SIZE}, 总页数: {total_pages}")
+                return total_pages
 
             # 备用方法: 查找分页组件
             pagination = self.page.query_selector(".pagination, .el-pagination")
@@ -249,7 +619,22 @@ class IndustryStandardScraper:
             logger.error(f"获取总页数失败: {e}")
             return 1
     
-    def scrape_list_page(self, page_num: int = 1) -> List[Dict]:
+    def _pagination_total(self) -> Optional[int]:
+        """
+        分页信息中的总条数 (显示第 x 到第 y 条记录，总共 z 条记录)
+        
+        Returns:
+            总条数, 无法读取时为None
+        """
+        try:
+            info_elem = self.page.query_selector(".pagination-info")
+            match = re.search(r'总共\s*(\d+)\s*条', info_elem.inner_text()) if info_elem else None
+            return int(match.group(1)) if match else None
+        except Exception as e:
+            logger.debug(f"读取分页信息失败: {e}")
+            return None
+    
+    def scrape_list_page(self, page_num: int = 1, navigate: bool = True) -> List[Dict]:
         """
         爬取列表页
         
@@ -265,7 +650,7 @@ class IndustryStandardScraper:
             logger.info(f"正在爬取第 {page_num} 页...")
             
             # 如果不是第一页,需要翻页
-            if page_num > 1:
+            if navigate and page_num > 1:
                 self.goto_page(page_num)
             
             # 等待表格加载
@@ -290,17 +675,18 @@ class IndustryStandardScraper:
                     std_name = clean_text(std_name_cell.inner_text()) if std_name_cell else clean_text(cells[2].inner_text())
                     industry = clean_text(cells[3].inner_text())  # 行业领域
                     status = clean_text(cells[4].inner_text()) if len(cells) > 4 else ""  # 状态
+                    record_date = clean_text(cells[5].inner_text()) if len(cells) > 5 else ""  # 备案日期
                     
                     # 提取详情页链接
                     detail_link = std_name_cell.get_attribute("href") if std_name_cell else ""
                     if detail_link and not detail_link.startswith("http"):
-                        detail_link = f"https://hbba.sacinfo.org.cn{detail_link}"
+                        detail_link = f"{BASE_URL}{detail_link}"
                     
                     # 提取hash_id
                     hash_id = extract_hash_id_from_url(detail_link)
                     
                     standard = {
-                        "序号": (page_num - 1) * PAGE_SIZE + idx,
+                        "序号": (page_num - 1) * (self.list_query["size"] if self.list_query else PAGE_SIZE) + idx,
                         "标准号": std_code,
                         "标准名称": std_name,
                         "行业领域": industry,
@@ -308,6 +694,9 @@ class IndustryStandardScraper:
                         "详情页链接": detail_link,
                         "hash_id": hash_id,
                     }
+                    if record_date:
+                        # 供按日期排序的调度策略使用, 详情页的备案日期会覆盖该值
+                        standard["备案日期"] = record_date
                     
                     standards.append(standard)
                     logger.debug(f"已提取: {std_code} - {std_name}")
@@ -323,6 +712,36 @@ class IndustryStandardScraper:
         
         return standards
     
+    def _active_page(self) -> Optional[int]:
+        """当前页码(没有分页控件时为None)"""
+        active_page_elem = self.page.query_selector(".pagination li.page-number.active a")
+        text = active_page_elem.inner_text().strip() if active_page_elem else ""
+        return int(text) if text.isdigit() else None
+    
+    def _goto_list_page(self, page_num: int) -> bool:
+        """
+        跳转到指定页并确认到达(重新核对时页码不连续; 不能直接跳转时先回到第1页再逐页向后翻)
+        
+        Args:
+            page_num: 页码
+            
+        Returns:
+            是否到达
+        """
+        for _ in range(page_num + 2):
+            current = self._active_page()
+            if current == page_num or (current is None and page_num == 1):
+                return True
+            target = page_num
+            if current is not None and current > page_num and not self.page.query_selector(
+                f".pagination li.page-number a:text-is('{page_num}')"
+            ):
+                target = 1
+            if not self.goto_page(target):
+                break
+        logger.warning(f"无法跳转到第 {page_num} 页")
+        return False
+    
     def goto_page(self, page_num: int) -> bool:
         """
         跳转到指定页
@@ -342,7 +761,7 @@ class IndustryStandardScraper:
             page_link = self.page.query_selector(f".pagination li.page-number a:text-is('{page_num}')")
             if page_link:
                 page_link.click()
-                self.page.wait_for_timeout(2000)
+                self._wait(2000)
                 logger.info(f"已跳转到第 {page_num} 页 (直接点击)")
                 return True
 
@@ -358,7 +777,7 @@ class IndustryStandardScraper:
                 next_btn = self.page.query_selector(".pagination li.page-next a")
                 if next_btn:
                     next_btn.click()
-                    self.page.wait_for_timeout(2000)
+                    self._wait(2000)
                     logger.info(f"已点击下一页")
                     return True
             
@@ -379,18 +798,53 @@ class IndustryStandardScraper:
         Returns:
             详情信息字典
         """
-        detail_info = {}
+        hash_id = extract_hash_id_from_url(detail_url)
+        
+        if self.response_cache and hash_id:
+            cached = self._detail_from_cache(hash_id, detail_url)
+            if cached is not None:
+                return cached
         
         try:
-            logger.info(f"正在爬取详情页: {detail_url}")
+            # 超时、5xx 等按 RETRY_CONFIG["stages"]["detail"] 退避重试
+            detail_info = self.retry.call("detail", lambda: self._scrape_detail_once(detail_url, hash_id))
+            logger.info(f"详情页爬取完成")
+        except Exception as e:
+            logger.error(f"爬取详情页失败: {e}")
+            detail_info = {}
+        
+        return detail_info
+    
+    def _scrape_detail_once(self, detail_url: str, hash_id: str) -> Dict:
+        """
+        访问一次详情页并提取字段(失败时抛出异常)
+        
+        Args:
+            detail_url: 详情页URL
+            hash_id: 标准hash ID
             
-            # 访问详情页
-            self.page.goto(detail_url)
+        Returns:
+            详情信息字典
+        """
+        detail_info = {}
+        logger.info(f"正在爬取详情页: {detail_url}")
+        
+        # 访问详情页
+        with metrics.span("detail_navigate"):
+            response = self._goto(detail_url)
+        with metrics.span("detail_networkidle"):
             self.page.wait_for_load_state("networkidle")
-            
-            # 等待内容加载(使用正确的选择器)
+        
+        # 等待内容加载(使用正确的选择器)
+        with metrics.span("detail_wait_selector"):
             self.page.wait_for_selector(".basic-info", timeout=10000)
-            
+        
+        # 页面HTML(用于快照和响应缓存)
+        html = self.page.content() if (self.snapshot_store or self.response_cache) else None
+        if self.snapshot_store:
+            self._save_snapshot(hash_id, html)
+        
+        with metrics.span("detail_extract"):
             # 提取基础信息
             detail_info.update(self._extract_basic_info())
             
@@ -399,14 +853,84 @@ class IndustryStandardScraper:
             
             # 提取起草信息
             detail_info.update(self._extract_draft_info())
-            
-            logger.info(f"详情页爬取完成")
-            
+        
+        if self.response_cache and detail_info:
+            headers = response.headers if response else {}
+            self.response_cache.put(
+                hash_id, html, url=detail_url,
+                etag=headers.get("etag"), last_modified=headers.get("last-modified"),
+            )
+        
+        return detail_info
+    
+    def _save_snapshot(self, hash_id: str, html: str) -> None:
+        """保存当前详情页HTML快照(失败不影响字段提取)"""
+        try:
+            with metrics.span("detail_snapshot"):
+                self.snapshot_store.save(hash_id, html)
         except Exception as e:
-            logger.error(f"爬取详情页失败: {e}")
+            logger.warning(f"保存详情页快照失败: {e}")
+    
+    def _detail_from_cache(self, hash_id: str, detail_url: str) -> Optional[Dict]:
+        """
+        从响应缓存获取详情信息
         
+        Args:
+            hash_id: 标准hash ID
+            detail_url: 详情页URL
+            
+        Returns:
+            详情信息字典(未命中、已过期且未通过校验时为None)
+        """
+        cached = self.response_cache.get(hash_id)
+        if cached is None:
+            result = "miss"
+        else:
+            html, entry = cached
+            if self.response_cache.is_fresh(entry):
+                result = "hit"
+            elif self._revalidate(detail_url, entry):
+                self.response_cache.touch(hash_id)
+                result = "revalidated"
+            else:
+                result = "stale"
+        
+        self.response_cache.stats[result] += 1
+        metrics.inc("detail_cache", result=result)
+        if result in ("miss", "stale"):
+            return None
+        
+        with metrics.span("detail_cache_parse"):
+            detail_info = parse_detail_html(html)
+        if not detail_info:
+            # 缓存内容无法解析(如保存了错误页), 删除后重新爬取
+            self.response_cache.invalidate(hash_id)
+            return None
+        
+        logger.info(f"详情页命中缓存({result}): {detail_url}")
         return detail_info
     
+    def _revalidate(self, detail_url: str, entry: Dict) -> bool:
+        """
+        发送条件请求校验过期的缓存条目(不打开页面)
+        
+        Returns:
+            服务器是否返回 304 Not Modified
+        """
+        headers = ResponseCache.conditional_headers(entry)
+        # HAR回放时 APIRequest 不经过 HAR 路由, 不发送条件请求
+        if not headers or not RESPONSE_CACHE_CONFIG.get("revalidate", True) or self.har_mode == "replay":
+            return False
+        try:
+            with metrics.span("detail_revalidate"):
+                response = self.context.request.get(detail_url, headers=headers)
+                status = response.status
+                response.dispose()
+            return status == 304
+        except Exception as e:
+            logger.debug(f"缓存校验失败: {e}")
+            return False
+    
     def _extract_basic_info(self) -> Dict:
         """提取基础信息"""
         info = {}
@@ -421,21 +945,10 @@ class IndustryStandardScraper:
             # 获取父容器
             container = basic_section.evaluate("el => el.closest('.info-section, .detail-section')")
             
-            # 提取字段(根据实际页面结构调整)
-            fields_map = {
-                "发布日期": "发布日期",
-                "实施日期": "实施日期",
-                "制修订": "制修订",
-                "代替标准": "代替标准",
-                "中国标准分类号": "CCS分类号",
-                "国际标准分类号": "ICS分类号",
-                "批准发布部门": "批准发布部门",
-                "行业分类": "行业领域",  # 可能与列表页重复
-                "标准类别": "标准类别",
-            }
-            
-            for field_name, output_name in fields_map.items():
-                value = self._extract_field_value(field_name)
+            # 提取字段(字段映射见 detail_parser.py)
+            for field_name, output_name in BASIC_FIELDS.items():
+                with metrics.span("extract_field"):
+                    value = self._extract_field_value(field_name)
                 if value:
                     info[output_name] = value
             
@@ -449,13 +962,9 @@ class IndustryStandardScraper:
         info = {}
         
         try:
-            fields_map = {
-                "备案号": "备案号",
-                "备案日期": "备案日期",
-            }
-            
-            for field_name, output_name in fields_map.items():
-                value = self._extract_field_value(field_name)
+            for field_name, output_name in RECORD_FIELDS.items():
+                with metrics.span("extract_field"):
+                    value = self._extract_field_value(field_name)
                 if value:
                     info[output_name] = value
             
@@ -469,13 +978,9 @@ class IndustryStandardScraper:
         info = {}
         
         try:
-            fields_map = {
-                "起草单位": "起草单位",
-                "起草人": "起草人",
-            }
-            
-            for field_name, output_name in fields_map.items():
-                value = self._extract_field_value(field_name)
+            for field_name, output_name in DRAFT_FIELDS.items():
+                with metrics.span("extract_field"):
+                    value = self._extract_field_value(field_name)
                 if value:
                     info[output_name] = value
             
@@ -532,13 +1037,31 @@ class IndustryStandardScraper:
 
     def download_pdf(self, hash_id: str, std_code: str, std_name: str) -> Tuple[Optional[str], Optional[str]]:
         """
-        下载标准PDF
+        下载标准PDF(超时、5xx、文件无效等按 RETRY_CONFIG["stages"]["download"] 退避重试, 未公开不重试)
         
         Args:
             hash_id: 标准hash ID
             std_code: 标准代码
             std_name: 标准名称
             
+        Returns:
+            (下载的文件路径, 备注信息) - 失败时路径为None,备注包含原因
+        """
+        def attempt() -> Tuple[Optional[str], Optional[str]]:
+            filepath, note = self._download_pdf_once(hash_id, std_code, std_name)
+            if filepath is None and classify_error(note) != NOT_PUBLIC:
+                raise StageError(classify_error(note), note)
+            return filepath, note
+        
+        try:
+            return self.retry.call("download", attempt)
+        except StageError as e:
+            return None, e.message
+    
+    def _download_pdf_once(self, hash_id: str, std_code: str, std_name: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        打开一次在线预览页并下载PDF
+        
         Returns:
             (下载的文件路径, 备注信息) - 失败时路径为None,备注包含原因
         """
@@ -549,8 +1072,9 @@ class IndustryStandardScraper:
             online_url = ONLINE_URL_TEMPLATE.format(hash_id=hash_id)
             
             # 访问在线预览页面
-            self.page.goto(online_url)
-            self.page.wait_for_timeout(2000)
+            with metrics.span("pdf_online_page"):
+                self._goto(online_url)
+                self._wait(2000)
             
             # 1. 检查是否存在不可下载提示(如: 未公开、采标标准等)
             # 查找提示标题
@@ -569,6 +1093,7 @@ class IndustryStandardScraper:
                         reason = "未公开(采标标准)"
                         
                     logger.warning(f"无法下载 {std_code}: {reason}")
+                    metrics.inc("pdf_downloads", result="not_public")
                     return None, reason
             
             # 2. 正常下载流程: 等待验证码弹窗出现
@@ -589,6 +1114,7 @@ class IndustryStandardScraper:
             
             if not download:
                 logger.error(f"下载失败: {error}")
+                metrics.inc("pdf_downloads", result="failed")
                 return None, f"下载失败: {error}"
             
             # 生成文件名
@@ -597,7 +1123,8 @@ class IndustryStandardScraper:
             
             # 保存文件 (关键步骤: 从临时目录移动到目标目录)
             try:
-                download.save_as(filepath)
+                with metrics.span("pdf_save"):
+                    download.save_as(filepath)
                 
                 # 验证文件是否有效
                 if not filepath.exists():
@@ -611,6 +1138,7 @@ class IndustryStandardScraper:
                         with open(filepath, 'rb') as f:
                             content = f.read().decode('utf-8', errors='ignore')
                             if "验证码" in content:
+                                self.captcha_solver.mark_last_rejected()
                                 return None, "下载失败: 验证码错误(服务器返回HTML)"
                     except:
                         pass
@@ -630,6 +1158,8 @@ class IndustryStandardScraper:
                         return None, f"文件格式错误: 文件头为 {header}, 预期为 %PDF"
                 
                 logger.info(f"PDF下载成功并保存: {filename} (大小: {file_size/1024:.1f} KB)")
+                metrics.inc("pdf_downloads", result="success")
+                metrics.inc("pdf_bytes", file_size)
                 return str(filepath), None
                 
             except Exception as e:
@@ -640,85 +1170,330 @@ class IndustryStandardScraper:
             logger.error(f"下载PDF出错: {e}")
             return None, f"下载出错: {e}"
     
-    def run(self) -> None:
-        """运行爬虫"""
+    @contextmanager
+    def _listing(self):
+        """列表页操作期间切换到列表页所在的页面, 结束后恢复"""
+        if self.proxy_pool:
+            # 列表页始终使用第一个代理的上下文(列表接口的路由安装在该页面上)
+            self._use_identity(self.proxy_pool.identities[0])
+        if self.list_page is None:
+            yield
+            return
+        detail_page = self.page
+        self.page = self.list_page
         try:
-            logger.info("="*60)
-            logger.info("行业标准爬虫启动")
-            logger.info("="*60)
-            
-            # 启动浏览器
-            self.start_browser()
+            yield
+        finally:
+            self.page = detail_page
+    
+    def iter_listing(self, dedicated_page: bool = False) -> Iterator[List[Dict]]:
+        """
+        访问列表页、应用筛选条件并逐页爬取(每页结果加入数据处理器后产出)
+        
+        Args:
+            dedicated_page: 列表页是否单独使用一个页面(各页之间处理详情页时需要)
             
+        Yields:
+            每页的标准列表
+        """
+        if dedicated_page and self.list_page is None:
+            context = self.proxy_pool.identities[0].context if self.proxy_pool else self.context
+            self.list_page = context.new_page()
+            self.list_page.set_default_timeout(BROWSER_CONFIG["timeout"])
+        
+        with self._listing():
             # 访问列表页
-            logger.info(f"正在访问列表页: {LIST_URL}")
-            self.page.goto(LIST_URL)
+            with metrics.span("list_navigate"):
+                self.open_list_page()
             
             # 应用筛选条件
-            self.apply_filters()
+            with metrics.span("apply_filters"):
+                self.apply_filters()
             
             # 获取总页数
             total_pages = self.get_total_pages()
-            logger.info(f"共 {total_pages} 页数据")
-            
-            # 爬取所有列表页
-            all_standards = []
-            for page_num in range(1, total_pages + 1):
-                standards = self.scrape_list_page(page_num)
-                all_standards.extend(standards)
-                
-                # 添加到数据处理器
-                for std in standards:
-                    self.data_processor.add_standard(std)
-                
-                # 保存检查点
-                self.data_processor.save_checkpoint()
+        logger.info(f"共 {total_pages} 页数据")
+        self.budget.report(total_pages, self.total_records or total_pages * PAGE_SIZE, measured=False)
+        
+        # 逐页爬取(按 hash_id 去重, 并检测爬取期间的翻页错位)
+        page_size = self.list_query["size"] if self.list_query else PAGE_SIZE
+        tracker = ListingTracker(self.total_records, page_size, total_pages)
+        for page_num in range(1, total_pages + 1):
+            if self.budget.expired():
+                logger.warning(f"已到截止时间, 列表页爬取到第 {page_num - 1}/{total_pages} 页为止")
+                return
+            page_start = time.perf_counter()
+            with self._listing():
+                self.progress = {"stage": "list", "done": page_num - 1, "total": total_pages}
+                standards = self._fetch_list_page(page_num, tracker)
                 
                 # 延迟
                 if page_num < total_pages:
-                    random_delay(DELAY_CONFIG["list_page"])
+                    self._delay("list_page")
+            self.budget.record("list_page", time.perf_counter() - page_start)
+            yield standards
+        
+        # 重新爬取受翻页错位影响的页
+        for _ in range(LIST_CONSISTENCY_CONFIG.get("max_rounds", 2)):
+            pages = tracker.take_pending()
+            if not pages:
+                break
+            logger.info(f"重新核对 {len(pages)} 页列表页(第 {pages[0]}-{pages[-1]} 页)")
+            for page_num in pages:
+                if self.budget.expired():
+                    logger.warning("已到截止时间, 停止重新核对列表页")
+                    return
+                if tracker.can_skip(page_num):
+                    continue
+                with self._listing():
+                    standards = self._fetch_list_page(page_num, tracker, recheck=True)
+                    self._delay("list_page")
+                if standards:
+                    yield standards
+        
+        summary = tracker.summary()
+        if summary["duplicates"] or summary["rechecked_pages"]:
+            logger.info(
+                f"翻页一致性: 跳过重复 {summary['duplicates']} 条, 重新核对 {summary['rechecked_pages']} 页, "
+                f"去重后 {summary['unique']} 条(当前总数 {summary['total']})"
+            )
+        if summary["total"] is not None and summary["unique"] < summary["total"]:
+            logger.warning(f"列表页可能仍有遗漏: 去重后 {summary['unique']} 条, 当前总数 {summary['total']} 条")
+    
+    def _fetch_list_page(self, page_num: int, tracker: ListingTracker, recheck: bool = False) -> List[Dict]:
+        """
+        爬取一页列表页, 去重后加入数据处理器并保存检查点
+        
+        Args:
+            page_num: 页码
+            tracker: 翻页一致性检测
+            recheck: 是否为重新核对(页码不连续, 需先跳转并确认)
+            
+        Returns:
+            该页中之前未见过的标准
+        """
+        with metrics.span("list_page"):
+            if recheck:
+                rows = self.scrape_list_page(page_num, navigate=False) if self._goto_list_page(page_num) else []
+            else:
+                rows = self.scrape_list_page(page_num)
+        standards = tracker.accept(page_num, rows, self._pagination_total(), recheck=recheck)
+        if tracker.total is not None:
+            self.total_records = tracker.total
+        metrics.inc("standards_listed", len(standards))
+        
+        # 添加到数据处理器并保存检查点
+        for std in standards:
+            self.data_processor.add_standard(std)
+        self.data_processor.save_checkpoint()
+        return standards
+    
+    def scrape_listing(self, on_page: Callable[[List[Dict]], None] = None) -> List[Dict]:
+        """
+        访问列表页、应用筛选条件并爬取所有列表页(结果同时加入数据处理器)
+        
+        Args:
+            on_page: 每爬完一页时以该页的标准列表调用(如分布式模式下逐页入队)
             
-            logger.info(f"列表页爬取完成,共 {len(all_standards)} 条标准")
+        Returns:
+            标准列表
+        """
+        all_standards = []
+        for standards in self.iter_listing():
+            all_standards.extend(standards)
+            if on_page:
+                on_page(standards)
+        
+        logger.info(f"列表页爬取完成,共 {len(all_standards)} 条标准")
+        return all_standards
+    
+    def scrape_streaming(self) -> None:
+        """
+        流式爬取: 每爬完一页列表页即处理该页标准的详情页和PDF, 内存中只保留当前页
+        
+        调度策略在每页内生效; 上次运行的状态从记录存储中按需查询
+        """
+        if self.scheduler.needs_history:
+            self.scheduler.history = self.data_processor.store.statuses()
+        
+        listed = 0
+        for standards in self.iter_listing(dedicated_page=True):
+            listed += len(standards)
+            self.scrape_details(standards, items_after=max(0, (self.total_records or listed) - listed))
+        
+        logger.info(f"流式爬取完成,共 {listed} 条标准")
+        if not self.budget.expired():
+            # 列表页已全部爬完: 清除本次未列举到的旧记录
+            self.data_processor.store.prune()
+    
+    def process_standard(self, std: Dict, download: bool = True) -> Optional[Dict]:
+        """
+        爬取一条标准的详情页并下载PDF, 结果合并到数据处理器
+        
+        Args:
+            std: 列表页数据
+            download: 是否下载PDF(否则下载状态记为"待下载", 如截止时间前来不及下载)
             
-            # 爬取详情页
-            logger.info("开始爬取详情页...")
-            for idx, std in enumerate(all_standards, 1):
-                logger.info(f"进度: {idx}/{len(all_standards)}")
-                
-                detail_url = std.get("详情页链接")
-                if not detail_url:
-                    logger.warning(f"标准 {std.get('标准号')} 没有详情页链接,跳过")
-                    continue
+        Returns:
+            详情信息(没有详情页链接时为None)
+        """
+        std_start = time.perf_counter()
+        
+        detail_url = std.get("详情页链接")
+        if not detail_url:
+            logger.warning(f"标准 {std.get('标准号')} 没有详情页链接,跳过")
+            return None
+        
+        if self.proxy_pool:
+            # 选择有剩余预算的最健康代理
+            with metrics.span("proxy_acquire"):
+                self._use_identity(self.proxy_pool.acquire())
+        
+        # 爬取详情页
+        with metrics.span("detail_page"):
+            detail_info = self.scrape_detail_page(detail_url)
+        self.budget.record("detail", time.perf_counter() - std_start)
+        
+        if not download:
+            detail_info["下载状态"] = PENDING_DOWNLOAD
+            detail_info["备注"] = "截止时间前未下载"
+            metrics.inc("pdf_downloads", result="deferred")
+            self.data_processor.merge_detail_info(std.get("标准号"), detail_info)
+            return detail_info
+        
+        # 下载PDF
+        download_start = time.perf_counter()
+        with metrics.span("pdf_download"):
+            pdf_path, note = self.download_pdf(
+                std.get("hash_id"), 
+                std.get("标准号"),
+                std.get("标准名称")
+            )
+        self.budget.record("download", time.perf_counter() - download_start)
+        
+        if pdf_path:
+            detail_info["PDF文件名"] = pdf_path
+            detail_info["下载状态"] = "成功"
+            detail_info["备注"] = ""
+        else:
+            detail_info["下载状态"] = "失败"
+            detail_info["备注"] = note # 记录失败原因(如: 未公开)
+        
+        # 合并信息
+        self.data_processor.merge_detail_info(std.get("标准号"), detail_info)
+        # INFO 级别: 低于记录器级别(LOG_CONFIG["level"])的记录不会到达 JSON-lines 日志
+        logger.info(
+            f"标准 {std.get('标准号')} 处理完成({detail_info['下载状态']})",
+            extra={
+                "hash_id": std.get("hash_id"),
+                "std_code": std.get("标准号"),
+                "stage": "standard",
+                "duration": round(time.perf_counter() - std_start, 3),
+            },
+        )
+        return detail_info
+    
+    def scrape_details(self, standards: List[Dict], known_details: Dict[str, Dict] = None,
+                       items_after: int = 0) -> None:
+        """
+        依次处理所有标准的详情页和PDF
+        
+        Args:
+            standards: 列表页数据
+            known_details: 已处理过的详情信息(hash_id -> 详情信息), 命中时直接合并不再访问;
+                新处理的标准也会写入其中(批量任务间去重用)
+            items_after: 本批之后还需处理的标准数(流式爬取时用于截止时间预估)
+        """
+        logger.info("开始爬取详情页...")
+        standards = self.scheduler.order(standards)
+        sample_items = DEADLINE_CONFIG.get("sample_items", 5)
+        stopped_at = None
+        for idx, std in enumerate(standards, 1):
+            if self.budget.expired():
+                stopped_at = idx
+                break
+            logger.info(f"进度: {idx}/{len(standards)}")
+            self.progress = {"stage": "detail", "done": idx - 1, "total": len(standards)}
+            
+            hash_id = std.get("hash_id")
+            if known_details is not None and hash_id in known_details:
+                logger.info(f"标准 {std.get('标准号')} 已在其他任务中处理,直接合并")
+                self.data_processor.merge_detail_info(std.get("标准号"), dict(known_details[hash_id]))
+                continue
+            
+            # 剩余时间只够完成其余详情页时, 不再下载PDF
+            detail_info = self.process_standard(
+                std, download=self.budget.allow_download(len(standards) - idx + items_after)
+            )
+            if detail_info is None:
+                continue
+            if known_details is not None and hash_id and detail_info.get("下载状态") != PENDING_DOWNLOAD:
+                known_details[hash_id] = detail_info
+            
+            # 保存检查点
+            if idx % 5 == 0:  # 完整爬取时建议更频繁保存
+                self.data_processor.save_checkpoint()
+                metrics.write_prometheus()
+                if self.response_cache:
+                    self.response_cache.flush()
+            
+            # 延迟(使用代理池时由各代理的速率预算控制节奏)
+            delay_start = time.perf_counter()
+            if not self.proxy_pool:
+                self._delay("download") # 使用下载延迟配置
+            self.budget.record("delay", time.perf_counter() - delay_start)
+            
+            # 实测若干条后输出剩余耗时预估
+            if self.budget.counts["detail"] == sample_items:
+                self.budget.report(items=len(standards) - idx + items_after)
+        
+        if stopped_at is not None:
+            left = len(standards) - stopped_at + 1
+            logger.warning(f"已到截止时间, 停止处理详情页, 剩余 {left} 条留待下次运行")
+            metrics.inc("standards_deferred", left)
+            self.data_processor.save_checkpoint()
+            return
+        
+        self.progress = {"stage": "detail", "done": len(standards), "total": len(standards)}
+        logger.info("详情页爬取完成")
+    
+    def load_previous_state(self) -> None:
+        """在本次运行覆盖检查点之前, 记录上次各标准的处理状态(供 fresh_first 调度策略使用)"""
+        if not self.scheduler.needs_history:
+            return
+        previous = DataProcessor()
+        previous.load_checkpoint()
+        self.scheduler.load_history(previous.standards_data)
+    
+    def run(self) -> None:
+        """运行爬虫"""
+        try:
+            logger.info("="*60)
+            logger.info("行业标准爬虫启动")
+            logger.info("="*60)
+            
+            # 本地 /metrics 端点(未配置端口时不启动)
+            metrics.start_http_server()
+            
+            # 后台预热OCR引擎(与启动浏览器、应用筛选并行)
+            self.captcha_solver.start_warmup()
+            
+            if not self.streaming:
+                self.load_previous_state()
+            
+            # 启动浏览器
+            with metrics.span("browser_start"):
+                self.start_browser()
+            
+            if self.streaming:
+                # 逐页爬取列表页并处理详情页
+                self.scrape_streaming()
+            else:
+                # 爬取列表页
+                all_standards = self.scrape_listing()
                 
                 # 爬取详情页
-                detail_info = self.scrape_detail_page(detail_url)
-                
-                # 下载PDF
-                pdf_path, note = self.download_pdf(
-                    std.get("hash_id"), 
-                    std.get("标准号"),
-                    std.get("标准名称")
-                )
-                
-                if pdf_path:
-                    detail_info["PDF文件名"] = pdf_path
-                    detail_info["下载状态"] = "成功"
-                    detail_info["备注"] = ""
-                else:
-                    detail_info["下载状态"] = "失败"
-                    detail_info["备注"] = note # 记录失败原因(如: 未公开)
-                
-                # 合并信息
-                self.data_processor.merge_detail_info(std.get("标准号"), detail_info)
-                
-                # 保存检查点
-                if idx % 5 == 0:  # 完整爬取时建议更频繁保存
-                    self.data_processor.save_checkpoint()
-                
-                # 延迟
-                random_delay(DELAY_CONFIG["download"]) # 使用下载延迟配置
-            
-            logger.info("详情页爬取完成")
+                self.scrape_details(all_standards)
             
             # 导出数据
             logger.info("正在导出数据...")
@@ -738,10 +1513,80 @@ class IndustryStandardScraper:
             logger.error(f"爬虫运行失败: {e}", exc_info=True)
             
         finally:
+            if self.response_cache:
+                self.response_cache.flush()
+                logger.info(f"详情页缓存: {self.response_cache.stats}")
             self.close_browser()
+            self.export_metrics()
+    
+    def export_metrics(self) -> None:
+        """导出运行指标(Prometheus文本文件 + JSON汇总)"""
+        if self.proxy_pool:
+            self.proxy_pool.log_summary()
+        if not metrics.enabled:
+            return
+        try:
+            metrics.write_prometheus()
+            logger.info("各阶段耗时(按总耗时排序):")
+            metrics.write_summary()
+        except Exception as e:
+            logger.error(f"导出运行指标失败: {e}")
+        finally:
+            metrics.stop_http_server()
+
+def add_har_arguments(parser: argparse.ArgumentParser) -> None:
+    """添加 HAR 录制/回放命令行参数"""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--record-har", nargs="?", const=HAR_CONFIG["path"], metavar="PATH",
+                       help="录制所有响应到HAR文件(.har 或 .zip)")
+    group.add_argument("--replay-har", nargs="?", const=HAR_CONFIG["path"], metavar="PATH",
+                       help="从HAR文件回放, 不访问网络")
+    parser.add_argument("--har-url-filter", help="仅录制/回放匹配的URL(glob)")
+
+def apply_har_arguments(args: argparse.Namespace) -> None:
+    """根据命令行参数更新 HAR_CONFIG(需在创建爬虫之前调用)"""
+    if args.record_har:
+        HAR_CONFIG.update(mode="record", path=args.record_har)
+    elif args.replay_har:
+        HAR_CONFIG.update(mode="replay", path=args.replay_har)
+    if args.har_url_filter:
+        HAR_CONFIG["url_filter"] = args.har_url_filter
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="行业标准爬虫")
+    add_har_arguments(parser)
+    parser.add_argument("--save-snapshots", action="store_true", help="保存详情页HTML快照(gzip)")
+    parser.add_argument("--response-cache", action="store_true", help="启用详情页响应缓存")
+    parser.add_argument("--priority", help=f"详情页/下载的调度策略, 逗号分隔({', '.join(POLICIES)}), 空字符串表示按列表顺序")
+    parser.add_argument("--pin", nargs="+", default=[], help="优先处理的标准号")
+    parser.add_argument("--pin-file", help="优先处理的标准号文件(每行一个)")
+    parser.add_argument("--deadline", help="截止时间: 23:30、\"2026-10-20 06:00\" 或 90m/2h; 截止前优先完成列表页和详情页")
+    parser.add_argument("--stream", action="store_true", help="流式爬取: 逐页处理详情页和下载, 内存占用与目录规模无关")
+    args = parser.parse_args()
+    apply_har_arguments(args)
+    if args.stream:
+        STREAM_CONFIG["enabled"] = True
+    if args.save_snapshots:
+        SNAPSHOT_CONFIG["enabled"] = True
+    if args.response_cache:
+        RESPONSE_CACHE_CONFIG["enabled"] = True
+    if args.priority is not None:
+        policies = [p.strip() for p in args.priority.split(",") if p.strip()]
+        unknown = [p for p in policies if p not in POLICIES]
+        if unknown:
+            parser.error(f"未知的调度策略: {', '.join(unknown)}(可选: {', '.join(POLICIES)})")
+        SCHEDULER_CONFIG["policies"] = policies
+    if args.pin:
+        SCHEDULER_CONFIG["pinned"] = SCHEDULER_CONFIG["pinned"] + args.pin
+    if args.pin_file:
+        SCHEDULER_CONFIG["pinned_file"] = args.pin_file
+    if args.deadline:
+        try:
+            DEADLINE_CONFIG["deadline"] = parse_deadline(args.deadline)
+        except ValueError as e:
+            parser.error(str(e))
+    
     scraper = IndustryStandardScraper()
     scraper.run()
 
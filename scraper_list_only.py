@@ -1,9 +1,9 @@
 """
 简化版爬虫 - 仅爬取标准清单(不下载PDF)
 """
-from scraper import IndustryStandardScraper
-from utils import setup_logger, random_delay
-from config import DELAY_CONFIG, LIST_URL
+import argparse
+from scraper import IndustryStandardScraper, add_har_arguments, apply_har_arguments
+from utils import setup_logger
 
 logger = setup_logger("scraper_list_only")
 
@@ -20,40 +20,8 @@ class ListOnlyScraper(IndustryStandardScraper):
             # 启动浏览器
             self.start_browser()
             
-            # 访问列表页
-            logger.info(f"正在访问列表页: {LIST_URL}")
-            self.page.goto(LIST_URL)
-            
-            # 应用筛选条件
-            self.apply_filters()
-            
-            # 获取总页数
-            total_pages = self.get_total_pages()
-            logger.info(f"共 {total_pages} 页数据")
-            
-            # 爬取所有列表页
-            all_standards = []
-            for page_num in range(1, total_pages + 1):
-                standards = self.scrape_list_page(page_num)
-                all_standards.extend(standards)
-                
-                # 添加到数据处理器
-                for std in standards:
-                    self.data_processor.add_standard(std)
-                
-                # 保存检查点
-                self.data_processor.save_checkpoint()
-                
-                # 延迟
-                if page_num < total_pages:
-                    random_delay(DELAY_CONFIG["list_page"])
-            
-            logger.info(f"列表页爬取完成,共 {len(all_standards)} 条标准")
-            
-            logger.info(f"列表页爬取完成,共 {len(all_standards)} 条标准")
-            
-            # (已优化) 仅爬取清单模式不进入详情页
-            # 导出数据
+            # 爬取列表页(仅爬取清单模式不进入详情页)
+            self.scrape_listing()
             
             # 导出数据
             logger.info("正在导出数据...")
@@ -78,6 +46,10 @@ class ListOnlyScraper(IndustryStandardScraper):
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="行业标准爬虫(仅爬取清单)")
+    add_har_arguments(parser)
+    apply_har_arguments(parser.parse_args())
+    
     scraper = ListOnlyScraper()
     scraper.run()
 
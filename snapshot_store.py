@@ -0,0 +1,98 @@
+"""
+详情页HTML快照存储 - 按 hash_id 保存 gzip 压缩的页面HTML
+
+目录结构: <dir>/<hash_id前两位>/<hash_id>.html.gz (分子目录避免单目录文件过多)
+
+用法:
+    store = SnapshotStore()
+    store.save(hash_id, page.content())
+    html = store.load(hash_id)
+"""
+import gzip
+import os
+from pathlib import Path
+from typing import Iterator, Optional
+from utils import setup_logger, ensure_dir
+from config import SNAPSHOT_CONFIG
+
+logger = setup_logger("snapshot_store")
+
+SUFFIX = ".html.gz"
+
+class SnapshotStore:
+    """详情页HTML快照存储"""
+
+    def __init__(self, root: str = None, compress_level: int = None):
+        """
+        初始化快照存储
+
+        Args:
+            root: 快照目录(默认使用配置)
+            compress_level: gzip压缩级别(默认使用配置)
+        """
+        self.root = Path(root or SNAPSHOT_CONFIG["dir"])
+        self.compress_level = compress_level or SNAPSHOT_CONFIG.get("compress_level", 6)
+        ensure_dir(str(self.root))
+
+    def path_for(self, hash_id: str) -> Path:
+        """快照文件路径"""
+        return self.root / hash_id[:2] / f"{hash_id}{SUFFIX}"
+
+    def save(self, hash_id: str, html: str) -> Optional[Path]:
+        """
+        保存快照(先写临时文件再替换, 中断时不会留下半截文件)
+
+        Args:
+            hash_id: 标准hash ID
+            html: 页面HTML
+
+        Returns:
+            快照路径(hash_id为空时为None)
+        """
+        if not hash_id:
+            return None
+        path = self.path_for(hash_id)
+        ensure_dir(str(path.parent))
+        tmp = path.with_name(path.name + ".tmp")
+        with gzip.open(tmp, "wb", compresslevel=self.compress_level) as f:
+            f.write(html.encode("utf-8"))
+        os.replace(tmp, path)
+        logger.debug(f"已保存快照: {hash_id}")
+        return path
+
+    def load(self, hash_id: str) -> Optional[str]:
+        """
+        读取快照
+
+        Returns:
+            页面HTML(不存在时为None)
+        """
+        path = self.path_for(hash_id)
+        if not path.exists():
+            return None
+        return read_snapshot(str(path))
+
+    def exists(self, hash_id: str) -> bool:
+        """快照是否存在"""
+        return self.path_for(hash_id).exists()
+
+    def iter_paths(self) -> Iterator[Path]:
+        """遍历所有快照文件"""
+        return self.root.glob(f"*/*{SUFFIX}")
+
+    def iter_ids(self) -> Iterator[str]:
+        """遍历所有快照的 hash_id"""
+        for path in self.iter_paths():
+            yield hash_id_from_path(path)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.iter_paths())
+
+def read_snapshot(path: str) -> str:
+    """读取并解压一个快照文件"""
+    with gzip.open(path, "rb") as f:
+        return f.read().decode("utf-8")
+
+def hash_id_from_path(path) -> str:
+    """从快照文件路径提取 hash_id"""
+    return Path(path).name[:-len(SUFFIX)]
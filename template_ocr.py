@@ -0,0 +1,229 @@
+"""
+模板匹配验证码识别模块 - 仅依赖 NumPy/OpenCV 的轻量识别引擎
+
+流程: 二值化 → 连通域切分字符 → 缩放为固定尺寸特征向量 → 与模板矩阵做一次矩阵乘法
+(余弦相似度)得到每个字符的最佳匹配。模板由已标注的验证码学习得到(见 train 命令),
+不依赖 torch/onnxruntime, 适合打包版使用。
+
+用法:
+    python template_ocr.py train captcha_samples output/captcha_corpus
+    python template_ocr.py train output/captcha_corpus -o assets/captcha_templates.npz
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+import cv2
+import numpy as np
+from utils import setup_logger, ensure_dir
+from config import CAPTCHA_CONFIG
+
+logger = setup_logger("template_ocr")
+
+class TemplateOCR:
+    """基于模板匹配的验证码识别器"""
+
+    # 字符特征尺寸(宽, 高)
+    FEATURE_SIZE = (12, 16)
+    # 小于该面积的连通域视为噪点/干扰线残留
+    MIN_COMPONENT_AREA = 12
+
+    def __init__(self, template_path: str = None, captcha_length: int = None):
+        """
+        初始化模板识别器
+
+        Args:
+            template_path: 模板文件路径(.npz), 为None时使用配置
+            captcha_length: 验证码字符数, 为None时使用配置
+        """
+        self.template_path = template_path if template_path is not None else CAPTCHA_CONFIG.get("template_path")
+        self.captcha_length = captcha_length or CAPTCHA_CONFIG.get("captcha_length", 4)
+        self.templates: Optional[np.ndarray] = None  # (K, D) float32, 行已归一化
+        self.labels: Optional[np.ndarray] = None     # (K,) 字符
+
+        if self.template_path and Path(self.template_path).exists():
+            self.load(self.template_path)
+
+    @property
+    def is_trained(self) -> bool:
+        """是否已加载模板"""
+        return self.templates is not None and len(self.templates) > 0
+
+    def load(self, template_path: str) -> None:
+        """加载模板文件"""
+        data = np.load(template_path)
+        self.templates = data["features"].astype(np.float32)
+        self.labels = data["labels"]
+        logger.info(f"已加载验证码模板: {template_path} ({len(self.labels)} 个模板)")
+
+    def save(self, template_path: str) -> None:
+        """保存模板文件"""
+        ensure_dir(str(Path(template_path).parent))
+        np.savez_compressed(template_path, features=self.templates, labels=self.labels)
+        logger.info(f"验证码模板已保存: {template_path}")
+
+    @staticmethod
+    def binarize(img_bytes: bytes) -> np.ndarray:
+        """
+        二值化验证码图片(字符为255, 背景为0)
+
+        与 CaptchaSolver.preprocess_image 思路一致, 但在原始分辨率上进行,
+        不做放大, 以保证单次识别耗时在亚毫秒级
+        """
+        buf = np.frombuffer(img_bytes, dtype=np.uint8)
+        gray = cv2.imdecode(buf, cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            raise ValueError("无法解码验证码图片")
+
+        # 背景为浅色、字符为彩色: Otsu 反向阈值得到字符前景
+        _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+
+        # 开运算去除细干扰线
+        kernel = np.ones((2, 2), np.uint8)
+        return cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+
+    def segment(self, mask: np.ndarray, expected: int = None) -> List[np.ndarray]:
+        """
+        按连通域切分字符, 并调整为期望的字符数
+
+        Args:
+            mask: 二值图
+            expected: 期望字符数
+
+        Returns:
+            从左到右的字符图块列表
+        """
+        expected = expected or self.captcha_length
+        count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+
+        # stats 每行: x, y, w, h, area; 第0行为背景
+        boxes = [tuple(stats[i, :4]) for i in range(1, count) if stats[i, 4] >= self.MIN_COMPONENT_AREA]
+
+        # 连通域过多: 保留面积最大的若干个
+        if len(boxes) > expected:
+            boxes = sorted(boxes, key=lambda b: b[2] * b[3], reverse=True)[:expected]
+
+        # 连通域过少(字符粘连): 反复将最宽的块从中间切开
+        while boxes and len(boxes) < expected:
+            widest = max(range(len(boxes)), key=lambda i: boxes[i][2])
+            x, y, w, h = boxes.pop(widest)
+            if w < 2:
+                break
+            half = w // 2
+            boxes.extend([(x, y, half, h), (x + half, y, w - half, h)])
+
+        boxes.sort(key=lambda b: b[0])
+        return [mask[y:y + h, x:x + w] for x, y, w, h in boxes]
+
+    def features(self, crops: List[np.ndarray]) -> np.ndarray:
+        """
+        将字符图块转换为归一化特征矩阵
+
+        Returns:
+            (N, D) float32 矩阵, 每行为零均值单位长度向量
+        """
+        width, height = self.FEATURE_SIZE
+        feats = np.empty((len(crops), width * height), dtype=np.float32)
+        for i, crop in enumerate(crops):
+            feats[i] = cv2.resize(crop, (width, height), interpolation=cv2.INTER_AREA).ravel()
+
+        feats -= feats.mean(axis=1, keepdims=True)
+        norms = np.linalg.norm(feats, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        feats /= norms
+        return feats
+
+    def classify(self, img_bytes: bytes) -> Tuple[str, float]:
+        """
+        识别验证码
+
+        Args:
+            img_bytes: 验证码图片字节数据
+
+        Returns:
+            (识别文本, 匹配得分) - 得分为各字符余弦相似度的最小值
+        """
+        if not self.is_trained:
+            raise RuntimeError("验证码模板未加载, 请先运行: python template_ocr.py train <语料目录>")
+
+        crops = self.segment(self.binarize(img_bytes))
+        if not crops:
+            return "", 0.0
+
+        # 一次矩阵乘法完成所有字符与所有模板的比对
+        scores = self.features(crops) @ self.templates.T
+        best = scores.argmax(axis=1)
+        best_scores = scores[np.arange(len(best)), best]
+
+        text = "".join(str(c) for c in self.labels[best])
+        return text, float(best_scores.min())
+
+    def train(self, samples: Iterable[Tuple[bytes, str]], max_per_char: int = 50) -> int:
+        """
+        从已标注样本学习字符模板
+
+        Args:
+            samples: [(图片字节, 标注文本)]
+            max_per_char: 每个字符最多保留的模板数
+
+        Returns:
+            成功用于训练的样本数
+        """
+        feature_blocks = []
+        label_blocks = []
+        used = 0
+
+        for img_bytes, label in samples:
+            try:
+                crops = self.segment(self.binarize(img_bytes), expected=len(label))
+            except Exception as e:
+                logger.debug(f"跳过无法解析的样本 {label}: {e}")
+                continue
+            if len(crops) != len(label):
+                continue
+            feature_blocks.append(self.features(crops))
+            label_blocks.extend(label)
+            used += 1
+
+        if not feature_blocks:
+            raise ValueError("没有可用于训练的样本")
+
+        features = np.vstack(feature_blocks)
+        labels = np.array(label_blocks)
+
+        # 每个字符仅保留前 max_per_char 个模板, 控制矩阵规模
+        keep = []
+        for char in np.unique(labels):
+            keep.extend(np.flatnonzero(labels == char)[:max_per_char])
+        keep = np.sort(np.array(keep))
+
+        self.templates = features[keep]
+        self.labels = labels[keep]
+        logger.info(f"模板训练完成: {used} 个样本, {len(np.unique(self.labels))} 种字符, {len(self.labels)} 个模板")
+        return used
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="模板匹配验证码引擎")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    train_parser = sub.add_parser("train", help="从已标注验证码学习字符模板")
+    train_parser.add_argument("corpus_dirs", nargs="+", help="标注图片目录或验证码语料目录")
+    train_parser.add_argument("-o", "--output", default=CAPTCHA_CONFIG.get("template_path"), help="模板输出路径")
+    train_parser.add_argument("--max-per-char", type=int, default=50, help="每个字符最多保留的模板数")
+
+    args = parser.parse_args()
+
+    from benchmark_captcha import load_labelled_images
+    samples = []
+    for corpus_dir in args.corpus_dirs:
+        samples.extend((img_bytes, label) for _, label, img_bytes in load_labelled_images(corpus_dir))
+    logger.info(f"已加载 {len(samples)} 个标注样本")
+
+    ocr = TemplateOCR(template_path="")
+    ocr.train(samples, max_per_char=args.max_per_char)
+    ocr.save(args.output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+"""
+时间预算 - 按实测吞吐量预估爬取总耗时, 有截止时间时在截止前尽可能多地完成
+
+    - 预估: 列表页按页计时, 详情页、每条之间的延迟和PDF下载按条计时(最近 window 个样本的平均值),
+      总记录数来自 get_total_pages; 尚无实测数据时使用 initial_estimates
+    - 截止时间: 列表页和详情页优先完成; 剩余时间不足以在完成全部详情页的同时再下载一个PDF时,
+      该标准的下载状态记为"待下载", 下次运行(或 retry_failed.py)时处理
+    - 到达截止时间(扣除 reserve_seconds)时停止, 保存检查点并导出
+"""
+import re
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from utils import setup_logger
+from config import DEADLINE_CONFIG
+
+logger = setup_logger("time_budget")
+
+# 截止前未下载的标准的下载状态
+PENDING_DOWNLOAD = "待下载"
+
+STAGES = ("list_page", "detail", "delay", "download")
+
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600}
+
+def parse_deadline(text: str, now: datetime = None) -> datetime:
+    """
+    解析截止时间
+
+    Args:
+        text: "23:30"(今天, 已过则为明天)、"2026-10-20 06:00" 或 "90m"/"2h"/"+45m"(从现在算起)
+        now: 当前时间(默认 datetime.now())
+
+    Returns:
+        截止时间
+    """
+    now = now or datetime.now()
+    text = str(text).strip()
+    match = re.fullmatch(r"\+?(\d+(?:\.\d+)?)\s*([smh])", text)
+    if match:
+        return now + timedelta(seconds=float(match.group(1)) * _DURATION_UNITS[match.group(2)])
+    match = re.fullmatch(r"(\d{1,2}):(\d{2})", text)
+    if match:
+        deadline = now.replace(hour=int(match.group(1)), minute=int(match.group(2)), second=0, microsecond=0)
+        return deadline if deadline > now else deadline + timedelta(days=1)
+    try:
+        deadline = datetime.fromisoformat(text.replace("/", "-"))
+    except ValueError:
+        raise ValueError(f"无法解析截止时间: {text}") from None
+    if deadline.tzinfo is not None:
+        # 带时区的时间转换为本地时间(与 datetime.now() 比较)
+        deadline = deadline.astimezone().replace(tzinfo=None)
+    return deadline
+
+def format_duration(seconds: float) -> str:
+    """秒数转为 "1小时5分" / "3分20秒" 形式"""
+    seconds = max(0, int(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}小时{minutes}分"
+    if minutes:
+        return f"{minutes}分{secs}秒"
+    return f"{secs}秒"
+
+class TimeBudget:
+    """各阶段耗时统计与截止时间控制"""
+
+    def __init__(self, deadline=None, reserve_seconds: float = None, window: int = None,
+                 initial_estimates: Dict[str, float] = None):
+        """
+        初始化时间预算(参数未指定时使用 DEADLINE_CONFIG)
+
+        Args:
+            deadline: 截止时间(datetime 或 parse_deadline 支持的文本), None 不限
+            reserve_seconds: 为保存和导出预留的秒数
+            window: 计算平均耗时的样本数
+            initial_estimates: 尚无实测数据时各阶段的估计耗时(秒)
+        """
+        deadline = DEADLINE_CONFIG.get("deadline") if deadline is None else deadline
+        if deadline is not None and not isinstance(deadline, datetime):
+            deadline = parse_deadline(deadline)
+        elif deadline is not None and deadline.tzinfo is not None:
+            deadline = deadline.astimezone().replace(tzinfo=None)
+        self.deadline: Optional[datetime] = deadline
+        self.reserve = DEADLINE_CONFIG.get("reserve_seconds", 120) if reserve_seconds is None else reserve_seconds
+        window = window or DEADLINE_CONFIG.get("window", 50)
+        self.estimates = dict(DEADLINE_CONFIG.get("initial_estimates", {}))
+        self.estimates.update(initial_estimates or {})
+        self.samples = {stage: deque(maxlen=window) for stage in STAGES}
+        self.counts = {stage: 0 for stage in STAGES}
+        if self.deadline:
+            logger.info(f"截止时间: {self.deadline:%Y-%m-%d %H:%M}(剩余 {format_duration(self.remaining())})")
+
+    def record(self, stage: str, seconds: float) -> None:
+        """记录一页/一条的实测耗时"""
+        self.samples[stage].append(seconds)
+        self.counts[stage] += 1
+
+    def rate(self, stage: str) -> float:
+        """阶段的平均耗时(秒/页 或 秒/条)"""
+        samples = self.samples[stage]
+        if samples:
+            return sum(samples) / len(samples)
+        return float(self.estimates.get(stage, 0))
+
+    def remaining(self) -> Optional[float]:
+        """距截止时间的秒数(不扣除预留时间), 无截止时间时为None"""
+        if self.deadline is None:
+            return None
+        return (self.deadline - datetime.now()).total_seconds()
+
+    def expired(self) -> bool:
+        """是否已到截止时间(扣除预留时间)"""
+        remaining = self.remaining()
+        return remaining is not None and remaining <= self.reserve
+
+    def allow_download(self, items_left: int) -> bool:
+        """
+        当前标准是否还有时间下载PDF
+
+        Args:
+            items_left: 当前标准之后还需处理详情页的标准数
+
+        Returns:
+            下载后仍能在截止前完成剩余详情页时为True
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return True
+        spare = remaining - self.reserve - items_left * (self.rate("detail") + self.rate("delay"))
+        # 尚未实测过下载耗时时, 只要详情页来得及就先下载一个, 以便得到实测值
+        return spare >= (self.rate("download") if self.counts["download"] else 0)
+
+    def estimate(self, pages: int = 0, items: int = 0, downloads: int = None) -> float:
+        """
+        预估剩余工作的耗时
+
+        Args:
+            pages: 待爬取的列表页数
+            items: 待处理详情页的标准数
+            downloads: 待下载的PDF数(默认与 items 相同)
+
+        Returns:
+            预估秒数
+        """
+        downloads = items if downloads is None else downloads
+        return (pages * self.rate("list_page")
+                + items * (self.rate("detail") + self.rate("delay"))
+                + downloads * self.rate("download"))
+
+    def report(self, pages: int = 0, items: int = 0, measured: bool = True) -> Dict:
+        """
+        输出剩余工作的预估耗时, 有截止时间时给出截止前预计能完成的下载数
+
+        Args:
+            pages: 待爬取的列表页数
+            items: 待处理的标准数
+            measured: 是否已有实测数据(仅影响日志措辞)
+
+        Returns:
+            预估信息
+        """
+        total = self.estimate(pages, items)
+        label = "实测" if measured else "初步"
+        parts = [f"列表页 {pages} 页 × {self.rate('list_page'):.1f}s"] if pages else []
+        parts += [
+            f"详情页 {items} 条 × {self.rate('detail') + self.rate('delay'):.1f}s",
+            f"PDF {items} 个 × {self.rate('download'):.1f}s",
+        ]
+        logger.info(f"{label}预估: {', '.join(parts)}, 共约 {format_duration(total)}")
+        info = {"pages": pages, "items": items, "estimated_seconds": round(total, 1)}
+        remaining = self.remaining()
+        if remaining is None:
+            return info
+
+        available = remaining - self.reserve
+        info["available_seconds"] = round(available, 1)
+        if total <= available:
+            logger.info(f"距截止时间 {format_duration(remaining)}, 预计可以全部完成")
+            info["downloads"] = items
+            return info
+        spare = available - self.estimate(pages, items, downloads=0)
+        downloads = min(items, max(0, int(spare // max(self.rate("download"), 0.001))))
+        info["downloads"] = downloads
+        if spare < 0:
+            logger.warning(
+                f"距截止时间 {format_duration(remaining)}, 预计无法完成全部详情页"
+                f"(还差 {format_duration(-spare)}), 到期时停止并保存进度"
+            )
+        else:
+            logger.warning(
+                f"距截止时间 {format_duration(remaining)}, 预计可完成列表页和详情页, "
+                f"PDF 约可下载 {downloads}/{items} 个, 其余记为\"{PENDING_DOWNLOAD}\"留待下次"
+            )
+        return info
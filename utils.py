@@ -2,15 +2,155 @@
 工具函数模块
 """
 import re
+import json
 import time
+import queue
+import atexit
 import random
 import logging
+import logging.handlers
+import threading
 from pathlib import Path
-from typing import Tuple
+from typing import Optional, Tuple
 from config import LOG_CONFIG, LOG_FILE
 
+# 结构化日志字段: 通过 logger.info(..., extra={"hash_id": ..., "stage": ..., "duration": ...}) 传入
+STRUCTURED_LOG_FIELDS = ("hash_id", "std_code", "stage", "duration")
+
+class _CachedFormatter(logging.Formatter):
+    """同一条记录只格式化一次, 由文件和控制台处理器共用结果"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        cached = getattr(record, "_formatted", None)
+        if cached is None:
+            cached = super().format(record)
+            record._formatted = cached
+        return cached
+
+class JsonLinesFormatter(logging.Formatter):
+    """JSON-lines 格式(每行一条记录, 附带结构化字段, 便于程序解析)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in STRUCTURED_LOG_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                data[field] = value
+        if record.exc_text:
+            data["exception"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    调用线程只做最少的工作: 合并消息参数、渲染异常堆栈后入队,
+    完整的格式化留给后台监听线程
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+_exception_formatter = logging.Formatter()
+_log_queue: Optional[queue.SimpleQueue] = None
+_log_listener: Optional[logging.handlers.QueueListener] = None
+_log_lock = threading.Lock()
+
+def _start_log_listener() -> queue.SimpleQueue:
+    """创建日志队列及后台监听线程(进程内只创建一次)"""
+    global _log_queue, _log_listener
+
+    with _log_lock:
+        if _log_queue is not None:
+            return _log_queue
+
+        formatter = _CachedFormatter(
+            LOG_CONFIG["format"],
+            datefmt=LOG_CONFIG["date_format"]
+        )
+        
+        # 文件处理器(按大小轮转)
+        Path(LOG_FILE).parent.mkdir(parents=True, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            LOG_FILE,
+            maxBytes=LOG_CONFIG.get("max_bytes", 10 * 1024 * 1024),
+            backupCount=LOG_CONFIG.get("backup_count", 5),
+            encoding='utf-8',
+        )
+        file_handler.setLevel(logging.DEBUG)
+        file_handler.setFormatter(formatter)
+        
+        # 控制台处理器
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(logging.INFO)
+        console_handler.setFormatter(formatter)
+        
+        handlers = [file_handler, console_handler]
+        
+        # 可选: JSON-lines 结构化日志
+        json_file = LOG_CONFIG.get("json_file")
+        if json_file:
+            Path(json_file).parent.mkdir(parents=True, exist_ok=True)
+            json_handler = logging.handlers.RotatingFileHandler(
+                json_file,
+                maxBytes=LOG_CONFIG.get("max_bytes", 10 * 1024 * 1024),
+                backupCount=LOG_CONFIG.get("backup_count", 5),
+                encoding='utf-8',
+            )
+            json_handler.setLevel(logging.DEBUG)
+            json_handler.setFormatter(JsonLinesFormatter())
+            handlers.append(json_handler)
+        
+        _log_queue = queue.SimpleQueue()
+        _log_listener = logging.handlers.QueueListener(_log_queue, *handlers, respect_handler_level=True)
+        _log_listener.start()
+        atexit.register(stop_logging)
+        return _log_queue
+
+def stop_logging() -> None:
+    """停止后台日志线程(会先写完队列中剩余的记录)"""
+    global _log_listener
+    with _log_lock:
+        if _log_listener is not None:
+            _log_listener.stop()
+            for handler in _log_listener.handlers:
+                handler.close()
+            _log_listener = None
+
+def add_log_handler(handler: logging.Handler) -> None:
+    """
+    在后台日志线程上追加一个处理器(如GUI日志窗口)
+
+    Args:
+        handler: 日志处理器
+    """
+    _start_log_listener()
+    with _log_lock:
+        if _log_listener is not None and handler not in _log_listener.handlers:
+            _log_listener.handlers = _log_listener.handlers + (handler,)
+
+def remove_log_handler(handler: logging.Handler) -> None:
+    """移除通过 add_log_handler 追加的处理器"""
+    with _log_lock:
+        if _log_listener is not None:
+            _log_listener.handlers = tuple(h for h in _log_listener.handlers if h is not handler)
+
 def setup_logger(name: str = "scraper") -> logging.Logger:
-    """设置日志记录器"""
+    """
+    设置日志记录器
+
+    各模块的记录器只挂一个队列处理器, 格式化和写文件/控制台在后台线程中完成,
+    爬取线程不会因日志IO阻塞
+    """
     logger = logging.getLogger(name)
     logger.setLevel(getattr(logging, LOG_CONFIG["level"]))
     
@@ -18,25 +158,9 @@ def setup_logger(name: str = "scraper") -> logging.Logger:
     if logger.handlers:
         return logger
     
-    # 文件处理器
-    Path(LOG_FILE).parent.mkdir(parents=True, exist_ok=True)
-    file_handler = logging.FileHandler(LOG_FILE, encoding='utf-8')
-    file_handler.setLevel(logging.DEBUG)
-    
-    # 控制台处理器
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    
-    # 格式化
-    formatter = logging.Formatter(
-        LOG_CONFIG["format"],
-        datefmt=LOG_CONFIG["date_format"]
-    )
-    file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
-    
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    logger.addHandler(_DeferredQueueHandler(_start_log_listener()))
+    # 记录已由队列分发到所有输出, 不再向根记录器传播(否则会被重复处理)
+    logger.propagate = False
     
     return logger
 
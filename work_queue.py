@@ -0,0 +1,306 @@
+"""
+任务队列 - 基于 SQLite 的租约式队列, 供多个爬取节点协作
+
+    - 同一 (kind, key) 只入队一次(按 hash_id 去重)
+    - 工作节点租用任务并定期续约; 租约过期(节点崩溃或失联)的任务自动重新入队(超过最大尝试次数时标记为失败)
+    - 失败的任务重新入队, 超过最大尝试次数后标记为失败
+
+多台机器共用时把数据库放在共享存储上。每次操作使用独立连接和短事务(BEGIN IMMEDIATE),
+不使用 WAL 模式(WAL 依赖共享内存, 不适用于网络文件系统)。
+"""
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+from utils import setup_logger, ensure_dir
+from config import DISTRIBUTED_CONFIG
+
+logger = setup_logger("work_queue")
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    UNIQUE (kind, key)
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, priority, id);
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    started REAL NOT NULL,
+    heartbeat REAL NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+class WorkQueue:
+    """SQLite 租约式任务队列"""
+
+    def __init__(self, path: str = None, lease_seconds: float = None, max_attempts: int = None):
+        """
+        初始化任务队列(数据库不存在时创建)
+
+        Args:
+            path: 数据库路径(默认使用配置)
+            lease_seconds: 租约时长(秒)
+            max_attempts: 每个任务最多尝试次数
+        """
+        self.path = str(path or DISTRIBUTED_CONFIG["queue_path"])
+        self.lease_seconds = lease_seconds or DISTRIBUTED_CONFIG["lease_seconds"]
+        self.max_attempts = max_attempts or DISTRIBUTED_CONFIG["max_attempts"]
+        ensure_dir(str(Path(self.path).parent))
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self, immediate: bool = False) -> Iterator[sqlite3.Connection]:
+        """打开连接; immediate=True 时在写锁事务中执行"""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            if immediate:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    yield conn
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+            else:
+                yield conn
+        finally:
+            conn.close()
+
+    # ---------- 入队 ----------
+
+    def enqueue_many(self, kind: str, items: Sequence[Dict], key_field: str = "hash_id", priority: int = 0) -> int:
+        """
+        批量入队(已存在的 (kind, key) 忽略)
+
+        Args:
+            kind: 任务类型
+            items: 任务数据
+            key_field: 去重键所在字段
+            priority: 优先级(越大越先处理)
+
+        Returns:
+            新入队的任务数
+        """
+        now = time.time()
+        rows = [
+            (kind, str(item[key_field]), json.dumps(item, ensure_ascii=False, default=str), priority, now, now)
+            for item in items if item.get(key_field)
+        ]
+        with self._connect(immediate=True) as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO tasks (kind, key, payload, priority, created, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            added = conn.total_changes - before
+        logger.info(f"入队 {added} 个 {kind} 任务(重复 {len(rows) - added} 个)")
+        return added
+
+    # ---------- 租用与上报 ----------
+
+    def register_worker(self, worker_id: str) -> None:
+        """登记工作节点"""
+        now = time.time()
+        with self._connect(immediate=True) as conn:
+            conn.execute(
+                "INSERT INTO workers (id, started, heartbeat) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET heartbeat = excluded.heartbeat",
+                (worker_id, now, now),
+            )
+
+    def requeue_expired(self, conn: sqlite3.Connection = None) -> int:
+        """
+        收回租约已过期的任务: 未超过最大尝试次数的重新入队, 否则标记为失败
+        (任务导致节点崩溃或卡死时不会被无限重试)
+
+        Returns:
+            重新入队的任务数
+        """
+        if conn is None:
+            with self._connect(immediate=True) as conn:
+                return self.requeue_expired(conn)
+        now = time.time()
+        failed = conn.execute(
+            "UPDATE tasks SET status = ?, error = ?, lease_owner = NULL, lease_expires = NULL, updated = ? "
+            "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+            (FAILED, "租约过期(已达最大尝试次数)", now, LEASED, now, self.max_attempts),
+        ).rowcount
+        if failed:
+            logger.warning(f"{failed} 个任务租约过期且已达最大尝试次数, 标记为失败")
+        requeued = conn.execute(
+            "UPDATE tasks SET status = ?, lease_owner = NULL, lease_expires = NULL, updated = ? "
+            "WHERE status = ? AND lease_expires < ?",
+            (PENDING, now, LEASED, now),
+        ).rowcount
+        if requeued:
+            logger.warning(f"{requeued} 个任务租约过期, 已重新入队")
+        return requeued
+
+    def lease(self, worker_id: str, kind: str, limit: int = 1) -> List[Dict]:
+        """
+        租用待处理任务
+
+        Args:
+            worker_id: 工作节点ID
+            kind: 任务类型
+            limit: 最多租用数量
+
+        Returns:
+            任务列表 [{"id", "key", "payload", "attempts"}]
+        """
+        now = time.time()
+        with self._connect(immediate=True) as conn:
+            self.requeue_expired(conn)
+            rows = conn.execute(
+                "SELECT id, key, payload, attempts FROM tasks WHERE status = ? AND kind = ? "
+                "ORDER BY priority DESC, id LIMIT ?",
+                (PENDING, kind, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE tasks SET status = ?, lease_owner = ?, lease_expires = ?, attempts = attempts + 1, updated = ? "
+                "WHERE id = ?",
+                [(LEASED, worker_id, now + self.lease_seconds, now, row["id"]) for row in rows],
+            )
+            conn.execute("UPDATE workers SET heartbeat = ? WHERE id = ?", (now, worker_id))
+        return [
+            {"id": row["id"], "key": row["key"], "payload": json.loads(row["payload"]), "attempts": row["attempts"] + 1}
+            for row in rows
+        ]
+
+    def heartbeat(self, worker_id: str, task_ids: Sequence[int]) -> int:
+        """
+        续约(延长该节点持有的任务租约)
+
+        Returns:
+            成功续约的任务数(租约已被收回的任务不计)
+        """
+        now = time.time()
+        with self._connect(immediate=True) as conn:
+            conn.execute("UPDATE workers SET heartbeat = ? WHERE id = ?", (now, worker_id))
+            renewed = 0
+            for task_id in task_ids:
+                renewed += conn.execute(
+                    "UPDATE tasks SET lease_expires = ?, updated = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+                    (now + self.lease_seconds, now, task_id, LEASED, worker_id),
+                ).rowcount
+        return renewed
+
+    def complete(self, task_id: int, worker_id: str, result: Dict) -> bool:
+        """
+        上报任务完成
+
+        Returns:
+            是否记录成功(租约已过期并被收回、重新分配或标记为失败时为False)
+        """
+        with self._connect(immediate=True) as conn:
+            updated = conn.execute(
+                "UPDATE tasks SET status = ?, result = ?, error = NULL, lease_owner = NULL, lease_expires = NULL, "
+                "updated = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+                (DONE, json.dumps(result, ensure_ascii=False, default=str), time.time(), task_id, LEASED, worker_id),
+            ).rowcount
+            if updated:
+                conn.execute("UPDATE workers SET done = done + 1, heartbeat = ? WHERE id = ?", (time.time(), worker_id))
+            else:
+                conn.execute("UPDATE workers SET heartbeat = ? WHERE id = ?", (time.time(), worker_id))
+        return bool(updated)
+
+    def fail(self, task_id: int, worker_id: str, error: str) -> str:
+        """
+        上报任务失败(未超过最大尝试次数时重新入队)
+
+        Returns:
+            任务的新状态
+        """
+        with self._connect(immediate=True) as conn:
+            row = conn.execute("SELECT attempts FROM tasks WHERE id = ?", (task_id,)).fetchone()
+            status = PENDING if row and row["attempts"] < self.max_attempts else FAILED
+            updated = conn.execute(
+                "UPDATE tasks SET status = ?, error = ?, lease_owner = NULL, lease_expires = NULL, updated = ? "
+                "WHERE id = ? AND status = ? AND lease_owner = ?",
+                (status, error, time.time(), task_id, LEASED, worker_id),
+            ).rowcount
+            if updated:
+                conn.execute("UPDATE workers SET failed = failed + 1, heartbeat = ? WHERE id = ?", (time.time(), worker_id))
+            else:
+                conn.execute("UPDATE workers SET heartbeat = ? WHERE id = ?", (time.time(), worker_id))
+        return status
+
+    # ---------- 状态 ----------
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._connect(immediate=True) as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def counts(self, kind: str = None) -> Dict[str, int]:
+        """各状态的任务数"""
+        query = "SELECT status, COUNT(*) AS n FROM tasks"
+        params = ()
+        if kind:
+            query += " WHERE kind = ?"
+            params = (kind,)
+        with self._connect() as conn:
+            rows = conn.execute(query + " GROUP BY status", params).fetchall()
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+    def workers(self) -> List[Dict]:
+        """各工作节点的统计"""
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute("SELECT * FROM workers ORDER BY started")]
+
+    def iter_tasks(self, kind: str, statuses: Sequence[str] = (DONE, FAILED)) -> Iterator[Dict]:
+        """
+        遍历任务(含数据和结果)
+
+        Yields:
+            {"key", "status", "payload", "result", "error", "attempts"}
+        """
+        marks = ",".join("?" * len(statuses))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT key, status, payload, result, error, attempts FROM tasks "
+                f"WHERE kind = ? AND status IN ({marks}) ORDER BY id",
+                (kind, *statuses),
+            ).fetchall()
+        for row in rows:
+            yield {
+                "key": row["key"],
+                "status": row["status"],
+                "payload": json.loads(row["payload"]),
+                "result": json.loads(row["result"]) if row["result"] else None,
+                "error": row["error"],
+                "attempts": row["attempts"],
+            }